@@ -0,0 +1,51 @@
+"""Benchmark segment distances: per-segment geodesic versus DistanceCache
+
+Run with `poetry run python benchmarks/bench_distances.py`.
+"""
+import time
+
+import numpy as np
+from geopy.distance import geodesic
+
+from google_semantic_location_history.distances import DistanceCache
+
+CENTER = (52.09, 5.12)
+SEGMENTS = 18000  # 36 months with 500 activity segments
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench(total, rng):
+    """Time distances of SEGMENTS random trips between `total` places"""
+    latitudes = CENTER[0] + rng.uniform(-0.05, 0.05, total)
+    longitudes = CENTER[1] + rng.uniform(-0.05, 0.05, total)
+    # visits concentrate on a few top places, as in the 2019 profile of simulation_gslh
+    weights = np.full(total, 0.25 / (total - 3))
+    weights[:3] = [0.4, 0.3, 0.05]
+    start = rng.choice(total, size=SEGMENTS, p=weights)
+    end = rng.choice(total, size=SEGMENTS, p=weights)
+
+    def per_segment():
+        for i, j in zip(start.tolist(), end.tolist()):
+            geodesic((latitudes[i], longitudes[i]), (latitudes[j], longitudes[j]))
+
+    def cached(method):
+        cache = DistanceCache(latitudes, longitudes, method=method)
+        for month in np.array_split(np.arange(SEGMENTS), 36):
+            cache.lookup(start[month], end[month])
+
+    baseline = _timed(per_segment)
+    for method in ("geodesic", "haversine"):
+        seconds = _timed(lambda method=method: cached(method))
+        print(f"{total:>6} {method:>10} {baseline:>10.3f} {seconds:>10.3f} "
+              f"{baseline / seconds:>8.1f}x")
+
+
+if __name__ == '__main__':
+    print(f"{'places':>6} {'method':>10} {'geodesic':>10} {'cache':>10} {'speedup':>9}")
+    for n_places in (50, 5000, 50000):
+        bench(n_places, np.random.default_rng(0))
@@ -0,0 +1,73 @@
+"""Fixtures for the benchmarks of the generation stages at several scales"""
+import json
+
+import pytest
+from faker import Faker
+
+from google_semantic_location_history.get_faker_schema import (
+    get_json_schema, compile_faker_schema)
+from google_semantic_location_history.simulation_gslh import (
+    NACTIVITIES, NPLACES, SCHEMA_TYPES, _create_places)
+from google_semantic_location_history.value_pool import ValuePool
+
+EXAMPLE_FILE = "tests/data/2021_JANUARY.json"
+YEAR = 2020
+# multiples of the default number of activities per month and places per year
+SCALES = [1, 10, 100]
+# benchmark rounds per scale, the largest scales take seconds per round
+ROUNDS = {1: 5, 10: 3, 100: 1}
+
+
+@pytest.fixture(scope="session")
+def json_data():
+    with open(EXAMPLE_FILE, encoding='utf8') as file_object:
+        return json.load(file_object)
+
+
+@pytest.fixture(scope="session")
+def json_schema(json_data):
+    return get_json_schema(json_data)
+
+
+@pytest.fixture(scope="session")
+def year():
+    return YEAR
+
+
+@pytest.fixture(params=SCALES, ids=[f"{scale}x" for scale in SCALES], scope="session")
+def scale(request):
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def nactivities(scale):
+    return NACTIVITIES[YEAR] * scale
+
+
+@pytest.fixture(scope="session")
+def nplaces(scale):
+    return NPLACES[YEAR] * scale
+
+
+@pytest.fixture(scope="session")
+def places(nplaces):
+    return _create_places(total=nplaces, seed=1)
+
+
+@pytest.fixture(scope="session")
+def month_data(json_schema, nactivities):
+    pool = ValuePool(Faker('nl_NL'))
+    pool.seed_instance(1)
+    generate = compile_faker_schema(
+        json_schema["properties"], pool, custom=SCHEMA_TYPES,
+        iterations={"timelineObjects": nactivities})
+    return generate()
+
+
+@pytest.fixture
+def run(benchmark, scale):
+    """Benchmark a function with a number of rounds suited to the scale"""
+    def run_benchmark(function, *args, **kwargs):
+        return benchmark.pedantic(
+            function, args=args, kwargs=kwargs, rounds=ROUNDS[scale], iterations=1)
+    return run_benchmark
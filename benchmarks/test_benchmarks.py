@@ -0,0 +1,67 @@
+"""Benchmarks of every stage of generating GSLH data, at several scales.
+
+Run with `poetry run pytest benchmarks --benchmark-autosave` to store the results as JSON in
+.benchmarks, and compare runs with `poetry run pytest-benchmark compare`.
+"""
+from datetime import datetime
+
+import pytest
+from faker import Faker
+from faker_schema.faker_schema import FakerSchema
+from mock import patch
+
+from google_semantic_location_history.get_faker_schema import (
+    get_json_schema, get_faker_schema, compile_faker_schema)
+from google_semantic_location_history.simulation_gslh import (
+    SCHEMA_TYPES, _UpdateOptions, _create_places, _update_data, write_zipfile)
+from google_semantic_location_history.distances import DistanceCache
+from google_semantic_location_history.value_pool import ValuePool
+
+
+def _repeat(json_data, scale):
+    """Example data with `scale` times as many timeline objects"""
+    return {"timelineObjects": json_data["timelineObjects"] * scale}
+
+
+def test_get_json_schema(run, json_data, scale):
+    run(get_json_schema, _repeat(json_data, scale))
+
+
+def test_get_faker_schema(run, json_schema, nactivities):
+    run(get_faker_schema, json_schema["properties"], custom=SCHEMA_TYPES,
+        iterations={"timelineObjects": nactivities})
+
+
+def test_generate_fake(run, json_schema, nactivities):
+    schema = get_faker_schema(
+        json_schema["properties"], custom=SCHEMA_TYPES,
+        iterations={"timelineObjects": nactivities})
+    run(FakerSchema(faker=Faker('nl_NL')).generate_fake, schema)
+
+
+@pytest.mark.parametrize("filler", ["faker", "pool"])
+def test_compiled_schema(run, json_schema, nactivities, filler):
+    fake = Faker('nl_NL') if filler == "faker" else ValuePool(Faker('nl_NL'))
+    run(compile_faker_schema(
+        json_schema["properties"], fake, custom=SCHEMA_TYPES,
+        iterations={"timelineObjects": nactivities}))
+
+
+@pytest.mark.parametrize("generator", ["faker", "bulk"])
+def test_create_places(run, nplaces, generator):
+    run(_create_places, total=nplaces, seed=1, generator=generator)
+
+
+@pytest.mark.parametrize("distance", ["geodesic", "haversine"])
+def test_update_data(run, month_data, places, year, nactivities, nplaces, distance):
+    distances = DistanceCache.from_places(places, method=distance)
+    with patch.dict('google_semantic_location_history.simulation_gslh.NACTIVITIES',
+                    {year: nactivities}), \
+            patch.dict('google_semantic_location_history.simulation_gslh.NPLACES',
+                       {year: nplaces}):
+        run(_update_data, month_data, datetime(year, 1, 1), places, seed=1,
+            options=_UpdateOptions(distances=distances))
+
+
+def test_write_zipfile(run, month_data, year, tmp_path):
+    run(write_zipfile, {(year, 'JANUARY'): month_data}, tmp_path / "Location History.zip")
@@ -0,0 +1,163 @@
+"""Encoding and compression of the monthly JSON files of a Takeout zipfile"""
+import json
+import time
+import zlib
+import zipfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+MEMBER_DIR = 'Takeout/Location History/Semantic Location History/'
+
+COMPRESSIONS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+# flag bit telling readers that LZMA data ends with an end-of-stream marker
+_LZMA_EOS_FLAG = 0x02
+# number of bytes of encoded JSON compressed at once
+CHUNK_SIZE = 1 << 20
+
+
+def member_name(year, month):
+    """Get the path of a month in a Takeout zipfile
+    Args:
+        year (int): year of the month
+        month (str): name of the month, such as "JANUARY"
+    Returns:
+        str: path of the JSON file of the month
+    """
+    return f"{MEMBER_DIR}{year}/{year}_{month}.json"
+
+
+def _encode_json(data):
+    """Encode with the standard library"""
+    return json.dumps(data).encode('utf-8')
+
+
+def _encode_orjson(data):
+    """Encode with orjson, which writes bytes directly"""
+    return orjson.dumps(data)  # pylint: disable=no-member
+
+
+def _encode_ujson(data):
+    """Encode with ujson"""
+    return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+
+# installed encoders, fastest first
+ENCODERS = {
+    name: encode for name, encode, module in [
+        ("orjson", _encode_orjson, orjson),
+        ("ujson", _encode_ujson, ujson),
+        ("json", _encode_json, json),
+    ] if module is not None
+}
+
+
+def resolve_encoder(name="json"):
+    """Get the name of the installed encoder used for an encoder name
+    Args:
+        name (str): name of an installed encoder in ENCODERS, or "auto" for the fastest one
+    Returns:
+        str: name of the encoder in ENCODERS
+    """
+    if name == "auto":
+        return next(iter(ENCODERS))
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown or not installed encoder {name}, choose from "
+                         f"{['auto', *ENCODERS]}")
+    return name
+
+
+def get_encoder(name="json"):
+    """Get a function encoding a month of GSLH data as JSON bytes
+    Args:
+        name (str): name of an installed encoder in ENCODERS, or "auto" for the fastest one.
+            All encoders produce the same JSON data, only whitespace may differ.
+    Returns:
+        function: function encoding a dict to bytes
+    """
+    return ENCODERS[resolve_encoder(name)]
+
+
+def compress_member(name, data, compression="stored", compresslevel=None):
+    """Compress a file for a zipfile, a chunk at a time, which may run in a worker thread
+    Args:
+        name (str): path of the file in the zipfile
+        data (bytes or iterable): content of the file, or its consecutive chunks of bytes,
+            which are compressed as they are produced
+        compression (str): compression method in COMPRESSIONS
+        compresslevel (int): Optionally the compression level, see zipfile.ZipFile
+    Returns:
+        tuple: zipfile.ZipInfo of the file and an iterator over the compressed chunks, see
+            write_member. The size and CRC of the ZipInfo are set as the chunks are consumed.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression}, choose from {list(COMPRESSIONS)}")
+    zinfo = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = COMPRESSIONS[compression]
+    zinfo.external_attr = 0o600 << 16
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        zinfo.flag_bits |= _LZMA_EOS_FLAG
+    zinfo.file_size = zinfo.CRC = zinfo.compress_size = 0
+    return zinfo, _compress(zinfo, data, compresslevel)
+
+
+def _compress(zinfo, data, compresslevel):
+    """Compress the chunks of a file, updating the size and CRC of its ZipInfo"""
+    if isinstance(data, bytes):
+        view = memoryview(data)
+        data = (view[start:start + CHUNK_SIZE] for start in range(0, len(data), CHUNK_SIZE))
+    # the same compressor ZipFile uses, including the header of LZMA data
+    compressor = zipfile._get_compressor(  # pylint: disable=protected-access
+        zinfo.compress_type, compresslevel)
+    for chunk in data:
+        zinfo.file_size += len(chunk)
+        zinfo.CRC = zlib.crc32(chunk, zinfo.CRC)
+        compressed = chunk if compressor is None else compressor.compress(chunk)
+        if compressed:
+            zinfo.compress_size += len(compressed)
+            yield compressed
+    if compressor is not None:
+        compressed = compressor.flush()
+        zinfo.compress_size += len(compressed)
+        yield compressed
+
+
+def write_member(zip_archive, zinfo, compressed):
+    """Write a file compressed by compress_member to a zipfile opened for writing. Chunks
+        are written as they are produced; the header is written again with the size and CRC
+        once they are known, as ZipFile does.
+    Args:
+        zip_archive (zipfile.ZipFile): seekable zipfile opened with mode 'w'
+        zinfo (zipfile.ZipInfo): info of the file
+        compressed (iterable): compressed chunks of the file, see compress_member
+    Raises:
+        zipfile.LargeZipFile: if a file of 4 GiB or more is written while it is compressed,
+            as its header was written without ZIP64 extensions; compress it before writing
+    """
+    zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+    zip_archive.fp.seek(zip_archive.start_dir)
+    zinfo.header_offset = zip_archive.fp.tell()
+    header = zinfo.FileHeader(zip64)
+    zip_archive.fp.write(header)
+    for chunk in compressed:
+        zip_archive.fp.write(chunk)
+    end = zip_archive.fp.tell()
+    if zinfo.FileHeader(zip64) != header:
+        zip_archive.fp.seek(zinfo.header_offset)
+        zip_archive.fp.write(zinfo.FileHeader(zip64))
+        zip_archive.fp.seek(end)
+    zip_archive.start_dir = end
+    zip_archive.filelist.append(zinfo)
+    zip_archive.NameToInfo[zinfo.filename] = zinfo
@@ -0,0 +1,92 @@
+"""Checkpoints of completed months, to resume an interrupted generation run"""
+import os
+import json
+import hashlib
+
+CONFIG_FILE = "config.json"
+
+
+def write_atomic(path, content):
+    """Write bytes to a temporary file first, so an interrupted write leaves no partial file
+        and concurrent processes never read one
+    Args:
+        path (str): file to write
+        content (bytes): content of the file
+    """
+    temporary_file = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_file, 'wb') as file_object:
+        file_object.write(content)
+    os.replace(temporary_file, path)
+
+
+class CheckpointStore:
+    """Directory with the encoded JSON of each completed month.
+
+    A month is complete once both its JSON file and the SHA-256 digest of that file are
+    written, so months of an interrupted run are either complete or generated again. The
+    directory belongs to one configuration; resuming with another configuration is an error,
+    as its months would not match those already stored.
+    """
+
+    def __init__(self, directory, config):
+        """
+        Args:
+            directory (str): directory to store the months in, created if needed
+            config (dict): JSON serializable configuration of the run, such as the seed, the
+                example file and the generation options, compared as JSON in order of the keys
+        Raises:
+            ValueError: if the directory holds months of another configuration
+        """
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        content = json.dumps(config, default=str).encode('utf-8')
+        config_file = os.path.join(self.directory, CONFIG_FILE)
+        if not os.path.exists(config_file):
+            write_atomic(config_file, content)
+        else:
+            with open(config_file, 'rb') as file_object:
+                if file_object.read() != content:
+                    raise ValueError(
+                        f"Checkpoints in {self.directory} were made with another configuration, "
+                        f"use another directory or remove it")
+
+    def _path(self, year, month):
+        """Get the path of the JSON file of a month"""
+        return os.path.join(self.directory, f"{year}_{month}.json")
+
+    def done(self, year, month):
+        """Check whether a month is stored completely
+        Args:
+            year (int): year of the month
+            month (str): name of the month
+        Returns:
+            bool: True if the JSON file of the month exists and matches its digest
+        """
+        path = self._path(year, month)
+        if not (os.path.exists(path) and os.path.exists(f"{path}.sha256")):
+            return False
+        with open(path, 'rb') as file_object, \
+                open(f"{path}.sha256", encoding='ascii') as digest_file:
+            return hashlib.sha256(file_object.read()).hexdigest() == digest_file.read()
+
+    def save(self, year, month, encoded):
+        """Store a completed month
+        Args:
+            year (int): year of the month
+            month (str): name of the month
+            encoded (bytes): JSON of the month
+        """
+        path = self._path(year, month)
+        write_atomic(path, encoded)
+        write_atomic(f"{path}.sha256", hashlib.sha256(encoded).hexdigest().encode('ascii'))
+
+    def load(self, year, month):
+        """Get the JSON of a stored month
+        Args:
+            year (int): year of the month
+            month (str): name of the month
+        Returns:
+            bytes: JSON of the month
+        """
+        with open(self._path(year, month), 'rb') as file_object:
+            return file_object.read()
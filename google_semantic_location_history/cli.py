@@ -0,0 +1,193 @@
+"""Command line interface generating a fake Google Semantic Location History zipfile"""
+import sys
+import pstats
+import cProfile
+import argparse
+
+from google_semantic_location_history.archive import COMPRESSIONS, ENCODERS
+from google_semantic_location_history.export import FORMATS, ColumnWriter
+from google_semantic_location_history.instrumentation import SummaryReporter
+from google_semantic_location_history.pipeline import pipelined
+from google_semantic_location_history.simulation_gslh import (
+    FILLERS, MOBILITY, PLACE_GENERATORS, YEARS, GenerationOptions, WriteOptions,
+    _scale_profiles, iter_fake_data, write_resumable, write_zipfile
+)
+
+
+def _add_generation_arguments(parser):
+    """Add the command line options on how to generate data, shared with gslh-panel
+    Args:
+        parser (argparse.ArgumentParser): parser to add the options to
+    """
+    parser.add_argument("--distance", choices=["geodesic", "haversine"], default="geodesic",
+                        help="distance computation between places (default: geodesic)")
+    parser.add_argument("--filler", choices=FILLERS, default="faker",
+                        help="exact Faker values or fast pre-generated values for fields "
+                             "that are not simulated (default: faker)")
+    parser.add_argument("--place-generator", choices=PLACE_GENERATORS, default="faker",
+                        help="unique Faker values per place, or fast bulk generation for large "
+                             "numbers of places (default: faker)")
+    parser.add_argument("--mobility", choices=MOBILITY, default="independent",
+                        help="draw each next place independently, near the current place, or "
+                             "from transition tables of a Markov chain (default: independent)")
+    parser.add_argument("--points-per-km", type=float,
+                        help="interpolate paths of activity segments with this many points per "
+                             "kilometer (default: filler values)")
+    parser.add_argument("--cache-dir", help="directory to cache the inferred JSON schema in")
+
+
+def _generation_options(args, **options):
+    """Get the options on how to generate data from the command line options
+    Args:
+        args (argparse.Namespace): command line options added by _add_generation_arguments
+        **options: other fields of GenerationOptions, such as jobs and compact
+    Returns:
+        GenerationOptions: options on how to generate months
+    """
+    return GenerationOptions(
+        distance=args.distance, cache_dir=args.cache_dir, filler=args.filler,
+        place_generator=args.place_generator, mobility=args.mobility,
+        points_per_km=args.points_per_km, **options)
+
+
+def _add_write_arguments(parser):
+    """Add the command line options on how to write zipfiles, shared with gslh-panel
+    Args:
+        parser (argparse.ArgumentParser): parser to add the options to
+    """
+    parser.add_argument("--encoder", choices=["auto", *ENCODERS], default="json",
+                        help="JSON encoder, auto picks the fastest installed (default: json)")
+    parser.add_argument("--compression", choices=list(COMPRESSIONS), default="stored",
+                        help="compression of the monthly files (default: stored)")
+    parser.add_argument("--compresslevel", type=int,
+                        help="compression level, see zipfile (default: method default)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="number of threads encoding and compressing months (default: 1)")
+
+
+def _add_output_arguments(parser):
+    """Add the command line options on how to write the generated months
+    Args:
+        parser (argparse.ArgumentParser): parser to add the options to
+    """
+    _add_write_arguments(parser)
+    parser.add_argument("--columns",
+                        help="also write the visits and activity segments as tables of columns "
+                             "to this directory")
+    parser.add_argument("--columns-format", choices=FORMATS, default="npy",
+                        help="format of the tables: npy files per column that can be memory "
+                             "mapped, npz or parquet files per table (default: npy)")
+
+
+def _write_options(args):
+    """Get the options on how to write months from the command line options
+    Args:
+        args (argparse.Namespace): command line options added by _add_write_arguments
+    Returns:
+        WriteOptions: options on how to write the months
+    """
+    return WriteOptions(args.encoder, args.compression, args.compresslevel, args.threads)
+
+
+def _write_generated(args, options, observer):
+    """Generate months and write them to the zipfile, and to tables with --columns
+    Args:
+        args (argparse.Namespace): parsed command line options of main
+        options (GenerationOptions): options on how to generate months
+        observer (callable): Optionally called with a StageEvent at the end of each stage
+    """
+    months = iter_fake_data(args.json_file, args.seed, options, observer=observer)
+    if args.pipeline:
+        months = pipelined(months, args.pipeline, observer)
+    columns = ColumnWriter(observer) if args.columns else None
+    if columns:
+        months = columns.collect(months)
+    write_zipfile(months if args.stream or args.pipeline else dict(months), args.output,
+                  observer, _write_options(args))
+    if columns:
+        columns.write(args.columns, args.columns_format)
+
+
+def main(argv=None):
+    """Command line interface for generating a GSLH zipfile"""
+    parser = argparse.ArgumentParser(
+        description="Generate a fake Google Semantic Location History zipfile")
+    parser.add_argument(
+        "json_file", help="example GSLH month JSON file, or Takeout zipfile or folder to infer "
+                          "the schema of all its months from")
+    parser.add_argument("-o", "--output", default="Location History.zip",
+                        help="zipfile to write (default: Location History.zip)")
+    parser.add_argument("--seed", type=int, default=0, help="seed (default: 0)")
+    parser.add_argument("--start-year", type=int, default=YEARS[0],
+                        help=f"first year to generate (default: {YEARS[0]})")
+    parser.add_argument("--end-year", type=int, default=YEARS[-1],
+                        help=f"last year to generate (default: {YEARS[-1]})")
+    parser.add_argument("--activity-scale", type=float, default=1.,
+                        help="factor to multiply the number of activities per month with")
+    parser.add_argument("--place-scale", type=float, default=1.,
+                        help="factor to multiply the number of places per year with")
+    _add_generation_arguments(parser)
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes, 0 for all cores (default: 1)")
+    parser.add_argument("--stream", action="store_true",
+                        help="write months as they are generated instead of all at the end")
+    parser.add_argument("--pipeline", type=int, metavar="MONTHS",
+                        help="generate months in a background thread while writing them, with "
+                             "at most this many months waiting to be written (implies "
+                             "--stream)")
+    _add_output_arguments(parser)
+    parser.add_argument("--checkpoint-dir",
+                        help="store each completed month in this directory, and resume from "
+                             "the months stored by an interrupted run")
+    parser.add_argument("--profile", action="store_true",
+                        help="print a profile of the run (the main process only) to stderr")
+    parser.add_argument("--report", action="store_true",
+                        help="print time spent per generation stage to stderr")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="add peak memory per stage to the report (slow)")
+    args = parser.parse_args(argv)
+
+    if args.checkpoint_dir and (args.columns or args.pipeline):
+        parser.error("--columns and --pipeline can not be combined with --checkpoint-dir")
+    if args.pipeline is not None and args.pipeline < 1:
+        parser.error("--pipeline needs at least 1 month")
+    if args.threads < 1:
+        parser.error("--threads needs at least 1 thread")
+    if args.start_year > args.end_year:
+        parser.error(f"--start-year {args.start_year} is after --end-year {args.end_year}")
+    try:
+        profiles = _scale_profiles(
+            list(range(args.start_year, args.end_year + 1)), args.activity_scale,
+            args.place_scale)
+    except ValueError as error:
+        parser.error(str(error))
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+
+    reporter = None
+    if args.report or args.trace_memory:
+        reporter = SummaryReporter(trace_memory=args.trace_memory)
+
+    options = _generation_options(
+        args, jobs=args.jobs or None, compact=True, profiles=profiles)
+    if args.checkpoint_dir:
+        try:
+            write_resumable(
+                args.json_file, args.output, args.checkpoint_dir, args.seed, options,
+                write_options=_write_options(args), observer=reporter)
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        _write_generated(args, options, reporter)
+
+    if profiler:
+        profiler.disable()
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(30)
+    if reporter:
+        print(reporter.report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
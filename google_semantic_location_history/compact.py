@@ -0,0 +1,462 @@
+"""Compact months of GSLH data, with a column per field of the timeline objects"""
+import copy
+import json
+import math
+import itertools
+from collections import namedtuple
+from json.encoder import encode_basestring_ascii
+
+import numpy as np
+
+from google_semantic_location_history.get_faker_schema import compile_faker_schema
+from google_semantic_location_history.value_pool import ValuePool, _to_array
+
+# Number of timeline objects whose filler values are generated as Python objects at once,
+# before they are packed into arrays
+BLOCK_SIZE = 256
+
+# Values of a field for all timeline objects of a month. kind tells how data holds them:
+# "array" numpy values, "bytes" utf-8 encoded strings, "text" numbers written as strings,
+# "lookup" indices into the list table, "waypoints" and "points" paths (Paths) of activity
+# segments, and "list" a list of Python values
+Column = namedtuple("Column", ["kind", "data", "table"], defaults=[None])
+
+# Fields of a set of places in the order of the places, to index with the place indices of a
+# timeline: ids, names and addresses as lists, latitudes and longitudes as int64 arrays of E7
+# coordinates
+PlaceColumns = namedtuple("PlaceColumns", ["ids", "names", "addresses", "latitudes", "longitudes"])
+
+
+# Placeholder for a field in the template of a timeline object
+_Slot = namedtuple("_Slot", ["index"])
+
+
+class _Recorder:  # pylint: disable=too-few-public-methods
+    """Stand-in for Faker that records the providers a compiled schema calls, in order"""
+
+    def __init__(self):
+        self.providers = []
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def record():
+            self.providers.append(name)
+            return _Slot(len(self.providers) - 1)
+        return record
+
+
+def compile_template(json_schema, custom=None):
+    """Get the template of the timeline objects of a month, as generated by
+        compile_faker_schema with the same schema and custom types
+    Args:
+        json_schema (dict): properties of the JSON schema of a month
+        custom (dict): dictionary with custom names and data types specified
+    Returns:
+        tuple: template of a timeline object, with a _Slot per generated value, and the names
+            of the Faker providers per slot, in the order they are called
+    """
+    recorder = _Recorder()
+    month = compile_faker_schema(
+        json_schema, recorder, custom=custom, iterations={"timelineObjects": 1})()
+    if list(month) != ["timelineObjects"]:
+        raise ValueError("Compact months need a schema with only timelineObjects")
+    return month["timelineObjects"][0], recorder.providers
+
+
+def _to_column(data):
+    """Wrap an array of values, such as from _to_array of value_pool, in a column"""
+    if data.dtype.kind == 'S':
+        return Column("bytes", data)
+    if data.dtype.kind in 'bif':
+        return Column("array", data)
+    return Column("list", data.tolist())
+
+
+def _concatenate(columns):
+    """Concatenate the columns of consecutive blocks of timeline objects"""
+    if len(columns) == 1:
+        return columns[0]
+    kinds = {column.kind for column in columns}
+    if len(kinds) == 1 and kinds <= {"array", "bytes"} and \
+            len({column.data.dtype.kind for column in columns}) == 1:
+        return Column(columns[0].kind, np.concatenate([column.data for column in columns]))
+    return Column("list", list(itertools.chain.from_iterable(
+        column_values(column) for column in columns)))
+
+
+def generate_columns(providers, faker, size):
+    """Generate the filler values of timeline objects, calling the providers in the same
+        order as the compiled schema, so the values are the same as in its timeline objects
+    Args:
+        providers (list): name of the Faker provider per slot, see compile_template
+        faker: Faker instance or ValuePool
+        size (int): number of timeline objects
+    Returns:
+        list: Column per slot
+    """
+    if isinstance(faker, ValuePool):
+        return _draw_columns(providers, faker, size)
+    functions = [getattr(faker, name) for name in providers]
+    blocks = []
+    for start in range(0, size, BLOCK_SIZE):
+        rows = [[function() for function in functions]
+                for _ in range(min(BLOCK_SIZE, size - start))]
+        blocks.append([_to_column(_to_array(list(values))) for values in zip(*rows)])
+    if not blocks:
+        return [Column("list", []) for _ in functions]
+    return [_concatenate(list(block)) for block in zip(*blocks)]
+
+
+def _draw_columns(providers, pool, size):
+    """Draw the columns of all slots of a provider from a value pool as one array, taking
+        the slots' values in turn as the compiled schema would"""
+    slots = {}
+    for slot, name in enumerate(providers):
+        slots.setdefault(name, []).append(slot)
+    columns = [None] * len(providers)
+    for name, indices in slots.items():
+        values = pool.draw(name, size * len(indices)).reshape(size, len(indices))
+        for column, slot in enumerate(indices):
+            columns[slot] = _to_column(np.ascontiguousarray(values[:, column]))
+    return columns
+
+
+def _path_values(paths, with_time):
+    """Get the list of waypoints, or raw path points if with_time, per activity segment"""
+    offsets = paths.offsets.tolist()
+    points = zip(paths.latitudes.tolist(), paths.longitudes.tolist())
+    if with_time:
+        points = [{"latE7": latitude, "lngE7": longitude, "timestampMs": str(timestamp),
+                   "accuracyMeters": accuracy}
+                  for (latitude, longitude), timestamp, accuracy in zip(
+                      points, paths.timestamps.tolist(), paths.accuracies.tolist())]
+    else:
+        points = [{"latE7": latitude, "lngE7": longitude} for latitude, longitude in points]
+    return [points[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def column_values(column):
+    """Get the Python values of a column
+    Args:
+        column (Column): values of a field
+    Returns:
+        list: value per timeline object
+    """
+    if column.kind == "array":
+        return column.data.tolist()
+    if column.kind == "bytes":
+        return [value.decode('utf-8') for value in column.data.tolist()]
+    if column.kind == "text":
+        return [str(value) for value in column.data.tolist()]
+    if column.kind == "lookup":
+        table = column.table
+        return [table[index] for index in column.data.tolist()]
+    if column.kind in ("waypoints", "points"):
+        return _path_values(column.data, column.kind == "points")
+    return list(column.data)
+
+
+def _compile_builder(template):
+    """Compile a function building a timeline object from its values per slot"""
+    if isinstance(template, _Slot):
+        index = template.index
+        return lambda values: values[index]
+    if isinstance(template, dict):
+        items = [(key, _compile_builder(value)) for key, value in template.items()]
+        return lambda values: {key: build(values) for key, build in items}
+    if isinstance(template, list):
+        items = [_compile_builder(value) for value in template]
+        return lambda values: [build(values) for build in items]
+    return lambda values: copy.deepcopy(template)
+
+
+def _slots(template):
+    """Iterate over the slots in a template"""
+    if isinstance(template, _Slot):
+        yield template
+    elif isinstance(template, (dict, list)):
+        for value in template.values() if isinstance(template, dict) else template:
+            yield from _slots(value)
+
+
+def _json_float(value):
+    """Write a float as the json module does"""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+def _json_bool(value):
+    """Write a boolean as the json module does"""
+    return "true" if value else "false"
+
+
+def _json_paths(paths, with_time, start, end):
+    """Write the waypoints, or raw path points if with_time, of segments start to end"""
+    offsets = paths.offsets[start:end + 1]
+    first, last = int(offsets[0]), int(offsets[-1])
+    points = zip(paths.latitudes[first:last].tolist(), paths.longitudes[first:last].tolist())
+    if with_time:
+        points = [f'{{"latE7": {latitude}, "lngE7": {longitude}, "timestampMs": "{timestamp}", '
+                  f'"accuracyMeters": {accuracy}}}'
+                  for (latitude, longitude), timestamp, accuracy in zip(
+                      points, paths.timestamps[first:last].tolist(),
+                      paths.accuracies[first:last].tolist())]
+    else:
+        points = [f'{{"latE7": {latitude}, "lngE7": {longitude}}}'
+                  for latitude, longitude in points]
+    offsets = (offsets - first).tolist()
+    return ["[" + ", ".join(points[start:end]) + "]"
+            for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _json_encoder(column):
+    """Get a function writing the values of rows start to end of a column as JSON, as the
+        json module writes column_values(column)"""
+    data = column.data
+    if column.kind == "array":
+        write = {"f": _json_float, "b": _json_bool}.get(data.dtype.kind, str)
+        return lambda start, end: [write(value) for value in data[start:end].tolist()]
+    if column.kind == "bytes":
+        return lambda start, end: [encode_basestring_ascii(value.decode('utf-8'))
+                                   for value in data[start:end].tolist()]
+    if column.kind == "text":
+        return lambda start, end: [f'"{value}"' for value in data[start:end].tolist()]
+    if column.kind == "lookup":
+        # the table may hold many more values than the month uses, such as all places
+        used, indices = np.unique(data, return_inverse=True)
+        table = [json.dumps(column.table[index]) for index in used.tolist()]
+        return lambda start, end: [table[index] for index in indices[start:end].tolist()]
+    if column.kind in ("waypoints", "points"):
+        return lambda start, end: _json_paths(data, column.kind == "points", start, end)
+    return lambda start, end: [json.dumps(value) for value in data[start:end]]
+
+
+def _json_format(template, slots):
+    """Compile the %-format string writing a timeline object as the json module does
+    Args:
+        template: template of a timeline object, see compile_template
+        slots (list): list to append the index of each slot to, in order of the format
+    Returns:
+        str: format with a %s per slot
+    """
+    if isinstance(template, _Slot):
+        slots.append(template.index)
+        return "%s"
+    if isinstance(template, dict):
+        return "{" + ", ".join(json.dumps(key).replace("%", "%%") + ": " +
+                               _json_format(value, slots)
+                               for key, value in template.items()) + "}"
+    if isinstance(template, list):
+        return "[" + ", ".join(_json_format(value, slots) for value in template) + "]"
+    return json.dumps(template).replace("%", "%%")
+
+
+class CompactMonth:
+    """Month of GSLH data held as a column per field of its timeline objects.
+
+    All timeline objects of a generated month have the same fields, so a month is a template
+    of a timeline object with a slot per field, and a column with the values of each slot.
+    Numbers are held in numpy arrays, strings as utf-8 bytes and the places of visits as
+    indices into the shared place lists, instead of a tree of dicts and lists per object.
+    to_dict materializes the month as generated by compile_faker_schema and _update_data.
+    """
+    __slots__ = ("template", "columns", "size")
+
+    def __init__(self, template, columns, size):
+        """
+        Args:
+            template (dict): template of a timeline object, with a _Slot per field, see
+                compile_template. It is copied, as setting fields may change it.
+            columns (list): Column of each slot
+            size (int): number of timeline objects
+        """
+        self.template = copy.deepcopy(template)
+        self.columns = list(columns)
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return key in self.template
+
+    def _parent(self, path):
+        """Get the dict in the template holding the last key of a path"""
+        node = self.template
+        for key in path[:-1]:
+            node = node[key]
+        return node
+
+    def has_field(self, path):
+        """Check whether the timeline objects have a field
+        Args:
+            path (tuple): keys from the timeline object to the field
+        Returns:
+            bool: True if the field exists
+        """
+        try:
+            return path[-1] in self._parent(path)
+        except (KeyError, TypeError):
+            return False
+
+    def set_field(self, path, column):
+        """Set a field of all timeline objects, adding it if it does not exist yet
+        Args:
+            path (tuple): keys from the timeline object to the field. All but the last key
+                must exist, as when setting the field in a dict.
+            column (Column): values of the field, one per timeline object
+        """
+        parent = self._parent(path)
+        current = parent.get(path[-1])
+        if isinstance(current, _Slot):
+            self.columns[current.index] = column
+            return
+        # the values of fields that are replaced are not needed anymore
+        for slot in _slots(current):
+            self.columns[slot.index] = None
+        parent[path[-1]] = _Slot(len(self.columns))
+        self.columns.append(column)
+
+    def field(self, path):
+        """Get the values of a field of all timeline objects, without materializing them
+        Args:
+            path (tuple): keys from the timeline object to the field
+        Returns:
+            Column: values of the field, None if the timeline objects do not have it
+        """
+        if not self.has_field(path):
+            return None
+        node = self._parent(path)[path[-1]]
+        if isinstance(node, _Slot):
+            return self.columns[node.index]
+        # a constant, or a dict or list holding several fields
+        build = _compile_builder(node)
+        values = [itertools.repeat(None)] * len(self.columns)
+        for slot in _slots(node):
+            values[slot.index] = column_values(self.columns[slot.index])
+        return Column("list", [build(row[1:]) for row in zip(range(self.size), *values)])
+
+    def iter_timeline_objects(self):
+        """Materialize the timeline objects one at a time
+        Yields:
+            dict: timeline object
+        """
+        build = _compile_builder(self.template)
+        values = [itertools.repeat(None) if column is None else column_values(column)
+                  for column in self.columns]
+        for row in zip(range(self.size), *values):
+            yield build(row[1:])
+
+    def to_dict(self):
+        """Materialize the month
+        Returns:
+            dict: GSLH data of the month
+        """
+        return {"timelineObjects": list(self.iter_timeline_objects())}
+
+    def iter_json(self, chunk_size=BLOCK_SIZE):
+        """Write the month as JSON straight from the columns, without materializing it. The
+            JSON is the same as json.dumps writes for to_dict.
+        Args:
+            chunk_size (int): number of timeline objects per chunk
+        Yields:
+            bytes: consecutive chunks of the JSON
+        """
+        slots = []
+        row_format = _json_format(self.template, slots)
+        encoders = [_json_encoder(self.columns[index]) for index in slots]
+        yield b'{"timelineObjects": ['
+        for start in range(0, self.size, chunk_size):
+            end = min(start + chunk_size, self.size)
+            if encoders:
+                rows = [row_format % row
+                        for row in zip(*(encode(start, end) for encode in encoders))]
+            else:
+                rows = [row_format % ()] * (end - start)
+            yield (", " if start else "").encode('ascii') + ", ".join(rows).encode('ascii')
+        yield b']}'
+
+    def to_json(self):
+        """Write the month as JSON, see iter_json
+        Returns:
+            bytes: JSON of the month
+        """
+        return b"".join(self.iter_json())
+
+
+def place_columns(places):
+    """Collect the fields of places that are set in timeline objects, to build them once per
+        set of places rather than once per month
+    Args:
+        places (dict): places, as created by _create_places of simulation_gslh
+    Returns:
+        PlaceColumns: fields of the places, in the same order
+    """
+    place_values = list(places.values())
+    return PlaceColumns(
+        list(places), [place["name"] for place in place_values],
+        [place["address"] for place in place_values],
+        np.array([int(place["latitude"]*1e7) for place in place_values], dtype=np.int64),
+        np.array([int(place["longitude"]*1e7) for place in place_values], dtype=np.int64))
+
+
+def fill_timeline_columns(month, timeline, places, activity_types, distances):
+    """Set the generated timestamps, places and activities as columns of a compact month,
+        with the same values as _fill_timeline_objects of simulation_gslh
+    Args:
+        month (CompactMonth): month to update
+        timeline (Timeline): generated timestamps, place indices and activity indices
+        places (PlaceColumns): fields of the places to select from, or of a superset starting
+            with them, see place_columns
+        activity_types (list): names of the activity types
+        distances (numpy.ndarray): distance in meters from start to end location per timeline
+            object
+    """
+    latitudes, longitudes = places.latitudes, places.longitudes
+    start_location, end_location = timeline.locations[:-1], timeline.locations[1:]
+
+    fields = []
+    if "placeVisit" in month:
+        fields += [(("placeVisit",) + path, column) for path, column in [
+            (("duration", "startTimestampMs"), Column("text", timeline.visit_start)),
+            (("duration", "endTimestampMs"), Column("text", timeline.visit_end)),
+            (("location", "address"), Column("lookup", start_location, places.addresses)),
+            (("location", "placeId"), Column("lookup", start_location, places.ids)),
+            (("location", "name"), Column("lookup", start_location, places.names)),
+            (("location", "latitudeE7"), Column("array", latitudes[start_location])),
+            (("location", "longitudeE7"), Column("array", longitudes[start_location])),
+        ]]
+    if "activitySegment" in month:
+        fields += [(("activitySegment",) + path, column) for path, column in [
+            (("duration", "startTimestampMs"), Column("text", timeline.activity_start)),
+            (("duration", "endTimestampMs"), Column("text", timeline.activity_end)),
+            (("startLocation", "latitudeE7"), Column("array", latitudes[start_location])),
+            (("startLocation", "longitudeE7"), Column("array", longitudes[start_location])),
+            (("endLocation", "latitudeE7"), Column("array", latitudes[end_location])),
+            (("endLocation", "longitudeE7"), Column("array", longitudes[end_location])),
+            (("duration", "activityType"), Column(
+                "lookup", timeline.activities, activity_types)),
+            (("distance",), Column("array", np.asarray(distances))),
+        ]]
+    for path, column in fields:
+        month.set_field(path, column)
+
+
+def fill_path_columns(month, paths):
+    """Set the waypoints and raw path points of the activity segments of a compact month to
+        interpolated paths, as _fill_paths of simulation_gslh
+    Args:
+        month (CompactMonth): month to update
+        paths (Paths): points of the activity segments, in order of the timeline objects
+    """
+    if month.has_field(("activitySegment", "waypointPath")):
+        month.set_field(("activitySegment", "waypointPath", "waypoints"),
+                        Column("waypoints", paths))
+    if month.has_field(("activitySegment", "simplifiedRawPath")):
+        month.set_field(("activitySegment", "simplifiedRawPath", "points"),
+                        Column("points", paths))
@@ -0,0 +1,126 @@
+"""Cached distances between visited places"""
+import numpy as np
+from geopy.distance import geodesic, EARTH_RADIUS
+
+# Largest number of places for which all pairwise distances are computed up front
+DENSE_LIMITS = {"haversine": 4096, "geodesic": 256}
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance between coordinates on a spherical earth
+    Args:
+        lat1, lon1 (numpy.ndarray): latitudes and longitudes of start points in degrees
+        lat2, lon2 (numpy.ndarray): latitudes and longitudes of end points in degrees
+    Returns:
+        numpy.ndarray: distances in meters
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(arr, dtype=float))
+                              for arr in (lat1, lon1, lat2, lon2))
+    hav = (np.sin((lat2 - lat1) / 2.) ** 2 +
+           np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.) ** 2)
+    return 2. * EARTH_RADIUS * 1.e3 * np.arcsin(np.sqrt(hav))
+
+
+def geodesic_distances(lat1, lon1, lat2, lon2):
+    """Distance between coordinates on the WGS-84 ellipsoid
+    Args:
+        lat1, lon1 (numpy.ndarray): latitudes and longitudes of start points in degrees
+        lat2, lon2 (numpy.ndarray): latitudes and longitudes of end points in degrees
+    Returns:
+        numpy.ndarray: distances in meters
+    """
+    return np.fromiter(
+        (geodesic(start, end).m for start, end in zip(zip(lat1, lon1), zip(lat2, lon2))),
+        dtype=float, count=len(lat1))
+
+
+METHODS = {"haversine": haversine, "geodesic": geodesic_distances}
+
+
+class DistanceCache:
+    """Distances in whole meters between pairs of places, computed once per pair.
+
+    Small place sets get a dense matrix with all pairwise distances; for large place sets
+    distances are computed on first lookup and kept per pair.
+    """
+
+    def __init__(self, latitudes, longitudes, method="geodesic", dense_limit=None):
+        """
+        Args:
+            latitudes (iterable): latitude per place in degrees
+            longitudes (iterable): longitude per place in degrees
+            method (str): "geodesic" for exact or "haversine" for fast distances
+            dense_limit (int): largest number of places to use a dense matrix for, defaults
+                to DENSE_LIMITS of the method
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown distance method {method}, choose from {list(METHODS)}")
+        self.latitudes = np.asarray(list(latitudes), dtype=float)
+        self.longitudes = np.asarray(list(longitudes), dtype=float)
+        self.method = method
+        if dense_limit is None:
+            dense_limit = DENSE_LIMITS[method]
+        self._pairs = {}
+        self._matrix = None
+        if len(self.latitudes) <= dense_limit:
+            self._matrix = self._dense_matrix()
+
+    @classmethod
+    def from_places(cls, places, **kwargs):
+        """Create distance cache for a dict of places as returned by _create_places
+        Args:
+            places (dict): places with latitude and longitude
+            **kwargs: passed on to DistanceCache
+        Returns:
+            DistanceCache: distances between the places, indexed in order of the dict
+        """
+        return cls([place["latitude"] for place in places.values()],
+                   [place["longitude"] for place in places.values()], **kwargs)
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    @property
+    def dense(self):
+        """bool: True if all pairwise distances are precomputed"""
+        return self._matrix is not None
+
+    def _compute(self, start, end):
+        """Compute truncated distances between places by index"""
+        distances = METHODS[self.method](
+            self.latitudes[start], self.longitudes[start],
+            self.latitudes[end], self.longitudes[end])
+        return distances.astype(np.int64)
+
+    def _dense_matrix(self):
+        """Compute symmetric matrix with the distances between all places"""
+        start, end = np.triu_indices(len(self), k=1)
+        matrix = np.zeros((len(self), len(self)), dtype=np.int64)
+        matrix[start, end] = self._compute(start, end)
+        matrix[end, start] = matrix[start, end]
+        return matrix
+
+    def lookup(self, start, end):
+        """Get distances between pairs of places
+        Args:
+            start (numpy.ndarray): indices of start places
+            end (numpy.ndarray): indices of end places
+        Returns:
+            numpy.ndarray: distance per pair in whole meters
+        """
+        start = np.asarray(start, dtype=np.int64)
+        end = np.asarray(end, dtype=np.int64)
+        if self.dense:
+            return self._matrix[start, end]
+
+        codes = np.minimum(start, end) * len(self) + np.maximum(start, end)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        missing = np.array([code for code in unique.tolist() if code not in self._pairs],
+                           dtype=np.int64)
+        if len(missing):
+            self._pairs.update(zip(
+                missing.tolist(),
+                self._compute(missing // len(self), missing % len(self)).tolist()))
+        known = np.fromiter((self._pairs[code] for code in unique.tolist()),
+                            dtype=np.int64, count=len(unique))
+        return known[inverse.reshape(-1)]
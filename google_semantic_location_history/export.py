@@ -0,0 +1,219 @@
+"""Columnar export of the place visits and activity segments of generated months"""
+import io
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from google_semantic_location_history.compact import CompactMonth, column_values
+from google_semantic_location_history.instrumentation import stage
+from google_semantic_location_history.reader import (
+    MISSING, VISIT_COLUMNS, SEGMENT_COLUMNS, iter_timeline_objects, parse_timestamp, to_columns
+)
+
+TABLES = {"visits": VISIT_COLUMNS, "segments": SEGMENT_COLUMNS}
+# npy writes a file per column that np.load can memory map, npz a file per table
+FORMATS = ["npy", "npz"] + (["parquet"] if pyarrow else [])
+
+
+def _integers(month, path):
+    """Get a field of a compact month as int64, MISSING if the month does not have it"""
+    column = month.field(path)
+    if column is None:
+        return np.full(len(month), MISSING, dtype=np.int64)
+    if column.kind in ("array", "text") and column.data.dtype.kind in "biuf":
+        return column.data.astype(np.int64)
+    return np.array(column_values(column), dtype=np.int64)
+
+
+def _strings(month, *paths):
+    """Get the first of the fields of a compact month that it has as str, empty if none"""
+    for path in paths:
+        column = month.field(path)
+        if column is None:
+            continue
+        if column.kind == "lookup":
+            return np.array(column.table, dtype=str)[column.data]
+        if column.kind == "bytes":
+            return np.char.decode(column.data, 'utf-8')
+        return np.array(column_values(column), dtype=str)
+    return np.full(len(month), "", dtype=str)
+
+
+def _timestamps(month, duration, name):
+    """Get a timestamp of a compact month in milliseconds, see reader._timestamp"""
+    if month.has_field(duration + (f"{name}Ms",)):
+        return _integers(month, duration + (f"{name}Ms",))
+    column = month.field(duration + (name,))
+    if column is None:
+        return np.full(len(month), MISSING, dtype=np.int64)
+    return np.array([parse_timestamp(value) for value in column_values(column)],
+                    dtype=np.int64)
+
+
+def compact_columns(month):
+    """Collect the core fields of a compact month in columns, straight from its columns
+    Args:
+        month (CompactMonth): month of GSLH data
+    Returns:
+        dict: "visits" and "segments" tables, the same as to_columns of its timeline objects
+    """
+    tables = to_columns([])
+    if "placeVisit" in month:
+        visit, location = ("placeVisit",), ("placeVisit", "location")
+        tables["visits"] = dict(zip(VISIT_COLUMNS, [
+            _timestamps(month, visit + ("duration",), "startTimestamp"),
+            _timestamps(month, visit + ("duration",), "endTimestamp"),
+            _integers(month, location + ("latitudeE7",)),
+            _integers(month, location + ("longitudeE7",)),
+            _strings(month, location + ("placeId",)),
+        ]))
+    if "activitySegment" in month:
+        segment = ("activitySegment",)
+        tables["segments"] = dict(zip(SEGMENT_COLUMNS, [
+            _timestamps(month, segment + ("duration",), "startTimestamp"),
+            _timestamps(month, segment + ("duration",), "endTimestamp"),
+            _integers(month, segment + ("startLocation", "latitudeE7")),
+            _integers(month, segment + ("startLocation", "longitudeE7")),
+            _integers(month, segment + ("endLocation", "latitudeE7")),
+            _integers(month, segment + ("endLocation", "longitudeE7")),
+            # generated data has the type in the duration, exports next to it
+            _strings(month, segment + ("duration", "activityType"), segment + ("activityType",)),
+            _integers(month, segment + ("distance",)),
+        ]))
+    return tables
+
+
+class ColumnWriter:
+    """Collect the columns of months as they are generated, and write them as tables.
+
+    Only the columns of each month are kept, not the month itself, so months can be passed
+    on to write_zipfile and dropped as usual. The columns of compact months are taken from
+    their columns without building timeline objects; JSON bytes are parsed, as they hold
+    nothing else.
+    """
+
+    def __init__(self, observer=None):
+        """
+        Args:
+            observer (callable): Optionally called with a StageEvent for the "columns" stage
+                of each month and the "export" stage
+        """
+        self.observer = observer
+        self._parts = {table: [] for table in TABLES}
+
+    def add(self, year, month, month_data):
+        """Collect the columns of a month
+        Args:
+            year (int): year of the month
+            month (str): name of the month
+            month_data (dict, CompactMonth or bytes): GSLH data of the month, or its JSON
+        """
+        with stage(self.observer, "columns", year, month) as counts:
+            if isinstance(month_data, CompactMonth):
+                counts["objects"] = len(month_data)
+                tables = compact_columns(month_data)
+            else:
+                if isinstance(month_data, bytes):
+                    timeline_objects = list(iter_timeline_objects(io.BytesIO(month_data)))
+                else:
+                    timeline_objects = month_data.get("timelineObjects", [])
+                counts["objects"] = len(timeline_objects)
+                tables = to_columns(timeline_objects)
+            for table, columns in tables.items():
+                self._parts[table].append(columns)
+
+    def collect(self, data):
+        """Collect the columns of months while passing them on
+        Args:
+            data (iterable): ((year, month), data) pairs, such as returned by iter_fake_data
+        Yields:
+            tuple: the same ((year, month), data) pairs
+        """
+        for (year, month), month_data in data:
+            self.add(year, month, month_data)
+            yield (year, month), month_data
+
+    def tables(self):
+        """Get the collected tables
+        Returns:
+            dict: "visits" with VISIT_COLUMNS and "segments" with SEGMENT_COLUMNS, each a dict
+                of numpy arrays in order of the collected months, see to_columns
+        """
+        tables = {}
+        for table, columns in TABLES.items():
+            parts = self._parts[table] or [to_columns([])[table]]
+            tables[table] = {
+                column: np.concatenate([part[column] for part in parts]) for column in columns
+            }
+        return tables
+
+    def write(self, directory, file_format="npy"):
+        """Write the collected tables
+        Args:
+            directory (str): directory to write to, created if needed
+            file_format (str): format in FORMATS: "npy" for <table>/<column>.npy files,
+                "npz" for <table>.npz files, or "parquet" for <table>.parquet files
+        """
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format {file_format}, choose from {FORMATS}")
+        directory = str(directory)
+        with stage(self.observer, "export"):
+            os.makedirs(directory, exist_ok=True)
+            for table, columns in self.tables().items():
+                path = os.path.join(directory, table)
+                if file_format == "npy":
+                    os.makedirs(path, exist_ok=True)
+                    for column, values in columns.items():
+                        np.save(os.path.join(path, f"{column}.npy"), values)
+                elif file_format == "npz":
+                    np.savez(f"{path}.npz", **columns)
+                else:
+                    pyarrow.parquet.write_table(pyarrow.table(columns), f"{path}.parquet")
+
+
+def write_columns(data, directory, observer=None, *, file_format="npy"):
+    """Write the place visits and activity segments of months as tables
+    Args:
+        data (dict or iterable): dict with data per year and month, or iterable of
+            ((year, month), data) pairs such as returned by iter_fake_data
+        directory (str): directory to write to, created if needed
+        observer (callable): Optionally called with a StageEvent for the "columns" stage of
+            each month and the "export" stage
+        file_format (str): format in FORMATS, see ColumnWriter.write
+    """
+    if isinstance(data, Mapping):
+        data = data.items()
+    writer = ColumnWriter(observer)
+    for (year, month), month_data in data:
+        writer.add(year, month, month_data)
+    writer.write(directory, file_format)
+
+
+def load_columns(directory, mmap_mode="r"):
+    """Load tables written in the npy or npz format
+    Args:
+        directory (str): directory written by write_columns
+        mmap_mode (str): memory map mode of the npy files, see numpy.load, None to read
+            them into memory
+    Returns:
+        dict: "visits" and "segments" tables, each a dict of numpy arrays
+    """
+    tables = {}
+    for table, columns in TABLES.items():
+        path = os.path.join(str(directory), table)
+        if os.path.isdir(path):
+            tables[table] = {
+                column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mmap_mode)
+                for column in columns
+            }
+        else:
+            with np.load(f"{path}.npz") as npz_file:
+                tables[table] = {column: npz_file[column] for column in columns}
+    return tables
@@ -1,6 +1,20 @@
 """Get schema's for faking json data"""
+import os
+import json
+import hashlib
+import zipfile
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+import genson
 from genson import SchemaBuilder
 
+from google_semantic_location_history.checkpoint import write_atomic
+from google_semantic_location_history.reader import CHUNK_SIZE, iter_members, open_month, \
+    iter_timeline_objects
+
+SCHEMA_CACHE_ENV = "GSLH_CACHE_DIR"
+
 
 def get_json_schema(json_data):
     """Get JSON schema fron JSON object
@@ -16,9 +30,233 @@ def get_json_schema(json_data):
     return json_schema
 
 
+def _object_schemas(schema):
+    """Iterate over the object schemas in a JSON schema, including the schema itself"""
+    if schema.get("type") == "object":
+        yield schema
+    items = schema.get("items", [])
+    for subschema in [*schema.get("properties", {}).values(), *schema.get("anyOf", []),
+                      *(items if isinstance(items, list) else [items])]:
+        yield from _object_schemas(subschema)
+
+
+def _month_schema(path, key, sample=None, chunk_size=CHUNK_SIZE):
+    """Get the JSON schema of one month of a Takeout zipfile or folder, streaming its
+        timeline objects
+    Args:
+        path (str): zipfile or folder, see iter_members
+        key (tuple): year and month
+        sample (int): Optionally only read the first `sample` timeline objects of the month
+        chunk_size (int): number of bytes to read at once
+    Returns:
+        dict: JSON schema of the month, without $schema
+    """
+    items = SchemaBuilder()
+    with open_month(path, key) as file_object:
+        timeline_objects = iter_timeline_objects(file_object, chunk_size)
+        count = 0
+        for timeline_object in islice(timeline_objects, sample):
+            items.add_object(timeline_object)
+            count += 1
+
+    timeline = {"type": "array"}
+    if count:
+        timeline["items"] = items.to_schema()
+        del timeline["items"]["$schema"]
+        # genson leaves out empty required lists, which merging would read as unknown
+        for object_schema in _object_schemas(timeline["items"]):
+            object_schema.setdefault("required", [])
+    return {"type": "object", "properties": {"timelineObjects": timeline},
+            "required": ["timelineObjects"]}
+
+
+def get_archive_schema(path, *, sample=None, jobs=1, chunk_size=CHUNK_SIZE):
+    """Get JSON schema of all months of a Takeout zipfile or folder.
+        The schema of each month is inferred while streaming its JSON, in worker processes
+        if jobs is not 1, and the schemas are merged in order of the months. Without sample,
+        the result equals get_json_schema of one month holding the timeline objects of all
+        months.
+    Args:
+        path (str): zipfile or folder, see iter_members
+        sample (int): Optionally only read the first `sample` timeline objects per month,
+            which is much faster for large exports but misses fields of the other objects
+        jobs (int): number of worker processes, None for all cores
+        chunk_size (int): number of bytes to read at once
+    Returns:
+        dict: JSON schema
+    """
+    keys = [key for key, _ in iter_members(path)]
+    if jobs == 1:
+        schemas = [_month_schema(path, key, sample, chunk_size) for key in keys]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            schemas = list(executor.map(
+                _month_schema, [path] * len(keys), keys, [sample] * len(keys),
+                [chunk_size] * len(keys)))
+
+    builder = SchemaBuilder()
+    for schema in schemas:
+        builder.add_schema(schema)
+    json_schema = builder.to_schema()
+    for object_schema in _object_schemas(json_schema):
+        if object_schema.get("required") == []:
+            del object_schema["required"]
+    return json_schema
+
+
+def is_archive(json_file):
+    """Check whether an example file is a Takeout zipfile or folder rather than a month
+    Args:
+        json_file (str): example file or folder
+    Returns:
+        bool: True for a zipfile or folder
+    """
+    return os.path.isdir(json_file) or zipfile.is_zipfile(json_file)
+
+
+def content_digest(json_file):
+    """Get SHA-256 digest of the content of an example file, or of the months of a folder
+    Args:
+        json_file (str): JSON file, Takeout zipfile or folder
+    Returns:
+        hashlib._Hash: digest, which can be updated further
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(json_file):
+        for (year, month), open_member in iter_members(json_file):
+            digest.update(f"{year}_{month}".encode('utf-8'))
+            with open_member() as file_object:
+                digest.update(_update_digest(hashlib.sha256(), file_object).digest())
+        return digest
+    with open(json_file, 'rb') as file_object:
+        return _update_digest(digest, file_object)
+
+
+def _update_digest(digest, file_object):
+    """Update a digest with the content of a binary file object, a chunk at a time so large
+    exports are never read into memory"""
+    for chunk in iter(lambda: file_object.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest
+
+
+def get_schema_cache_dir(cache_dir=None):
+    """Get directory of the schema cache
+    Args:
+        cache_dir (str): Optionally the cache directory to use
+    Returns:
+        str: cache_dir if given, else the GSLH_CACHE_DIR environment variable, else
+            google_semantic_location_history in the user cache directory
+    """
+    if cache_dir is not None:
+        return str(cache_dir)
+    if os.environ.get(SCHEMA_CACHE_ENV):
+        return os.environ[SCHEMA_CACHE_ENV]
+    return os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+        "google_semantic_location_history")
+
+
+def load_json_schema(json_file, cache_dir=None, refresh=False, *, sample=None, jobs=1):
+    """Get JSON schema from JSON file, cached on disk.
+        The cache is keyed by the content of the file and the genson version, so changed
+        example files or genson upgrades do not use stale schemas.
+    Args:
+        json_file (str): JSON file to extract schema from, or Takeout zipfile or folder to
+            extract the schema of all months from, see get_archive_schema
+        cache_dir (str): Optionally the cache directory, see get_schema_cache_dir
+        refresh (bool): Infer the schema again, even if it is cached
+        sample (int): Optionally the number of timeline objects per month to read from a
+            zipfile or folder, see get_archive_schema
+        jobs (int): number of worker processes reading a zipfile or folder, None for all cores
+    Returns:
+        dict: JSON schema
+    """
+    archive = is_archive(json_file)
+    digest = content_digest(json_file)
+    digest.update(genson.__version__.encode('utf-8'))
+    if archive and sample is not None:
+        digest.update(f"sample={sample}".encode('utf-8'))
+
+    cache_dir = get_schema_cache_dir(cache_dir)
+    cache_file = os.path.join(cache_dir, f"schema-{digest.hexdigest()}.json")
+    if not refresh and os.path.exists(cache_file):
+        with open(cache_file, encoding='utf8') as file_object:
+            return json.load(file_object)
+
+    if archive:
+        json_schema = get_archive_schema(json_file, sample=sample, jobs=jobs)
+    else:
+        with open(json_file, 'rb') as file_object:
+            json_schema = get_json_schema(json.loads(file_object.read().decode('utf-8')))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    write_atomic(cache_file, json.dumps(json_schema).encode('utf8'))
+
+    return json_schema
+
+
+def clear_schema_cache(cache_dir=None):
+    """Remove all cached JSON schemas
+    Args:
+        cache_dir (str): Optionally the cache directory, see get_schema_cache_dir
+    Returns:
+        int: number of removed schemas
+    """
+    cache_dir = get_schema_cache_dir(cache_dir)
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.startswith("schema-") and name.endswith(".json"):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
+
+
+def _resolve_type(json_schema):
+    """Get the schema of a value with a single type. Merged schemas, such as those of several
+        months, have a list of types or anyOf for values whose type differs between objects;
+        the first type that is not null is used.
+    Args:
+        json_schema (dict): JSON schema of a value
+    Returns:
+        dict: JSON schema with a single type, None if the value is always null
+    """
+    if "anyOf" in json_schema:
+        for subschema in json_schema["anyOf"]:
+            resolved = _resolve_type(subschema)
+            if resolved is not None:
+                return resolved
+        return None
+    types = json_schema.get("type")
+    if isinstance(types, list):
+        types = [name for name in types if name != "null"]
+        return dict(json_schema, type=types[0]) if types else None
+    return None if types == "null" else json_schema
+
+
+def _properties(json_schema):
+    """Get the properties of an object schema that are not always null, with a single type"""
+    properties = {}
+    for prop, val in json_schema.get("properties", {}).items():
+        val = _resolve_type(val)
+        if val is not None:
+            properties[prop] = val
+    return properties
+
+
+def _items(json_schema):
+    """Get the schema of the items of an array schema with a single type, None if the array
+        is always empty or only holds null"""
+    items = json_schema.get("items")
+    return None if items is None else _resolve_type(items)
+
+
 def get_faker_schema(json_schema, custom=None, iterations=None, parent_key=None):
     """ Convert JSON schema to a dict containing field names and data types.
-        Default data types are used, unless specified in custom dict.
+        Default data types are used, unless specified in custom dict. Fields that are always
+        null are left out, arrays that are always empty or null stay empty.
     Args:
         json_schema (dict): JSON schema
         custom (dict): dictionary with custom names and data types specified
@@ -33,23 +271,100 @@ def get_faker_schema(json_schema, custom=None, iterations=None, parent_key=None)
             value = custom[key]
         else:
             value = get_faker_schema(
-                json_schema[key], custom=custom, iterations=iterations, parent_key=key)
+                _resolve_type(json_schema[key]), custom=custom, iterations=iterations,
+                parent_key=key)
         return {key: value}
     if json_schema['type'] == "object":
         value = {}
-        for prop, val in json_schema["properties"].items():
+        for prop, val in _properties(json_schema).items():
             value.update(get_faker_schema({prop: val}, custom=custom, iterations=iterations))
     elif json_schema['type'] == "array":
         if iterations:
             iters = iterations.get(parent_key, 1)
         else:
             iters = 1
-        value = [get_faker_schema(
-            json_schema['items'], custom=custom, iterations=iterations) for i in range(iters)]
+        items = _items(json_schema)
+        value = [] if items is None else [get_faker_schema(
+            items, custom=custom, iterations=iterations) for i in range(iters)]
     elif json_schema['type'] == "string":
         value = "pystr"
     elif json_schema['type'] == "number":
         value = "pyfloat"
     elif json_schema['type'] == "integer":
         value = "pyint"
+    elif json_schema['type'] == "boolean":
+        value = "pybool"
+    return value
+
+
+def compile_faker_schema(json_schema, faker, custom=None, iterations=None, parent_key=None):
+    """ Compile JSON schema to a function that generates fake data.
+        Calling the function gives the same result as faker-schema's generate_fake on the
+        output of get_faker_schema, but the schema is only walked once and Faker providers
+        are looked up once instead of per generated value.
+    Args:
+        json_schema (dict): JSON schema
+        faker (faker.Faker): Faker instance, or other object with provider methods, to
+            generate values with
+        custom (dict): dictionary with custom names and data types specified
+        iterations (dict): dictionary with name and length specified for arrays
+        parent_key (str): The name of the key to generate fake data for
+    Returns:
+        function: function without arguments returning newly generated fake data per call
+    """
+    if "type" not in json_schema:
+        key = next(iter(json_schema))
+        return _compile_object([
+            (key, _compile_property(key, json_schema[key], faker, custom, iterations))
+        ])
+    if json_schema['type'] == "object":
+        value = _compile_object([
+            (prop, _compile_property(prop, val, faker, custom, iterations))
+            for prop, val in _properties(json_schema).items()
+        ])
+    elif json_schema['type'] == "array":
+        if iterations:
+            iters = iterations.get(parent_key, 1)
+        else:
+            iters = 1
+        items = _items(json_schema)
+        if items is None:
+            value = list
+        else:
+            value = _compile_array(
+                compile_faker_schema(items, faker, custom=custom, iterations=iterations),
+                iters)
+    elif json_schema['type'] == "string":
+        value = faker.pystr
+    elif json_schema['type'] == "number":
+        value = faker.pyfloat
+    elif json_schema['type'] == "integer":
+        value = faker.pyint
+    elif json_schema['type'] == "boolean":
+        value = faker.pybool
+    else:
+        raise ValueError(f"Unsupported JSON schema type {json_schema['type']}")
     return value
+
+
+def _compile_property(key, json_schema, faker, custom, iterations):
+    """Compile the function generating the value of a single property"""
+    if isinstance(custom, dict) and key in custom:
+        return getattr(faker, custom[key])
+    return compile_faker_schema(
+        _resolve_type(json_schema), faker, custom=custom, iterations=iterations,
+        parent_key=key)
+
+
+def _compile_object(items):
+    """Compile a function creating a dict with a generated value per key"""
+    def generate():
+        return {key: value() for key, value in items}
+    return generate
+
+
+def _compile_array(item, iters):
+    """Compile a function creating a list with `iters` generated items"""
+    def generate():
+        return [item() for _ in range(iters)]
+    return generate
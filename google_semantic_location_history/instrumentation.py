@@ -0,0 +1,145 @@
+"""Timing and memory instrumentation of the stages of generating GSLH data"""
+import time
+import threading
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+StageEvent = namedtuple("StageEvent", [
+    "stage", "year", "month", "wall_time", "cpu_time", "objects", "peak_memory", "queued"
+], defaults=[None])
+
+# context of a stage that is not measured, shared to keep the overhead negligible
+_DISABLED = nullcontext({})
+
+# number of stages tracing memory, which may run in several threads at once
+_TRACING = {"stages": 0, "started": False}
+_TRACING_LOCK = threading.Lock()
+
+
+def stage(observer, name, year=None, month=None, objects=None):
+    """Measure a stage and send a StageEvent to the observer when the stage ends.
+        The context value is a dict in which the number of objects can be set as "objects"
+        when it is only known at the end of the stage, and the number of months waiting in a
+        queue as "queued" by stages that hand months between threads.
+    Args:
+        observer (callable): called with the StageEvent, nothing is measured if None. Peak
+            memory is traced with tracemalloc if the observer has trace_memory set. CPU time
+            is that of the current thread, but tracemalloc traces the whole process: the peak
+            of a stage that runs while other stages run in other threads, such as with
+            pipelined or compression threads, includes their memory.
+        name (str): name of the stage
+        year (int): Optionally the year the stage generates
+        month (str): Optionally the month the stage generates
+        objects (int): Optionally the number of timeline objects handled by the stage
+    Returns:
+        context manager: measures the stage
+    """
+    if observer is None:
+        return _DISABLED
+    return _measure(observer, StageEvent(
+        name, year, month, None, None, objects, None
+    ), getattr(observer, "trace_memory", False))
+
+
+@contextmanager
+def _measure(observer, event, trace_memory):
+    """Measure wall time, CPU time and optionally peak memory of a stage"""
+    counts = {"objects": event.objects, "queued": None}
+    if trace_memory:
+        _start_tracing()
+    wall_time, cpu_time = time.perf_counter(), time.thread_time()
+    try:
+        yield counts
+    finally:
+        wall_time = time.perf_counter() - wall_time
+        cpu_time = time.thread_time() - cpu_time
+        peak_memory = _stop_tracing() if trace_memory else None
+    observer(event._replace(
+        wall_time=wall_time, cpu_time=cpu_time, objects=counts["objects"],
+        peak_memory=peak_memory, queued=counts["queued"]
+    ))
+
+
+def _start_tracing():
+    """Trace memory for a stage. Tracing only runs during stages, as it slows down
+    everything else as well; the peak is only reset when no other stage is traced."""
+    with _TRACING_LOCK:
+        if not _TRACING["stages"]:
+            _TRACING["started"] = not tracemalloc.is_tracing()
+            if _TRACING["started"]:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+        _TRACING["stages"] += 1
+
+
+def _stop_tracing():
+    """End tracing memory for a stage, stopping tracing after the last traced stage
+    Returns:
+        int: peak traced memory in bytes since the stage started
+    """
+    with _TRACING_LOCK:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        _TRACING["stages"] -= 1
+        if not _TRACING["stages"] and _TRACING["started"]:
+            tracemalloc.stop()
+        return peak_memory
+
+
+class SummaryReporter:
+    """Observer collecting stage events and summarizing them per stage"""
+
+    def __init__(self, trace_memory=False):
+        """
+        Args:
+            trace_memory (bool): trace peak memory per stage with tracemalloc, which slows
+                down generation considerably
+        """
+        self.trace_memory = trace_memory
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def summary(self):
+        """Summarize the events per stage, in order of first occurrence
+        Returns:
+            dict: per stage the number of events ("count"), total "wall_time" and "cpu_time"
+                in seconds, total "objects", maximum "peak_memory" in bytes and the mean
+                number of months in the queue after the stage ("queued"), None for stages
+                without a queue
+        """
+        summary = {}
+        queued = {}
+        for event in self.events:
+            totals = summary.setdefault(event.stage, {
+                "count": 0, "wall_time": 0., "cpu_time": 0., "objects": 0, "peak_memory": None,
+                "queued": None
+            })
+            totals["count"] += 1
+            totals["wall_time"] += event.wall_time
+            totals["cpu_time"] += event.cpu_time
+            totals["objects"] += event.objects or 0
+            if event.peak_memory is not None:
+                totals["peak_memory"] = max(totals["peak_memory"] or 0, event.peak_memory)
+            if event.queued is not None:
+                queued.setdefault(event.stage, []).append(event.queued)
+        for name, occupancies in queued.items():
+            summary[name]["queued"] = sum(occupancies) / len(occupancies)
+        return summary
+
+    def report(self):
+        """Format the summary as a table
+        Returns:
+            str: table with a row per stage
+        """
+        lines = [f"{'stage':<12}{'count':>7}{'wall (s)':>11}{'cpu (s)':>11}"
+                 f"{'objects':>10}{'peak (MB)':>11}{'queued':>8}"]
+        for name, totals in self.summary().items():
+            peak = "" if totals["peak_memory"] is None else f"{totals['peak_memory'] / 1e6:.1f}"
+            queued = "" if totals["queued"] is None else f"{totals['queued']:.1f}"
+            lines.append(
+                f"{name:<12}{totals['count']:>7}{totals['wall_time']:>11.3f}"
+                f"{totals['cpu_time']:>11.3f}{totals['objects']:>10}{peak:>11}{queued:>8}")
+        return "\n".join(lines)
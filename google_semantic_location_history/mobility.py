@@ -0,0 +1,128 @@
+"""Markov chain mobility model, drawing each next place from the current place"""
+from collections import namedtuple
+
+import numpy as np
+
+from google_semantic_location_history.timeline import AliasSampler, normalize_weights
+
+# Target of a transition to one of the places that are not anchors
+OTHER = -1
+
+# Sparse transition table: the transitions of row i are at indptr[i] up to indptr[i + 1] in
+# targets (OTHER for the other places) and probabilities
+Transitions = namedtuple("Transitions", ["indptr", "targets", "probabilities"])
+
+
+class MarkovSampler:
+    """Draw sequences of places from a Markov chain built from a year profile.
+
+    Anchor places (the top places, home first) each have their own row in the transition
+    table; all other places share a single row, and transitions to them are drawn from their
+    weights. The table therefore has anchors + 1 rows of at most anchors + 1 entries, however
+    many places there are. From any place but home, a trip returns home with probability
+    return_home; otherwise the next place is drawn with the place weights, leaving out the
+    current anchor place.
+    """
+
+    def __init__(self, weights, anchors, return_home):
+        """
+        Args:
+            weights (iterable): weight per place, anchor places first
+            anchors (int): number of anchor places, the first is home
+            return_home (float): probability that a trip from a place other than home ends
+                at home
+        """
+        self.weights = normalize_weights(weights)
+        self.anchors = min(anchors, len(self.weights))
+        self.return_home = return_home
+        self._start = AliasSampler(self.weights)
+        self._others = (AliasSampler(self.weights[self.anchors:])
+                        if len(self.weights) > self.anchors else None)
+        self.transitions = self._table()
+
+        # alias tables of all rows, concatenated, with aliases as positions in the table
+        indptr, _, probabilities = self.transitions
+        self._aliases = ([], [])
+        for start, end in zip(indptr[:-1], indptr[1:]):
+            sampler = AliasSampler(probabilities[start:end])
+            self._aliases[0].extend(sampler.probability.tolist())
+            self._aliases[1].extend((start + sampler.alias).tolist())
+
+    def __len__(self):
+        return len(self.weights)
+
+    def _row(self, origin):
+        """Get targets and probabilities of the transitions from an anchor place, or from
+        any other place if origin is OTHER"""
+        targets = list(range(self.anchors)) + ([OTHER] if self._others else [])
+        weights = np.append(self.weights[:self.anchors], self.weights[self.anchors:].sum())
+        weights = weights[:len(targets)]
+        if origin != OTHER:
+            weights[origin] = 0.
+        return_home = self.return_home if origin != 0 and self.anchors else 0.
+        if weights.sum() > 0.:
+            weights = (1. - return_home) * weights / weights.sum()
+        weights[0] += return_home
+        if weights.sum() == 0.:
+            # home is the only place
+            return np.array([origin]), np.ones(1)
+        keep = weights > 0.
+        return np.array(targets)[keep], weights[keep]
+
+    def _table(self):
+        """Build the sparse transition table, with rows for the anchors and the other places
+        Returns:
+            Transitions: row offsets, targets and probabilities
+        """
+        origins = list(range(self.anchors)) + ([OTHER] if self._others else [])
+        rows = [self._row(origin) for origin in origins]
+        indptr = np.cumsum([0] + [len(targets) for targets, _ in rows])
+        return Transitions(indptr, np.concatenate([targets for targets, _ in rows]),
+                           np.concatenate([probabilities for _, probabilities in rows]))
+
+    def transition_matrix(self):
+        """Get the dense transition matrix, for inspection of small place sets
+        Returns:
+            numpy.ndarray: probability of each next place (column) per current place (row)
+        """
+        matrix = np.zeros((len(self), len(self)))
+        other_weights = normalize_weights(self.weights[self.anchors:]) if self._others else None
+        indptr, targets, probabilities = self.transitions
+        for row, (start, end) in enumerate(zip(indptr[:-1], indptr[1:])):
+            rows = [row] if row < self.anchors else slice(self.anchors, None)
+            for target, probability in zip(targets[start:end], probabilities[start:end]):
+                if target == OTHER:
+                    matrix[rows, self.anchors:] += probability * other_weights
+                else:
+                    matrix[rows, target] += probability
+        return matrix
+
+    def sample(self, rng, size=None):
+        """Draw a sequence of places; all random numbers are drawn at once and the chain is
+        walked with the precomputed alias tables
+        Args:
+            rng (numpy.random.Generator): random generator to draw with
+            size (int): number of places to draw, None for a single place
+        Returns:
+            numpy.ndarray or int: indices of the drawn places, in order of the visits
+        """
+        current = self._start.sample(rng)
+        if size is None:
+            return current
+        others = (self.anchors + self._others.sample(rng, size=size)).tolist() \
+            if self._others else [OTHER] * size
+        indptr = self.transitions.indptr.tolist()
+        targets = self.transitions.targets.tolist()
+        probability, alias = self._aliases
+        path = []
+        for column, keep, other in zip(*rng.random((2, size)).tolist(), others):
+            path.append(current)
+            row = min(current, self.anchors)
+            start = indptr[row]
+            position = start + int(column * (indptr[row + 1] - start))
+            if keep >= probability[position]:
+                position = alias[position]
+            current = targets[position]
+            if current == OTHER:
+                current = other
+        return np.array(path, dtype=np.int64)
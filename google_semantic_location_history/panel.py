@@ -0,0 +1,165 @@
+"""Generate fake Google Semantic Location History data for a panel of participants"""
+import os
+import csv
+import time
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from google_semantic_location_history.cli import (
+    _add_generation_arguments, _add_write_arguments, _generation_options, _write_options
+)
+from google_semantic_location_history.distances import DistanceCache
+from google_semantic_location_history.get_faker_schema import load_json_schema
+from google_semantic_location_history.simulation_gslh import (
+    GenerationOptions, _MonthFactory, _count_objects, _create_places, _iter_months,
+    write_zipfile
+)
+
+MANIFEST = "manifest.csv"
+MANIFEST_FIELDS = [
+    "participant", "seed", "file", "months", "timeline_objects", "bytes", "seconds"
+]
+
+
+def _participant_seed(seed, participant):
+    """Derive an independent seed for a participant from the base seed
+    Args:
+        seed (int): base seed of the panel
+        participant (int): number of the participant
+    Returns:
+        int: seed of the participant
+    """
+    return int(np.random.SeedSequence([seed, participant]).generate_state(1)[0])
+
+
+def _write_participant(factory, output_dir, participant, seed, write_options=None):
+    """Generate and write the GSLH zipfile of a participant
+    Args:
+        factory (_MonthFactory): factory with the JSON schema and the options on how to
+            generate months, shared by all participants
+        output_dir (str): directory to write the zipfile to
+        participant (int): number of the participant
+        seed (int): seed of the participant
+        write_options (WriteOptions): Optionally the encoder, compression and number of
+            threads to write the zipfile with
+    Returns:
+        dict: manifest record of the participant
+    """
+    start = time.perf_counter()
+    options = factory.options
+    places = _create_places(
+        total=max(options.profiles["NPLACES"].values()), seed=seed,
+        generator=options.place_generator)
+    factory = factory.with_places(
+        places, DistanceCache.from_places(places, method=options.distance))
+    file_name = f"participant_{participant:05d}.zip"
+
+    counts = []
+
+    def months():
+        for key, data in _iter_months(factory, seed, jobs=1):
+            counts.append(_count_objects(data))
+            yield key, data
+
+    write_zipfile(months(), os.path.join(output_dir, file_name), options=write_options)
+    return {
+        "participant": participant,
+        "seed": seed,
+        "file": file_name,
+        "months": len(counts),
+        "timeline_objects": sum(counts),
+        "bytes": os.path.getsize(os.path.join(output_dir, file_name)),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+_WORKER_WRITER = None
+
+
+def _init_worker(writer):
+    """Store the function writing participant zipfiles in a worker process"""
+    global _WORKER_WRITER  # pylint: disable=global-statement
+    _WORKER_WRITER = writer
+
+
+def _write_worker_participant(participant, seed):
+    """Write the zipfile of a participant in a worker process"""
+    return _WORKER_WRITER(participant, seed)
+
+
+def generate_panel(json_file, participants, output_dir,  # pylint: disable=too-many-arguments
+                   *, seed=0, options=None, write_options=None):
+    """Write a GSLH zipfile per participant and a manifest of the panel
+    Args:
+        json_file: example json file with data to simulate
+        participants (int): number of participants
+        output_dir (str): directory to write the zipfiles and manifest to
+        seed (int): seed of the panel, each participant gets a seed derived from it
+        options (GenerationOptions): Optionally the options on how to generate months, with
+            jobs the number of worker processes writing participants. Months are always
+            generated as compact months.
+        write_options (WriteOptions): Optionally the encoder, compression and number of
+            threads to write the zipfile of each participant with
+    Returns:
+        list: manifest record (dict) per participant
+    """
+    options = (options or GenerationOptions())._replace(compact=True)
+    jobs = options.jobs
+    os.makedirs(output_dir, exist_ok=True)
+    writer = functools.partial(
+        _write_participant,
+        _MonthFactory(load_json_schema(json_file, cache_dir=options.cache_dir), None, None,
+                      options),
+        output_dir, write_options=write_options)
+    numbers = range(participants)
+    seeds = [_participant_seed(seed, participant) for participant in numbers]
+
+    if jobs == 1:
+        manifest = list(map(writer, numbers, seeds))
+    else:
+        with ProcessPoolExecutor(
+                max_workers=jobs, initializer=_init_worker, initargs=(writer,)) as executor:
+            manifest = list(executor.map(
+                _write_worker_participant, numbers, seeds,
+                chunksize=max(1, participants // (4 * (jobs or os.cpu_count() or 1)))))
+
+    with open(os.path.join(output_dir, MANIFEST), 'w', encoding='utf8', newline='') as file:
+        manifest_writer = csv.DictWriter(file, fieldnames=MANIFEST_FIELDS)
+        manifest_writer.writeheader()
+        manifest_writer.writerows(manifest)
+
+    return manifest
+
+
+def main(argv=None):
+    """Command line interface for generating a panel of participants"""
+    parser = argparse.ArgumentParser(
+        description="Generate fake Google Semantic Location History zipfiles for a panel of "
+                    "participants")
+    parser.add_argument(
+        "json_file", help="example GSLH month JSON file, or Takeout zipfile or folder to infer "
+                          "the schema of all its months from")
+    parser.add_argument("output_dir", help="directory to write the zipfiles and manifest to")
+    parser.add_argument("-n", "--participants", type=int, default=1,
+                        help="number of participants (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the panel (default: 0)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes, 0 for all cores (default: 1)")
+    _add_generation_arguments(parser)
+    _add_write_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.threads < 1:
+        parser.error("--threads needs at least 1 thread")
+
+    manifest = generate_panel(
+        args.json_file, args.participants, args.output_dir, seed=args.seed,
+        options=_generation_options(args, jobs=args.jobs or None),
+        write_options=_write_options(args))
+    print(f"Wrote {len(manifest)} participants to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Vectorized interpolation of the paths travelled during activity segments"""
+from collections import namedtuple
+
+import numpy as np
+from geopy.distance import EARTH_RADIUS
+
+# Standard deviation in meters of the noise on points between the start and end location
+JITTER_METERS = 10.
+METERS_PER_DEGREE = EARTH_RADIUS * 1.e3 * np.pi / 180.
+
+Paths = namedtuple("Paths", ["offsets", "latitudes", "longitudes", "timestamps", "accuracies"])
+
+# Activity segments to interpolate: latitudes and longitudes in 1e-7 degrees of the start and
+# of the end location per segment, start and end time in milliseconds per segment, and
+# distance in meters per segment
+Segments = namedtuple("Segments", ["starts", "ends", "times", "distances"])
+
+
+def interpolate_paths(segments, rng, *, points_per_km=1., jitter=JITTER_METERS):
+    """Interpolate points from start to end location of all segments at once
+    Args:
+        segments (Segments): start and end location, times and distance per segment
+        rng (numpy.random.Generator): random generator to draw the noise with
+        points_per_km (float): number of points per kilometer, besides the start and end point
+        jitter (float): standard deviation in meters of the noise on points between the start
+            and end point
+    Returns:
+        Paths: points of segment i are at offsets[i] up to offsets[i + 1] in the other
+            arrays: latitudes and longitudes in 1e-7 degrees, timestamps spread evenly over
+            the duration of the segment in milliseconds, and accuracies in meters
+    """
+    starts, ends, times, distances = segments
+    distances = np.asarray(distances, dtype=float)
+    counts = 2 + np.floor(distances / 1.e3 * points_per_km).astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    segment = np.repeat(np.arange(len(counts)), counts)
+    fraction = (np.arange(offsets[-1]) - offsets[segment]) / (counts[segment] - 1)
+
+    def along(start, end):
+        start = np.asarray(start, dtype=float)[segment]
+        return start + fraction * (np.asarray(end, dtype=float)[segment] - start)
+
+    latitudes = along(starts[0], ends[0])
+    longitudes = along(starts[1], ends[1])
+    # the start and end point are at the locations, the points between are noisy measurements
+    inner = (fraction > 0.) & (fraction < 1.)
+    noise = rng.normal(0., jitter, size=(2, len(fraction))) * inner
+    latitudes += noise[0] / METERS_PER_DEGREE * 1e7
+    longitudes += noise[1] / (METERS_PER_DEGREE * np.cos(np.radians(latitudes / 1e7))) * 1e7
+
+    return Paths(
+        offsets=offsets,
+        latitudes=np.round(latitudes).astype(np.int64),
+        longitudes=np.round(longitudes).astype(np.int64),
+        timestamps=np.round(along(times[0], times[1])).astype(np.int64),
+        accuracies=np.maximum(1, np.ceil(np.hypot(*noise))).astype(np.int64)
+    )
@@ -0,0 +1,86 @@
+"""Bounded queue between the generation of months and the writing of the zipfile"""
+import queue
+import threading
+from collections import namedtuple
+
+from google_semantic_location_history.instrumentation import stage
+
+# seconds between checks whether the consumer stopped, while the producer waits for room
+_POLL_INTERVAL = 0.1
+# end of the months, with the exception of the producer if it failed
+_Done = namedtuple("_Done", ["error"], defaults=[None])
+
+
+def _produce(data, months, stopped, observer):
+    """Put the months of data in the queue until they run out or the consumer stops"""
+    iterator = iter(data)
+    try:
+        for key, month_data in iterator:
+            with stage(observer, "enqueue", *key) as counts:
+                while not stopped.is_set():
+                    try:
+                        months.put((key, month_data), timeout=_POLL_INTERVAL)
+                        break
+                    except queue.Full:
+                        continue
+                counts["queued"] = months.qsize()
+            if stopped.is_set():
+                break
+        done = _Done()
+    except Exception as error:  # pylint: disable=broad-except
+        done = _Done(error)
+    finally:
+        # stop worker processes of iter_fake_data when the consumer stopped early
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
+    # the consumer takes months until it gets done, unless it stopped
+    while not stopped.is_set():
+        try:
+            months.put(done, timeout=_POLL_INTERVAL)
+            return
+        except queue.Full:
+            continue
+
+
+def pipelined(data, maxsize=4, observer=None):
+    """Produce months in a background thread while the caller consumes them, such as
+        write_zipfile encoding, compressing and writing them. At most maxsize months wait in
+        the queue, so a producer that is faster than the consumer waits rather than filling
+        memory. The producer thread holds the GIL while it generates months in the current
+        process, so generation overlaps with compression and writing, which release it, and
+        with the worker processes of iter_fake_data with jobs.
+    Args:
+        data (iterable): ((year, month), data) pairs, such as returned by iter_fake_data
+        maxsize (int): number of months that can wait in the queue
+        observer (callable): Optionally called with a StageEvent for the "enqueue" stage of
+            each month, timing how long the producer waited for room, and the "dequeue" stage,
+            timing how long the consumer waited for a month. Both set "queued" to the number
+            of months in the queue afterwards: a queue that is mostly full means writing is
+            the bottleneck, a queue that is mostly empty means generation is.
+    Yields:
+        tuple: the same ((year, month), data) pairs, in order
+    Raises:
+        Exception: any exception of the producer, when the consumer reaches it
+    """
+    if maxsize < 1:
+        raise ValueError(f"Queue size must be at least 1, got {maxsize}")
+    months = queue.Queue(maxsize)
+    stopped = threading.Event()
+    producer = threading.Thread(
+        target=_produce, args=(data, months, stopped, observer), name="gslh-producer",
+        daemon=True)
+    producer.start()
+    try:
+        while True:
+            with stage(observer, "dequeue") as counts:
+                item = months.get()
+                counts["queued"] = months.qsize()
+            if isinstance(item, _Done):
+                if item.error:
+                    raise item.error
+                return
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
@@ -0,0 +1,131 @@
+"""Bulk generation of large sets of unique visited places"""
+import string
+
+import numpy as np
+from faker import Faker
+from faker.providers import geo
+
+# coordinates are drawn in millionths of a degree, as Faker's coordinate
+MICRODEGREES = 10 ** 6
+LETTERS = string.ascii_letters
+
+
+def _unique_codes(rng, total, high):
+    """Draw distinct integers without a retry per value: collisions are redrawn in bulk
+    Args:
+        rng (numpy.random.Generator): random generator
+        total (int): number of integers to draw, at most high
+        high (int): integers are drawn from 0 up to high
+    Returns:
+        numpy.ndarray: distinct integers in random order
+    """
+    if total > high:
+        raise ValueError(f"Cannot draw {total} distinct values from {high}")
+    codes = np.empty(0, dtype=np.int64)
+    while len(codes) < total:
+        codes = np.concatenate([codes, rng.integers(high, size=total - len(codes))])
+        _, first = np.unique(codes, return_index=True)
+        codes = codes[np.sort(first)]
+    return codes
+
+
+def _numbered(values, indices):
+    """Select values by index and number repeated values, so every selected value is unique
+    Args:
+        values (list): distinct values, such as company names
+        indices (numpy.ndarray): index of the value per selection
+    Returns:
+        list: selected values, the second and later selections of a value get " 2", " 3", ...
+    """
+    order = np.argsort(indices, kind='stable')
+    sorted_indices = indices[order]
+    positions = np.arange(len(indices))
+    first = np.r_[True, sorted_indices[1:] != sorted_indices[:-1]]
+    occurrence = np.empty(len(indices), dtype=np.int64)
+    occurrence[order] = positions - np.maximum.accumulate(np.where(first, positions, 0))
+    return [values[index] if number == 0 else f"{values[index]} {number + 1}"
+            for index, number in zip(indices.tolist(), occurrence.tolist())]
+
+
+def _sample(provider, size):
+    """Sample distinct values from a Faker provider"""
+    return list(dict.fromkeys(provider() for _ in range(size)))
+
+
+def _bulk_coordinates(rng, total, center, radius):
+    """Draw unique coordinates around a center, as a single code per pair on a grid of
+    microdegrees
+    Returns:
+        tuple: latitudes and longitudes in degrees
+    """
+    side = 2 * round(radius * MICRODEGREES) + 1
+    codes = _unique_codes(rng, total, side * side)
+    latitudes = float(center[0]) + (codes // side - side // 2) / MICRODEGREES
+    longitudes = float(center[1]) + (codes % side - side // 2) / MICRODEGREES
+    return np.round(latitudes, 6).tolist(), np.round(longitudes, 6).tolist()
+
+
+def _bulk_addresses(rng, total, fake, sample_size):
+    """Draw unique addresses, as a single code per street, building number, postcode and city
+    Returns:
+        list: addresses formatted as Faker's nl_NL address
+    """
+    streets = _sample(fake.street_name, sample_size)
+    postcodes = _sample(fake.postcode, sample_size)
+    cities = _sample(fake.city, sample_size)
+    sizes = (len(streets), 999, len(postcodes), len(cities))
+    codes = _unique_codes(rng, total, int(np.prod(sizes)))
+    return [f"{streets[street]} {building + 1}\n{postcodes[postcode]}\n{cities[city]}"
+            for street, building, postcode, city in zip(
+                *(indices.tolist() for indices in np.unravel_index(codes, sizes)))]
+
+
+def _bulk_place_ids(rng, total):
+    """Draw unique place ids formatted as Faker's pystr_format, such as "b1-5003748L"
+    Returns:
+        list: place ids
+    """
+    sizes = (len(LETTERS), 10, 10 ** 7, len(LETTERS))
+    first, digit, number, last = (indices.tolist() for indices in np.unravel_index(
+        _unique_codes(rng, total, int(np.prod(sizes))), sizes))
+    return [f"{LETTERS[start]}{digit_}-{number_:07d}{LETTERS[end]}"
+            for start, digit_, number_, end in zip(first, digit, number, last)]
+
+
+def bulk_places(total=1, seed=None, radius=0.05, sample_size=1024):
+    """Create dictionary with visited places, vectorized for large numbers of places.
+
+    Names, streets, postcodes and cities are sampled from Faker once and combined per place;
+    coordinates are drawn around a random Dutch town. Unlike _create_places with Faker's
+    unique proxy, there are no retries per place and no limit on the number of places.
+    Args:
+        total (int): number of places
+        seed (int): Optionally seed for reproducability
+        radius (float): largest distance in degrees of latitude and longitude from the center
+        sample_size (int): number of values to sample from each Faker provider
+    Returns:
+        dict: dictionary with visited places with name, address and location, in the same
+            format as _create_places
+    """
+    fake = Faker('nl_NL')
+    if seed is not None:
+        fake.seed_instance(seed)
+    fake.add_provider(geo)
+    rng = np.random.default_rng(seed)
+
+    latitudes, longitudes = _bulk_coordinates(
+        rng, total, fake.local_latlng(country_code="NL"), radius)
+    companies = _sample(fake.company, sample_size)
+    names = _numbered(companies, rng.integers(len(companies), size=total))
+    addresses = _bulk_addresses(rng, total, fake, sample_size)
+
+    return {
+        place_id: {
+            "name": name,
+            "address": address,
+            "latitude": latitude,
+            "longitude": longitude
+        }
+        for place_id, name, address, latitude, longitude in zip(
+            _bulk_place_ids(rng, total), names, addresses, latitudes, longitudes)
+    }
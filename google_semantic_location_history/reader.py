@@ -0,0 +1,275 @@
+"""Streaming reader of the monthly JSON files of Semantic Location History archives"""
+import os
+import re
+import json
+import codecs
+import calendar
+from datetime import datetime
+from contextlib import contextmanager
+from zipfile import ZipFile
+
+import numpy as np
+
+MONTH_NAMES = [name.upper() for name in calendar.month_name[1:]]
+# end of the path of a month, <year>/<year>_<MONTH>.json as written by member_name; the
+# folders above it are not matched, as their names depend on the language of the export
+MONTH_PATTERN = re.compile(r"(?:^|/)(\d{4})/\d{4}_([A-Z]+)\.json$")
+CHUNK_SIZE = 1 << 16
+# characters that can continue a number, which the decoder may have stopped before
+NUMBER_CHARACTERS = "0123456789.eE+-"
+# value of integer columns for fields that are missing
+MISSING = -1
+
+VISIT_COLUMNS = ["startTimestampMs", "endTimestampMs", "latitudeE7", "longitudeE7", "placeId"]
+SEGMENT_COLUMNS = [
+    "startTimestampMs", "endTimestampMs", "startLatitudeE7", "startLongitudeE7",
+    "endLatitudeE7", "endLongitudeE7", "activityType", "distance"
+]
+STRING_COLUMNS = ["placeId", "activityType"]
+
+
+def _month_key(path):
+    """Get (year, month) of a path of a monthly JSON file, None for other paths"""
+    match = MONTH_PATTERN.search(path.replace(os.sep, "/"))
+    if not match or match.group(2) not in MONTH_NAMES:
+        return None
+    return int(match.group(1)), match.group(2)
+
+
+def _sort_key(item):
+    """Order months by year and month"""
+    (year, month), _ = item
+    return year, MONTH_NAMES.index(month)
+
+
+def iter_members(path):
+    """Find the monthly JSON files of a Takeout zipfile or of an extracted folder
+    Args:
+        path (str): zipfile, such as written by write_zipfile, or folder containing the
+            Semantic Location History files
+    Yields:
+        tuple: (year, month) and a function opening the JSON file of the month as a binary
+            file object, in order of years and months
+    """
+    if os.path.isdir(path):
+        members = []
+        for directory, _, names in os.walk(path):
+            for name in names:
+                key = _month_key(os.path.join(directory, name))
+                if key:
+                    members.append((key, os.path.join(directory, name)))
+        for key, file_path in sorted(members, key=_sort_key):
+            # the caller opens the file with a with statement
+            yield key, lambda file_path=file_path: open(file_path, 'rb')  # pylint: disable=R1732
+        return
+
+    with ZipFile(path) as zip_archive:
+        members = [(_month_key(name), name) for name in zip_archive.namelist()]
+        for key, name in sorted(((key, name) for key, name in members if key), key=_sort_key):
+            yield key, lambda name=name: zip_archive.open(name)  # pylint: disable=R1732
+
+
+@contextmanager
+def open_month(path, key):
+    """Open the JSON file of one month of a Takeout zipfile or folder
+    Args:
+        path (str): zipfile or folder, see iter_members
+        key (tuple): year and month
+    Yields:
+        binary file object with the JSON of the month
+    Raises:
+        KeyError: if the month is not in the zipfile or folder
+    """
+    for member, open_member in iter_members(path):
+        if member == key:
+            with open_member() as file_object:
+                yield file_object
+            return
+    raise KeyError(key)
+
+
+class _Stream:
+    """Text buffer over a binary file object, read a chunk at a time"""
+
+    def __init__(self, file_object, chunk_size):
+        self._file = file_object
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def read(self):
+        """Append the next chunk to the buffer, dropping what was consumed
+        Returns:
+            bool: False at the end of the file
+        """
+        if self.eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.position:] + self._decoder.decode(chunk, final=self.eof)
+        self.position = 0
+        return True
+
+    def skip(self, characters=" \t\r\n"):
+        """Skip characters, reading more when the buffer runs out
+        Returns:
+            str: the next character, empty at the end of the file
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in characters:
+                self.position += 1
+            if self.position < len(self.buffer) or not self.read():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, character):
+        """Skip whitespace and the given character"""
+        if self.skip() != character:
+            raise ValueError(f"Expected {character!r} at {self.buffer[self.position:][:20]!r}")
+        self.position += 1
+
+    def decode(self, decoder):
+        """Decode the next JSON value, reading more until it is complete"""
+        self.skip()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # at least double the text to decode, so a value spanning many chunks is
+                # decoded a logarithmic rather than linear number of times
+                target = 2 * (len(self.buffer) - self.position) + 1
+                if not self.read():
+                    raise
+                while len(self.buffer) - self.position < target and self.read():
+                    pass
+                continue
+            # a number at the end of the buffer, or cut after e.g. "1." or "1e-", may
+            # continue in the next chunk
+            if self.eof or (end < len(self.buffer)
+                            and self.buffer[end] not in NUMBER_CHARACTERS):
+                self.position = end
+                return value
+            self.read()
+
+
+def iter_timeline_objects(file_object, chunk_size=CHUNK_SIZE):
+    """Stream the timeline objects of a month, without loading the whole month in memory
+    Args:
+        file_object: binary file object with the JSON of a month
+        chunk_size (int): number of bytes to read at once
+    Yields:
+        dict: timeline object
+    """
+    stream = _Stream(file_object, chunk_size)
+    decoder = json.JSONDecoder()
+    stream.expect("{")
+    while stream.skip() != "}":
+        key = stream.decode(decoder)
+        stream.expect(":")
+        if key != "timelineObjects":
+            stream.decode(decoder)
+        else:
+            stream.expect("[")
+            while stream.skip() != "]":
+                yield stream.decode(decoder)
+                if stream.skip() == ",":
+                    stream.position += 1
+            stream.position += 1
+        if stream.skip() == ",":
+            stream.position += 1
+
+
+def iter_timeline(path, chunk_size=CHUNK_SIZE):
+    """Stream the timeline objects of all months of a Takeout zipfile or folder
+    Args:
+        path (str): zipfile or folder, see iter_members
+        chunk_size (int): number of bytes to read at once
+    Yields:
+        tuple: (year, month) and timeline object
+    """
+    for key, open_member in iter_members(path):
+        with open_member() as file_object:
+            for timeline_object in iter_timeline_objects(file_object, chunk_size):
+                yield key, timeline_object
+
+
+def parse_timestamp(timestamp):
+    """Get milliseconds since the epoch of an ISO 8601 timestamp, such as the startTimestamp
+        of newer exports
+    Args:
+        timestamp (str): timestamp, such as 2021-01-01T00:00:00.500Z
+    Returns:
+        int: milliseconds since the epoch
+    """
+    return int(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp() * 1e3)
+
+
+def _timestamp(duration, name):
+    """Get a timestamp in milliseconds of a duration, from e.g. startTimestampMs or the
+    ISO 8601 startTimestamp of newer exports"""
+    if f"{name}Ms" in duration:
+        return int(duration[f"{name}Ms"])
+    if name in duration:
+        return parse_timestamp(duration[name])
+    return MISSING
+
+
+def _visit_row(visit):
+    """Get the values of VISIT_COLUMNS of a placeVisit"""
+    duration, location = visit.get("duration", {}), visit.get("location", {})
+    return (_timestamp(duration, "startTimestamp"), _timestamp(duration, "endTimestamp"),
+            location.get("latitudeE7", MISSING), location.get("longitudeE7", MISSING),
+            location.get("placeId", ""))
+
+
+def _segment_row(segment):
+    """Get the values of SEGMENT_COLUMNS of an activitySegment"""
+    duration = segment.get("duration", {})
+    start, end = segment.get("startLocation", {}), segment.get("endLocation", {})
+    return (_timestamp(duration, "startTimestamp"), _timestamp(duration, "endTimestamp"),
+            start.get("latitudeE7", MISSING), start.get("longitudeE7", MISSING),
+            end.get("latitudeE7", MISSING), end.get("longitudeE7", MISSING),
+            # generated data has the type in the duration, exports next to it
+            duration.get("activityType", segment.get("activityType", "")),
+            segment.get("distance", MISSING))
+
+
+def _table(rows, columns):
+    """Convert rows to a dict of arrays, int64 for numbers and str for STRING_COLUMNS"""
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return {
+        column: np.array(value, dtype=str if column in STRING_COLUMNS else np.int64)
+        for column, value in zip(columns, values)
+    }
+
+
+def to_columns(timeline_objects):
+    """Collect the core fields of timeline objects in columns
+    Args:
+        timeline_objects (iterable): timeline objects, such as from iter_timeline_objects
+    Returns:
+        dict: "visits" with VISIT_COLUMNS of the place visits and "segments" with
+            SEGMENT_COLUMNS of the activity segments, each a dict of numpy arrays. Missing
+            numbers are MISSING and missing strings empty.
+    """
+    visits, segments = [], []
+    for timeline_object in timeline_objects:
+        if "placeVisit" in timeline_object:
+            visits.append(_visit_row(timeline_object["placeVisit"]))
+        if "activitySegment" in timeline_object:
+            segments.append(_segment_row(timeline_object["activitySegment"]))
+    return {"visits": _table(visits, VISIT_COLUMNS),
+            "segments": _table(segments, SEGMENT_COLUMNS)}
+
+
+def read_columns(path, chunk_size=CHUNK_SIZE):
+    """Read the core fields of all months of a Takeout zipfile or folder in columns,
+        streaming the JSON so only the columns are held in memory
+    Args:
+        path (str): zipfile or folder, see iter_members
+        chunk_size (int): number of bytes to read at once
+    Returns:
+        dict: "visits" and "segments" tables, see to_columns
+    """
+    return to_columns(timeline_object for _, timeline_object in iter_timeline(path, chunk_size))
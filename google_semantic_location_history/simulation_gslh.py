@@ -1,17 +1,40 @@
 """Generate fake Google Semantic Location history data"""
-import json
+import os
+import copy
+import functools
 import itertools
 from datetime import datetime
-from collections import OrderedDict
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import Mapping
 from calendar import monthrange
-
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from zipfile import ZipFile
+
+import numpy as np
 from faker import Faker
 from faker.providers import geo
-from faker_schema.faker_schema import FakerSchema
-from geopy.distance import geodesic
 
-from google_semantic_location_history.get_faker_schema import get_json_schema, get_faker_schema
+from google_semantic_location_history.archive import (
+    COMPRESSIONS, compress_member, get_encoder, member_name, resolve_encoder, write_member
+)
+from google_semantic_location_history.checkpoint import CheckpointStore
+from google_semantic_location_history.compact import (
+    CompactMonth, compile_template, fill_path_columns, fill_timeline_columns, generate_columns,
+    place_columns
+)
+from google_semantic_location_history.distances import DistanceCache
+from google_semantic_location_history.get_faker_schema import (
+    load_json_schema, compile_faker_schema, content_digest
+)
+from google_semantic_location_history.instrumentation import SummaryReporter, stage
+from google_semantic_location_history.mobility import MarkovSampler
+from google_semantic_location_history.paths import Segments, interpolate_paths
+from google_semantic_location_history.places import bulk_places
+from google_semantic_location_history.spatial import GravitySampler, GridIndex
+from google_semantic_location_history.timeline import (
+    AliasSampler, generate_timeline, normalize_weights
+)
+from google_semantic_location_history.value_pool import ValuePool
 
 YEARS = [2019, 2020, 2021]
 MONTHS = [
@@ -42,6 +65,70 @@ ACTIVITIES = {
     }),
 }
 FRACTION_PLACES = {2019: 0.8, 2020: 0.8, 2021: 0.95}
+# Probability that a trip from a place other than home ends at home, for "markov" mobility
+RETURN_HOME = {2019: 0.5, 2020: 0.6, 2021: 0.8}
+
+# Exact Faker values, or fast pools of pre-generated values, for fields without semantics
+FILLERS = ["faker", "pool"]
+
+# Places generated one at a time with Faker's unique values, or vectorized in bulk
+PLACE_GENERATORS = ["faker", "bulk"]
+
+# Next places drawn independently of the current place, near it, or from transition tables
+MOBILITY = ["independent", "gravity", "markov"]
+
+# Year profiles, scaled copies are passed on to _MonthFactory, see _get_profiles
+PROFILES = [
+    "YEARS", "MONTHS", "NPLACES", "NACTIVITIES", "TOP_PLACES", "ACTIVITIES", "FRACTION_PLACES",
+    "RETURN_HOME"
+]
+
+# Options on how to generate months:
+# - distance: "geodesic" for exact or "haversine" for fast distances between places
+# - jobs: number of worker processes generating months, None for all cores. Output does not
+#   depend on the number of workers.
+# - cache_dir: Optionally the directory to cache the JSON schema of the example file in, see
+#   get_schema_cache_dir
+# - filler: "faker" for exact Faker values or "pool" for fast pre-generated values in fields
+#   that are not simulated, such as confidences and raw paths
+# - place_generator: "faker" for unique Faker values per place, or "bulk" for fast generation
+#   of large numbers of places
+# - mobility: "independent" to draw every next place with the weights of the year, "gravity"
+#   to draw next places near the current place, or "markov" to draw them from per-year
+#   transition tables that return home
+# - points_per_km: Optionally replace the filler waypoints and raw path points of activity
+#   segments by paths interpolated from start to end location, with this many points per
+#   kilometer
+# - compact: hold each month as a CompactMonth, which takes about a tenth of the memory of
+#   the dict and gives the same dict with to_dict
+# - profiles: Optionally the year profiles to generate months with, such as returned by
+#   _scale_profiles, the year profiles of the module by default
+GenerationOptions = namedtuple("GenerationOptions", [
+    "distance", "jobs", "cache_dir", "filler", "place_generator", "mobility", "points_per_km",
+    "compact", "profiles"
+], defaults=["geodesic", 1, None, "faker", "faker", "independent", None, False, None])
+
+# Options on how to write the monthly JSON files to a zipfile:
+# - encoder: JSON encoder in ENCODERS, or "auto" for the fastest installed one. Compact months
+#   are written straight from their columns with json and auto.
+# - compression: "stored", "deflate", "bzip2" or "lzma"
+# - compresslevel: Optionally the compression level, see zipfile.ZipFile
+# - threads: number of threads encoding and compressing months, the archive is the same for
+#   any number of threads. With more than one thread, months are compressed before they are
+#   written, so their compressed data is held in memory.
+WriteOptions = namedtuple("WriteOptions", ["encoder", "compression", "compresslevel", "threads"],
+                          defaults=["json", "stored", None, 1])
+
+# Options of _update_data: distances between the places (DistanceCache, in the same order as
+# the places or a superset starting with them, computed with geodesic if None), the sampler
+# drawing the sequence of visited places (such as GravitySampler, independent draws with the
+# weights of the year if None), the points per kilometer of interpolated paths (filler
+# paths if None), the year profiles (those of the module if None) and the fields of the
+# places (PlaceColumns, in the same order as the places or a superset starting with them,
+# collected from the places if None)
+_UpdateOptions = namedtuple(
+    "_UpdateOptions", ["distances", "place_sampler", "points_per_km", "profiles", "places"],
+    defaults=[None, None, None, None, None])
 
 # schema with types
 SCHEMA_TYPES = {
@@ -51,13 +138,20 @@ SCHEMA_TYPES = {
 }
 
 
-def _create_places(total=1, seed=None):
+def _create_places(total=1, seed=None, generator="faker"):
     """Create dictionary with visited places
     Args:
         total (int): number of places
+        seed (int): Optionally seed for reproducability
+        generator (str): "faker" for unique Faker values per place, or "bulk" for fast
+            vectorized generation of large numbers of places, see bulk_places
     Returns:
         dict: dictionary with visited places with name, address and location
     """
+    if generator not in PLACE_GENERATORS:
+        raise ValueError(f"Unknown place generator {generator}, choose from {PLACE_GENERATORS}")
+    if generator == "bulk":
+        return bulk_places(total=total, seed=seed)
     fake = Faker('nl_NL')
     if seed is not None:
         fake.seed_instance(seed)
@@ -77,132 +171,789 @@ def _create_places(total=1, seed=None):
     return places
 
 
-def _update_data(data, start_date, places, seed=None):
+def _profile(name, profiles=None):
+    """Get a year profile
+    Args:
+        name (str): name in PROFILES
+        profiles (dict): Optionally the year profiles, see _get_profiles, the module's if not
+            given
+    Returns:
+        value of the profile
+    """
+    return globals()[name] if profiles is None else profiles[name]
+
+
+def _place_weights(year, total, profiles=None):
+    """Get probability of visiting each of the first `total` places in a year
+    Args:
+        year (int): year to get place weights for
+        total (int): number of places
+        profiles (dict): Optionally the year profiles, see _get_profiles
+    Returns:
+        numpy.ndarray: probability per place
+    """
+    top_places = _profile("TOP_PLACES", profiles)[year]
+    other = (1.0 - sum(top_places))/(_profile("NPLACES", profiles)[year] - len(top_places))
+    return normalize_weights(
+        top_places[number] if number < len(top_places) else other for number in range(total))
+
+
+@functools.lru_cache(maxsize=64)
+def _alias_sampler(weights):
+    """Get sampler for weights, built once per year profile
+    Args:
+        weights (tuple): weight per index
+    Returns:
+        AliasSampler: sampler drawing indices with the weights
+    """
+    return AliasSampler(weights)
+
+
+def _durations(start_date, profiles=None):
+    """Get the start time and the durations of place visits and activity segments of a month
+    Args:
+        start_date (datetime.datetime): start date of the month
+        profiles (dict): Optionally the year profiles, see _get_profiles
+    Returns:
+        tuple: start time, duration of a place visit and of an activity segment in ms
+    """
+    year = start_date.year
+    fraction_places = _profile("FRACTION_PLACES", profiles)[year]
+    duration = (monthrange(year, start_date.month)[1] * 24 * 60 * 60 * 1.e3 /
+                _profile("NACTIVITIES", profiles)[year])
+    return (start_date.timestamp() * 1.e3, fraction_places * duration,
+            (1.0 - fraction_places) * duration)
+
+
+def _update_data(data, start_date, places, seed=None, options=None):
     """ Update GSLH data with specified places, activities and durations
     Args:
-        data (dict): data to update
+        data (dict or CompactMonth): data to update
         start_date (datetime.datetime): start date of GSLH data
         places (dict): places to select from
-        seed (int): Optionally seed Faker for reproducability
+        seed (int): Optionally seed the random generator for reproducability
+        options (_UpdateOptions): Optionally the distances between the places, the sampler of
+            visited places, the points per kilometer of paths of activity segments, the year
+            profiles and the fields of the places
     Returns:
-        dict: dictionary with places containing name, address and location
+        dict or CompactMonth: the updated data
     """
-    start_time = start_date.timestamp() * 1.e3
     year = start_date.year
-    duration = monthrange(year, start_date.month)[1] * 24 * 60 * 60 * 1.e3 / NACTIVITIES[year]
-    duration_place = FRACTION_PLACES[year] * duration
-    duration_activity = (1.0 - FRACTION_PLACES[year]) * duration
-
-    elements = OrderedDict()
-    for number, place in enumerate(places):
-        if number < len(TOP_PLACES[year]):
-            elements[place] = TOP_PLACES[year][number]
+    options = options or _UpdateOptions()
+    activities = _profile("ACTIVITIES", options.profiles)[year]
+    rng = np.random.default_rng(seed)
+    compact = isinstance(data, CompactMonth)
+    if compact:
+        # all timeline objects of a compact month have the same fields
+        has_visit = np.full(len(data), "placeVisit" in data)
+        has_activity = np.full(len(data), "activitySegment" in data)
+    else:
+        has_visit = np.fromiter(
+            ("placeVisit" in obj for obj in data["timelineObjects"]), dtype=bool)
+        has_activity = np.fromiter(
+            ("activitySegment" in obj for obj in data["timelineObjects"]), dtype=bool)
+    timeline = generate_timeline(
+        has_visit,
+        has_activity,
+        _durations(start_date, options.profiles),
+        (options.place_sampler or _alias_sampler(
+            tuple(_place_weights(year, len(places), options.profiles).tolist())),
+         _alias_sampler(tuple(activities.values()))),
+        rng
+    )
+    distances = options.distances or DistanceCache.from_places(places)
+    segment_distances = distances.lookup(timeline.locations[:-1], timeline.locations[1:])
+    columns = options.places or place_columns(places)
+    if compact:
+        fill_timeline_columns(data, timeline, columns, list(activities), segment_distances)
+    else:
+        _fill_timeline_objects(
+            data["timelineObjects"], timeline, places, list(activities),
+            segment_distances.tolist()
+        )
+    if options.points_per_km:
+        paths = interpolate_paths(
+            _segments(timeline, columns, has_activity, segment_distances), rng,
+            points_per_km=options.points_per_km)
+        if compact:
+            fill_path_columns(data, paths)
         else:
-            elements[place] = (1.0 - sum(TOP_PLACES[year]))/(NPLACES[year] - len(TOP_PLACES[year]))
+            _fill_paths(data["timelineObjects"], paths)
+
+    return data
 
-    fake = Faker()
-    if seed is not None:
-        fake.seed_instance(seed)
-    start_location = fake.random_element(elements=elements)
-    for data_unit in data["timelineObjects"]:
-        end_location = fake.random_element(elements=elements)
+
+def _segments(timeline, places, has_activity, distances):
+    """Get the activity segments of a month to interpolate paths for
+    Args:
+        timeline (Timeline): generated timestamps and place indices
+        places (PlaceColumns): fields of the places to select from, see place_columns
+        has_activity (numpy.ndarray): boolean per timeline object, True if it holds an
+            activitySegment
+        distances (numpy.ndarray): distance in meters from start to end location per timeline
+            object
+    Returns:
+        Segments: start and end location, times and distance of the activity segments, in
+            order of the timeline objects
+    """
+    start = timeline.locations[:-1][has_activity]
+    end = timeline.locations[1:][has_activity]
+    return Segments(
+        (places.latitudes[start], places.longitudes[start]),
+        (places.latitudes[end], places.longitudes[end]),
+        (timeline.activity_start[has_activity], timeline.activity_end[has_activity]),
+        distances[has_activity])
+
+
+def _fill_paths(timeline_objects, paths):
+    """ Fill the waypoints and raw path points of activity segments with interpolated paths
+    Args:
+        timeline_objects (list): GSLH timeline objects to update
+        paths (Paths): points of the activity segments, in order of the timeline objects
+    """
+    offsets = paths.offsets.tolist()
+    waypoints = [{"latE7": latitude, "lngE7": longitude} for latitude, longitude in zip(
+        paths.latitudes.tolist(), paths.longitudes.tolist())]
+    timestamps = [str(timestamp) for timestamp in paths.timestamps.tolist()]
+    accuracies = paths.accuracies.tolist()
+
+    segments = (obj["activitySegment"] for obj in timeline_objects if "activitySegment" in obj)
+    for segment, start, end in zip(segments, offsets[:-1], offsets[1:]):
+        if "waypointPath" in segment:
+            segment["waypointPath"]["waypoints"] = waypoints[start:end]
+        if "simplifiedRawPath" in segment:
+            segment["simplifiedRawPath"]["points"] = [
+                dict(waypoint, timestampMs=timestamp, accuracyMeters=accuracy)
+                for waypoint, timestamp, accuracy in zip(
+                    waypoints[start:end], timestamps[start:end], accuracies[start:end])]
+
+
+def _fill_timeline_objects(timeline_objects, timeline, places, activity_types, distances):
+    """ Fill timeline objects with the generated timestamps, places and activities
+    Args:
+        timeline_objects (list): GSLH timeline objects to update
+        timeline (Timeline): generated timestamps, place indices and activity indices
+        places (dict): places to select from
+        activity_types (list): names of the activity types
+        distances (list): distance in meters from start to end location per timeline object
+    """
+    place_ids = list(places)
+    place_values = list(places.values())
+    coordinates = [(int(place["latitude"]*1e7), int(place["longitude"]*1e7))
+                   for place in place_values]
+
+    locations = timeline.locations.tolist()
+    visit_times = zip(timeline.visit_start.tolist(), timeline.visit_end.tolist())
+    activity_times = zip(timeline.activity_start.tolist(), timeline.activity_end.tolist())
+    activities = timeline.activities.tolist()
+
+    for number, (data_unit, visit_time, activity_time) in enumerate(
+            zip(timeline_objects, visit_times, activity_times)):
+        start_location = locations[number]
+        end_location = locations[number + 1]
 
         if "placeVisit" in data_unit:
-            end_time = start_time + duration_place
-            data_unit["placeVisit"]["duration"]["startTimestampMs"] = str(int(start_time))
-            data_unit["placeVisit"]["duration"]["endTimestampMs"] = str(int(end_time))
-            data_unit["placeVisit"]["location"]["address"] = places[start_location]["address"]
-            data_unit["placeVisit"]["location"]["placeId"] = start_location
-            data_unit["placeVisit"]["location"]["name"] = places[start_location]["name"]
-            data_unit["placeVisit"]["location"]["latitudeE7"] = int(places[
-                start_location]["latitude"]*1e7)
-            data_unit["placeVisit"]["location"]["longitudeE7"] = int(places[
-                start_location]["longitude"]*1e7)
-            start_time = end_time
+            place_visit = data_unit["placeVisit"]
+            place_visit["duration"]["startTimestampMs"] = str(visit_time[0])
+            place_visit["duration"]["endTimestampMs"] = str(visit_time[1])
+            place_visit["location"]["address"] = place_values[start_location]["address"]
+            place_visit["location"]["placeId"] = place_ids[start_location]
+            place_visit["location"]["name"] = place_values[start_location]["name"]
+            place_visit["location"]["latitudeE7"] = coordinates[start_location][0]
+            place_visit["location"]["longitudeE7"] = coordinates[start_location][1]
 
         if "activitySegment" in data_unit:
-            end_time = start_time + duration_activity
-            data_unit["activitySegment"]["duration"]["startTimestampMs"] = str(int(start_time))
-            data_unit["activitySegment"]["duration"]["endTimestampMs"] = str(int(end_time))
-            data_unit["activitySegment"]['startLocation']['latitudeE7'] = int(places[
-                start_location]["latitude"]*1e7)
-            data_unit["activitySegment"]['startLocation']['longitudeE7'] = int(places[
-                start_location]["longitude"]*1e7)
-            data_unit["activitySegment"]['endLocation']['latitudeE7'] = int(places[
-                end_location]["latitude"]*1e7)
-            data_unit["activitySegment"]['endLocation']['longitudeE7'] = int(places[
-                end_location]["latitude"]*1e7)
-            data_unit["activitySegment"]["duration"]["activityType"] = fake.random_element(
-                elements=ACTIVITIES[year])
-            start = (places[start_location]["latitude"], places[start_location]["longitude"])
-            end = (places[end_location]["latitude"], places[end_location]["longitude"])
-            data_unit["activitySegment"]["distance"] = int(geodesic(start, end).m)
-            start_time = end_time
-
-        start_location = end_location
+            segment = data_unit["activitySegment"]
+            segment["duration"]["startTimestampMs"] = str(activity_time[0])
+            segment["duration"]["endTimestampMs"] = str(activity_time[1])
+            segment['startLocation']['latitudeE7'] = coordinates[start_location][0]
+            segment['startLocation']['longitudeE7'] = coordinates[start_location][1]
+            segment['endLocation']['latitudeE7'] = coordinates[end_location][0]
+            segment['endLocation']['longitudeE7'] = coordinates[end_location][1]
+            segment["duration"]["activityType"] = activity_types[activities[number]]
+            segment["distance"] = distances[number]
 
-    return data
+
+def _materialize(month_data):
+    """Get the dict of a compact month, other data as is"""
+    if isinstance(month_data, CompactMonth):
+        return month_data.to_dict()
+    return month_data
 
 
-def write_zipfile(data, zipfile):
+def _writes_directly(month_data, encoder):
+    """Check whether a month is written as JSON straight from its columns: compact months
+    with the json encoder, which writes the same JSON, or with auto, as that is fastest"""
+    return isinstance(month_data, CompactMonth) and encoder in ("json", "auto")
+
+
+def write_zipfile(data, zipfile, observer=None, options=None):
     """ Write zipfile with monthly JSON files
     Args:
-        data (dict): dict with data per year and month
+        data (dict or iterable): dict with data per year and month, or iterable of
+            ((year, month), data) pairs such as returned by iter_fake_data. Months from an
+            iterable are written as they are produced. Data that is already encoded as JSON
+            bytes is written as is, compact months are materialized when they are encoded.
         zipfile (str): name of zipfile
+        observer (callable): Optionally called with a StageEvent for the "encode", "compress"
+            and "write" stage of each month. With one thread, months are compressed a chunk
+            at a time while they are written, in the "write" stage, as are compact months
+            written straight from their columns. With more threads, those are encoded and
+            compressed in the "encode" stage.
+        options (WriteOptions): Optionally the encoder, compression and number of threads
+    Raises:
+        ValueError: if the encoder or compression is unknown, or there are no threads
     """
+    if isinstance(data, Mapping):
+        data = data.items()
+    encoder, compression, compresslevel, threads = options or WriteOptions()
+    encode = get_encoder(encoder)
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression}, choose from {list(COMPRESSIONS)}")
+    if threads < 1:
+        raise ValueError(f"Writing needs at least 1 thread, got {threads}")
+
+    def content(year, month, month_data, objects):
+        """Get the JSON of a month, or its chunks for compact months written directly"""
+        if _writes_directly(month_data, encoder):
+            return month_data.iter_json()
+        with stage(observer, "encode", year, month, objects):
+            return month_data if isinstance(month_data, bytes) else encode(
+                _materialize(month_data))
+
+    def pack(year, month, month_data, objects):
+        """Encode and compress a month in a worker thread"""
+        name = member_name(year, month)
+        if _writes_directly(month_data, encoder):
+            with stage(observer, "encode", year, month, objects):
+                zinfo, chunks = compress_member(name, month_data.iter_json(), compression,
+                                                compresslevel)
+                return zinfo, list(chunks)
+        encoded = content(year, month, month_data, objects)
+        with stage(observer, "compress", year, month, objects):
+            zinfo, chunks = compress_member(name, encoded, compression, compresslevel)
+            return zinfo, list(chunks)
+
     with ZipFile(zipfile, 'w') as zip_archive:
-        for year, month in data:
-            with zip_archive.open(
-                'Takeout/Location History/Semantic Location History/' +
-                str(year) + '/' + str(year) + '_' + month + '.json', 'w'
-            ) as file1:
-                file1.write(
-                    json.dumps(data[(year, month)]).encode('utf-8')
-                )
+        if threads == 1:
+            for (year, month), month_data in data:
+                objects = _count_objects(month_data)
+                encoded = content(year, month, month_data, objects)
+                with stage(observer, "write", year, month, objects):
+                    write_member(zip_archive, *compress_member(
+                        member_name(year, month), encoded, compression, compresslevel))
+            return
+        for (year, month), objects, packed in _pack_months(pack, data, threads):
+            with stage(observer, "write", year, month, objects):
+                write_member(zip_archive, *packed)
+
+
+def _count_objects(month_data):
+    """Get the number of timeline objects of a month, None if it is already encoded"""
+    if isinstance(month_data, bytes):
+        return None
+    if isinstance(month_data, CompactMonth):
+        return len(month_data)
+    return len(month_data.get("timelineObjects", ()))
+
+
+def _pack_months(pack, data, threads):
+    """Encode and compress months in worker threads, in order
+    Args:
+        pack (function): function encoding and compressing a month
+        data (iterable): ((year, month), data) pairs
+        threads (int): number of threads
+    Yields:
+        tuple: (year, month), number of timeline objects and the result of pack
+    """
+    # zlib, bz2 and lzma release the GIL, so members are compressed in parallel; a bounded
+    # number of months is in flight so memory does not grow with the run
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = deque()
+        for (year, month), month_data in data:
+            objects = _count_objects(month_data)
+            pending.append(((year, month), objects,
+                            executor.submit(pack, year, month, month_data, objects)))
+            if len(pending) >= 2 * threads:
+                key, objects, future = pending.popleft()
+                yield key, objects, future.result()
+        while pending:
+            key, objects, future = pending.popleft()
+            yield key, objects, future.result()
+
+
+class _Filler:
+    """Fill months with the values of Faker, or of the value pool, from the JSON schema
+    compiled for them. Factories for other places share it, so their months are filled alike.
+    """
+
+    def __init__(self, json_schema, filler):
+        """
+        Args:
+            json_schema (dict): JSON schema of a month of GSLH data
+            filler (str): "faker" to generate every filler value with Faker, or "pool" to
+                draw them from pools of pre-generated values
+        """
+        self.json_schema = json_schema
+        self._faker = Faker('nl_NL')
+        self._faker.add_provider(geo)
+        if filler == "pool":
+            self._faker = ValuePool(self._faker)
+        self._generators = {}
+        self._template = None
+
+    def _generator(self, nactivities):
+        """Get the compiled schema generating `nactivities` timeline objects"""
+        if nactivities not in self._generators:
+            self._generators[nactivities] = compile_faker_schema(
+                self.json_schema["properties"], self._faker,
+                custom=SCHEMA_TYPES,
+                iterations={"timelineObjects": nactivities})
+        return self._generators[nactivities]
+
+    def _compact_template(self):
+        """Get the template of a timeline object and its providers, see compile_template"""
+        if self._template is None:
+            self._template = compile_template(self.json_schema["properties"], custom=SCHEMA_TYPES)
+            # look up the providers before seeding, as when compiling the schema
+            for name in self._template[1]:
+                getattr(self._faker, name)
+        return self._template
+
+    def draws_columns(self):
+        """Check whether months in dicts are filled from columns drawn from the value pool at
+        once, which needs a schema with only timelineObjects, see compile_template"""
+        if not isinstance(self._faker, ValuePool):
+            return False
+        try:
+            self._compact_template()
+        except ValueError:
+            return False
+        return True
+
+    def __call__(self, nactivities, seed, compact=False):
+        """Fill a month
+        Args:
+            nactivities (int): number of timeline objects
+            seed (int): seed for Faker or the value pool
+            compact (bool): fill a CompactMonth instead of a dict
+        Returns:
+            dict or CompactMonth: GSLH data of the month
+        """
+        if compact or self.draws_columns():
+            template, providers = self._compact_template()
+            self._faker.seed_instance(seed)
+            data = CompactMonth(
+                template, generate_columns(providers, self._faker, nactivities), nactivities)
+            return data if compact else data.to_dict()
+        generate = self._generator(nactivities)
+        self._faker.seed_instance(seed)
+        return generate()
+
+
+class _MonthFactory:  # pylint: disable=too-many-instance-attributes
+    """Generate months of GSLH data from a JSON schema and a set of places.
+
+    The factory is pickled to worker processes, Faker and the compiled schemas are created
+    lazily in the process that uses them.
+    """
 
+    def __init__(self, json_schema, places, distances, options=None):
+        """
+        Args:
+            json_schema (dict): JSON schema of a month of GSLH data
+            places (dict): places to select from, as created by _create_places
+            distances (DistanceCache): distances between the places
+            options (GenerationOptions): Optionally the filler, mobility, points_per_km and
+                compact options to generate months with
+        """
+        options = options or GenerationOptions()
+        if options.filler not in FILLERS:
+            raise ValueError(f"Unknown filler {options.filler}, choose from {FILLERS}")
+        if options.mobility not in MOBILITY:
+            raise ValueError(f"Unknown mobility {options.mobility}, choose from {MOBILITY}")
+        self.json_schema = json_schema
+        self.places = places
+        self.distances = distances
+        if options.profiles is None:
+            options = options._replace(profiles=_get_profiles())
+        self.options = options
+        self._filler = None
+        self._index = None
+        self._place_columns = None
+        self._place_samplers = {}
 
-def fake_data(json_file, seed=0):
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_filler=None, _index=None, _place_columns=None, _place_samplers={})
+        return state
+
+    def with_places(self, places, distances):
+        """Get a factory for other places that shares Faker and the compiled schemas
+        Args:
+            places (dict): places to select from, as created by _create_places
+            distances (DistanceCache): distances between the places
+        Returns:
+            _MonthFactory: factory generating months with the given places
+        """
+        factory = _MonthFactory(self.json_schema, places, distances, self.options)
+        factory._filler = self.filler  # pylint: disable=protected-access
+        return factory
+
+    @property
+    def filler(self):
+        """_Filler: the filler of months, created on first use"""
+        if self._filler is None:
+            self._filler = _Filler(self.json_schema, self.options.filler)
+        return self._filler
+
+    @property
+    def place_columns(self):
+        """PlaceColumns: the fields of all places, collected on first use"""
+        if self._place_columns is None:
+            self._place_columns = place_columns(self.places)
+        return self._place_columns
+
+    def _place_sampler(self, year):
+        """Get the sampler of visited places of a year, None for independent draws"""
+        if self.options.mobility == "independent":
+            return None
+        if year not in self._place_samplers:
+            profiles = self.options.profiles
+            weights = _place_weights(
+                year, min(profiles["NPLACES"][year], len(self.places)), profiles)
+            if self.options.mobility == "markov":
+                self._place_samplers[year] = MarkovSampler(
+                    weights, len(profiles["TOP_PLACES"][year]), profiles["RETURN_HOME"][year])
+            else:
+                if self._index is None:
+                    self._index = GridIndex.from_places(self.places)
+                self._place_samplers[year] = GravitySampler(
+                    self._index, weights, anchors=len(profiles["TOP_PLACES"][year]))
+        return self._place_samplers[year]
+
+    def __call__(self, year, month, seed, observer=None):
+        """Generate a month of GSLH data
+        Args:
+            year (int): year to generate
+            month (str): name of the month to generate, as in MONTHS
+            seed (int): seed for Faker and the random generator of this month
+            observer (callable): Optionally called with a StageEvent for the "fill" and
+                "update" stage of the month
+        Returns:
+            dict or CompactMonth: GSLH data of the month
+        """
+        profiles = self.options.profiles
+        nactivities = profiles["NACTIVITIES"][year]
+        with stage(observer, "fill", year, month, nactivities):
+            data = self.filler(nactivities, seed, self.options.compact)
+        month_number = datetime.strptime(month[:3], '%b').month
+        with stage(observer, "update", year, month, nactivities):
+            return _update_data(
+                data, datetime(year, month_number, 1),
+                dict(itertools.islice(self.places.items(), profiles["NPLACES"][year])),
+                seed=seed,
+                options=_UpdateOptions(
+                    self.distances, self._place_sampler(year), self.options.points_per_km,
+                    profiles, self.place_columns)
+            )
+
+
+def _month_seed(seed, year, month):
+    """Derive an independent seed for a month from the base seed
+    Args:
+        seed (int): base seed
+        year (int): year of the month
+        month (str): name of the month, as in MONTHS
+    Returns:
+        int: seed of the month
+    """
+    sequence = np.random.SeedSequence([seed, year, MONTHS.index(month)])
+    return int(sequence.generate_state(1)[0])
+
+
+def _get_profiles():
+    """Get a copy of the year profiles of the module
+    Returns:
+        dict: value per name in PROFILES
+    """
+    return {name: copy.deepcopy(globals()[name]) for name in PROFILES}
+
+
+def _scale_profiles(years=None, activity_scale=1., place_scale=1.):
+    """Select years and scale the number of activities and places per month, in a copy of
+        the year profiles of the module
+    Args:
+        years (list): years to generate, each must have a profile
+        activity_scale (float): factor to multiply NACTIVITIES with
+        place_scale (float): factor to multiply NPLACES with
+    Returns:
+        dict: scaled value per name in PROFILES, see _get_profiles
+    Raises:
+        ValueError: if years is empty or has a year without a profile
+    """
+    profiles = _get_profiles()
+    nactivities, nplaces = profiles["NACTIVITIES"], profiles["NPLACES"]
+    if years is not None:
+        if not years:
+            raise ValueError("No years to generate")
+        missing = sorted(set(years) - set(nactivities))
+        if missing:
+            raise ValueError(f"No profile for years {missing}, choose from {sorted(nactivities)}")
+        profiles["YEARS"] = list(years)
+    for year in nactivities:
+        nactivities[year] = max(1, round(nactivities[year] * activity_scale))
+        # more places than top places, the others share the remaining probability
+        nplaces[year] = max(len(profiles["TOP_PLACES"][year]) + 1,
+                            round(nplaces[year] * place_scale))
+    return profiles
+
+
+def _profile_months(profiles):
+    """Get the (year, month) pairs of the years in year profiles, see _get_profiles"""
+    return [(year, month) for year in profiles["YEARS"] for month in profiles["MONTHS"]]
+
+
+_WORKER_FACTORY = None
+
+
+def _init_worker(factory):
+    """Store the month factory, with its year profiles, in a worker process"""
+    global _WORKER_FACTORY  # pylint: disable=global-statement
+    _WORKER_FACTORY = factory
+
+
+def _generate_month(year, month, seed, trace_memory=None):
+    """Generate a month of GSLH data in a worker process
+    Args:
+        year (int): year to generate
+        month (str): name of the month to generate
+        seed (int): seed of the month
+        trace_memory (bool): record stage events, tracing peak memory if True, or record
+            nothing if None
+    Returns:
+        tuple: GSLH data of the month and list of recorded StageEvents
+    """
+    if trace_memory is None:
+        return _WORKER_FACTORY(year, month, seed), []
+    recorder = SummaryReporter(trace_memory=trace_memory)
+    return _WORKER_FACTORY(year, month, seed, observer=recorder), recorder.events
+
+
+def _iter_months(factory, seed, jobs, observer=None, months=None):
+    """Generate months with the factory, in the current process or in worker processes
+    Args:
+        factory (_MonthFactory): factory generating the months
+        seed (int): base seed to derive the seed of each month from
+        jobs (int): number of worker processes, None for all cores
+        observer (callable): Optionally called with the StageEvents of each month. Events of
+            worker processes are passed on when their month is yielded.
+        months (list): Optionally the (year, month) pairs to generate, all months of the
+            years of the factory's profiles by default
+    Yields:
+        tuple: (year, month) and dict with GSLH data of the month, in order of months
+    """
+    if months is None:
+        months = _profile_months(factory.options.profiles)
+    if jobs == 1:
+        for year, month in months:
+            yield (year, month), factory(
+                year, month, _month_seed(seed, year, month), observer=observer)
+        return
+
+    trace_memory = None if observer is None else getattr(observer, "trace_memory", False)
+
+    def result(future):
+        data, events = future.result()
+        for event in events:
+            observer(event)
+        return data
+
+    # keep a bounded number of months in flight, so memory does not grow with the run
+    window = 2 * (jobs or os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(factory,)) as executor:
+        pending = deque()
+        for year, month in months:
+            pending.append(((year, month), executor.submit(
+                _generate_month, year, month, _month_seed(seed, year, month), trace_memory)))
+            if len(pending) >= window:
+                key, future = pending.popleft()
+                yield key, result(future)
+        while pending:
+            key, future = pending.popleft()
+            yield key, result(future)
+
+
+def iter_fake_data(json_file, seed=0, options=None, *, observer=None, months=None):
+    """Generate faked json data one month at a time
+    Args:
+        json_file: example json file with data to simulate
+        seed (int): Optionally seed Faker for reproducability
+        options (GenerationOptions): Optionally the options on how to generate months
+        observer (callable): Optionally called with a StageEvent at the end of each stage:
+            "schema", "places" and "distances" once, "fill" and "update" per month. See
+            SummaryReporter for a built-in observer.
+        months (list): Optionally the (year, month) pairs to generate, all months of the
+            years of the profiles by default. Each month has its own seed, so a month is the
+            same whichever other months are generated.
+    Yields:
+        tuple: (year, month) and dict, or CompactMonth with compact, with GSLH data of the
+            month
+    """
+    options = options or GenerationOptions()
+    factory = _create_factory(json_file, seed, options, observer)
+    yield from _iter_months(factory, seed, options.jobs, observer=observer, months=months)
+
+
+def _create_factory(json_file, seed, options, observer=None):
+    """Create the places, their distances and the JSON schema, and a month factory using them
+    Args:
+        json_file: example json file with data to simulate
+        seed (int): seed of the places
+        options (GenerationOptions): options on how to generate months
+        observer (callable): Optionally called with a StageEvent for the "places",
+            "distances" and "schema" stage
+    Returns:
+        _MonthFactory: factory generating months
+    """
+    nplaces = _profile("NPLACES", options.profiles)
+    # get dict of visited places
+    with stage(observer, "places"):
+        places = _create_places(
+            total=max(nplaces.values()), seed=seed, generator=options.place_generator)
+    with stage(observer, "distances"):
+        distances = DistanceCache.from_places(places, method=options.distance)
+
+    with stage(observer, "schema"):
+        json_schema = load_json_schema(json_file, cache_dir=options.cache_dir)
+    return _MonthFactory(json_schema, places, distances, options)
+
+
+def fake_data(json_file, seed=0, options=None, *, observer=None):
     """Return faked json data
     Args:
         json_file: example json file with data to simulate
         seed (int): Optionally seed Faker for reproducability
+        options (GenerationOptions): Optionally the options on how to generate months
+        observer (callable): Optionally called with a StageEvent at the end of each stage,
+            see iter_fake_data
     Returns:
-        dict: dict with summary and DataFrame with extracted data
+        dict: dict with GSLH data per year and month
     """
+    return dict(iter_fake_data(json_file, seed, options, observer=observer))
 
-    # get dict of visited places
-    places = _create_places(total=max(NPLACES.values()))
 
-    # Get json schema from json file
-    with open(json_file, encoding='utf8') as file_object:
-        json_data = json.load(file_object)
-        json_schema = get_json_schema(json_data)
+class LazyFakeData(Mapping):
+    """Mapping of (year, month) to GSLH data that generates a month when it is first accessed.
 
-    fake = Faker('nl_NL')
-    fake.add_provider(geo)
-    faker = FakerSchema(faker=fake, locale='nl_NL')
+    Every month has its own seed, so a month equals the month of fake_data whichever months
+    are accessed, in whatever order. The most recently accessed months are kept; months
+    are generated again after they are evicted, so changes to returned data may be lost.
+    """
 
-    faked_data = {}
-    for year in YEARS:
-        for month in MONTHS:
-            schema = get_faker_schema(
-                json_schema["properties"],
-                custom=SCHEMA_TYPES,
-                iterations={"timelineObjects": NACTIVITIES[year]})
+    def __init__(self, factory, seed, maxsize=12, observer=None):
+        """
+        Args:
+            factory (_MonthFactory): factory generating the months
+            seed (int): base seed to derive the seed of each month from
+            maxsize (int): number of most recently accessed months to keep
+            observer (callable): Optionally called with the StageEvents of each generated month
+        """
+        self._factory = factory
+        self._seed = seed
+        self._keys = _profile_months(factory.options.profiles)
+        self._key_set = set(self._keys)
+        self._months = OrderedDict()
+        self.maxsize = maxsize
+        self._observer = observer
 
-            data = faker.generate_fake(schema)
-            month_number = datetime.strptime(month[:3], '%b').month
-            seed += 1
-            json_data = _update_data(
-                data, datetime(year, month_number, 1),
-                dict(itertools.islice(places.items(), NPLACES[year])),
-                seed=seed
-            )
-            faked_data[(year, month)] = json_data
+    def __getitem__(self, key):
+        if key in self._months:
+            self._months.move_to_end(key)
+            return self._months[key]
+        if key not in self._key_set:
+            raise KeyError(key)
+        year, month = key
+        data = self._factory(
+            year, month, _month_seed(self._seed, year, month), observer=self._observer)
+        self._months[key] = data
+        if len(self._months) > self.maxsize:
+            self._months.popitem(last=False)
+        return data
+
+    def __contains__(self, key):
+        return key in self._key_set
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
 
-    return faked_data
 
+def lazy_fake_data(json_file, seed=0, options=None, *, maxsize=12, observer=None):
+    """Return faked json data that is generated per month on first access.
+        Getting one month costs the places, the schema and that month, rather than all months.
+    Args:
+        json_file: example json file with data to simulate
+        seed (int): Optionally seed Faker for reproducability
+        options (GenerationOptions): Optionally the options on how to generate months, months
+            are generated in the current process whatever the jobs
+        maxsize (int): number of most recently accessed months to keep in memory
+        observer (callable): Optionally called with a StageEvent at the end of each stage,
+            see iter_fake_data
+    Returns:
+        LazyFakeData: mapping with GSLH data per year and month, equal to fake_data
+    """
+    factory = _create_factory(json_file, seed, options or GenerationOptions(), observer)
+    return LazyFakeData(factory, seed, maxsize=maxsize, observer=observer)
+
+
+def write_resumable(json_file, zipfile, checkpoint_dir,  # pylint: disable=too-many-arguments
+                    seed=0, options=None, *, write_options=None, observer=None):
+    """Generate and write a GSLH zipfile, checkpointing every completed month.
+        Months stored in checkpoint_dir by an interrupted run with the same configuration
+        are not generated again, so a rerun writes the same months as an uninterrupted run.
+    Args:
+        json_file: example json file with data to simulate
+        zipfile (str): name of zipfile
+        checkpoint_dir (str): directory to store completed months in, see CheckpointStore
+        seed (int): Optionally seed Faker for reproducability
+        options (GenerationOptions): Optionally the options on how to generate months
+        write_options (WriteOptions): Optionally the options on how to write the months, see
+            write_zipfile
+        observer (callable): Optionally called with a StageEvent at the end of each stage,
+            see iter_fake_data and write_zipfile
+    Returns:
+        int: number of months generated by this run, the others were resumed
+    Raises:
+        ValueError: if checkpoint_dir holds months of another configuration
+    """
+    options = options or GenerationOptions()
+    write_options = write_options or WriteOptions()
+    example = content_digest(json_file).hexdigest()
+    # the number of workers and the schema cache do not change the generated months. The
+    # whitespace of the stored JSON depends on the encoder that auto picks, and on whether
+    # compact months are written straight from their columns.
+    generation = {name: value for name, value in sorted(options._asdict().items())
+                  if name not in ("jobs", "cache_dir", "profiles")}
+    profiles = options.profiles or _get_profiles()
+    store = CheckpointStore(checkpoint_dir, {
+        "seed": seed, "example": example, "encoder": resolve_encoder(write_options.encoder),
+        "profiles": profiles, "options": generation
+    })
+
+    months = _profile_months(profiles)
+    missing = [(year, month) for year, month in months if not store.done(year, month)]
+    if missing:
+        encode = get_encoder(write_options.encoder)
+        for (year, month), data in iter_fake_data(
+                json_file, seed, options, observer=observer, months=missing):
+            with stage(observer, "checkpoint", year, month, _count_objects(data)):
+                store.save(year, month, data.to_json()
+                           if _writes_directly(data, write_options.encoder)
+                           else encode(_materialize(data)))
 
-if __name__ == '__main__':
-    location_data = fake_data("test/data/2021_JANUARY.json", seed=3)
-    write_zipfile(location_data, "Location History.zip")
+    write_zipfile(((key, store.load(*key)) for key in months), zipfile, observer, write_options)
+    return len(missing)
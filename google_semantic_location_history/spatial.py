@@ -0,0 +1,183 @@
+"""Spatial index over places and distance-aware sampling of the next visited place"""
+import numpy as np
+from geopy.distance import EARTH_RADIUS
+
+from google_semantic_location_history.timeline import AliasSampler
+
+# Number of nearest places, besides the anchor places, a next place is drawn from
+GRAVITY_NEIGHBOURS = 32
+# Distance in meters over which the attraction of a place decays by a factor e
+GRAVITY_SCALE = 1000.
+
+
+class GridIndex:
+    """Grid of square cells over places, to find nearest places without computing the
+    distance to every place.
+
+    Coordinates are projected to meters around the center of the places, which is accurate
+    for places within a region such as those of _create_places.
+    """
+
+    def __init__(self, latitudes, longitudes, leaf_size=8):
+        """
+        Args:
+            latitudes (iterable): latitude per place in degrees
+            longitudes (iterable): longitude per place in degrees
+            leaf_size (int): average number of places per cell
+        """
+        latitudes = np.asarray(list(latitudes), dtype=float)
+        longitudes = np.asarray(list(longitudes), dtype=float)
+        scale = EARTH_RADIUS * 1.e3 * np.pi / 180.
+        self.x = (longitudes - longitudes.mean()) * scale * np.cos(np.radians(latitudes.mean()))
+        self.y = (latitudes - latitudes.mean()) * scale
+
+        cells = max(1, int(np.sqrt(len(latitudes) / leaf_size)))
+        self.cell_size = max(np.ptp(self.x), np.ptp(self.y), 1.) / cells
+        self._min = (self.x.min(), self.y.min())
+        columns, rows = self._cell(self.x, self.y)
+        order = np.lexsort((rows, columns))
+        keys = np.stack([columns[order], rows[order]], axis=1)
+        boundaries = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        self._cells = {
+            tuple(key): indices for key, indices in zip(
+                keys[np.r_[0, boundaries]].tolist(), np.split(order, boundaries))
+        }
+        self._rings = cells + 1
+
+    @classmethod
+    def from_places(cls, places, **kwargs):
+        """Create index for a dict of places as returned by _create_places
+        Args:
+            places (dict): places with latitude and longitude
+            **kwargs: passed on to GridIndex
+        Returns:
+            GridIndex: index of the places, in order of the dict
+        """
+        return cls([place["latitude"] for place in places.values()],
+                   [place["longitude"] for place in places.values()], **kwargs)
+
+    def __len__(self):
+        return len(self.x)
+
+    def _cell(self, x, y):
+        """Get the column and row of the cell of projected coordinates"""
+        column = np.floor((np.asarray(x) - self._min[0]) / self.cell_size).astype(np.int64)
+        row = np.floor((np.asarray(y) - self._min[1]) / self.cell_size).astype(np.int64)
+        return column, row
+
+    def _ring(self, column, row, ring):
+        """Get places in the cells at Chebyshev distance `ring` from a cell"""
+        if ring == 0:
+            keys = [(column, row)]
+        else:
+            keys = [(column + offset, row + side) for side in (-ring, ring)
+                    for offset in range(-ring, ring + 1)]
+            keys += [(column + side, row + offset) for side in (-ring, ring)
+                     for offset in range(-ring + 1, ring)]
+        return [self._cells[key] for key in keys if key in self._cells]
+
+    def distances(self, origin, indices):
+        """Get distances from a place to other places
+        Args:
+            origin (int): index of the place
+            indices (numpy.ndarray): indices of the other places
+        Returns:
+            numpy.ndarray: distances in meters
+        """
+        return np.hypot(self.x[indices] - self.x[origin], self.y[indices] - self.y[origin])
+
+    def nearest(self, origin, k, limit=None):
+        """Find the nearest places to a place, searching rings of cells around its cell
+        Args:
+            origin (int): index of the place
+            k (int): number of places to find
+            limit (int): Optionally only find places with an index below limit
+        Returns:
+            tuple: indices of at most k nearest places, not including origin, and their
+                distances in meters, nearest first
+        """
+        limit = len(self) if limit is None else limit
+        column, row = (int(value) for value in self._cell(self.x[origin], self.y[origin]))
+        found = []
+        for ring in range(self._rings + 1):
+            found.extend(self._ring(column, row, ring))
+            candidates = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+            candidates = candidates[(candidates < limit) & (candidates != origin)]
+            if len(candidates) < k:
+                continue
+            distances = self.distances(origin, candidates)
+            # places outside the searched rings are at least ring cells away
+            if np.partition(distances, k - 1)[k - 1] <= ring * self.cell_size:
+                break
+        distances = self.distances(origin, candidates)
+        nearest = np.argsort(distances, kind='stable')[:k]
+        return candidates[nearest], distances[nearest]
+
+
+class GravitySampler:
+    """Draw a sequence of places in which each next place is drawn near the current place.
+
+    The next place is drawn from the nearest places and the anchor places (such as home and
+    work, which are visited from anywhere), with a probability proportional to the weight of
+    the place times exp(-distance / scale). The distribution from each place is built on first
+    use and kept, so drawing costs constant time per step.
+    """
+
+    def __init__(self, index, weights, anchors=0, neighbours=GRAVITY_NEIGHBOURS,
+                 scale=GRAVITY_SCALE):
+        """
+        Args:
+            index (GridIndex): index of the places, or a superset starting with them
+            weights (iterable): weight per place, as for independent draws
+            anchors (int): number of first places that can always be drawn
+            neighbours (int): number of nearest places that can be drawn
+            scale (float): distance in meters over which the attraction of a place decays
+                by a factor e
+        """
+        self.index = index
+        self.weights = np.asarray(list(weights), dtype=float)
+        self.anchors = np.arange(min(anchors, len(self.weights)))
+        self.neighbours = neighbours
+        self.scale = scale
+        self._start = AliasSampler(self.weights)
+        self._rows = {}
+
+    def __len__(self):
+        return len(self.weights)
+
+    def _row(self, origin):
+        """Get candidates, alias probabilities and aliases of the next place after origin"""
+        if origin not in self._rows:
+            candidates, distances = self.index.nearest(
+                origin, self.neighbours, limit=len(self.weights))
+            anchors = self.anchors[(self.anchors != origin) &
+                                   ~np.isin(self.anchors, candidates)]
+            candidates = np.concatenate([candidates, anchors])
+            distances = np.concatenate([distances, self.index.distances(origin, anchors)])
+            if candidates.size == 0:
+                candidates, distances = np.array([origin]), np.zeros(1)
+            # relative to the nearest candidate, so far away places do not all underflow to 0
+            sampler = AliasSampler(self.weights[candidates] *
+                                   np.exp(-(distances - distances.min()) / self.scale))
+            self._rows[origin] = (
+                candidates.tolist(), sampler.probability.tolist(), sampler.alias.tolist())
+        return self._rows[origin]
+
+    def sample(self, rng, size=None):
+        """Draw a sequence of places
+        Args:
+            rng (numpy.random.Generator): random generator to draw with
+            size (int): number of places to draw, None for a single place
+        Returns:
+            numpy.ndarray or int: indices of the drawn places, in order of the visits
+        """
+        current = self._start.sample(rng)
+        if size is None:
+            return current
+        path = []
+        for column, keep in rng.random((size, 2)).tolist():
+            path.append(current)
+            candidates, probability, alias = self._row(current)
+            column = int(column * len(candidates))
+            current = candidates[column if keep < probability[column] else alias[column]]
+        return np.array(path, dtype=np.int64)
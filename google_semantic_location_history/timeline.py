@@ -0,0 +1,105 @@
+"""Vectorized generation of timestamps, places and activities for a month of GSLH data"""
+from collections import namedtuple
+
+import numpy as np
+
+Timeline = namedtuple("Timeline", [
+    "visit_start", "visit_end", "activity_start", "activity_end", "locations", "activities"
+])
+
+
+def generate_timeline(has_visit, has_activity, times, samplers, rng):
+    """Generate timestamps, place indices and activity indices for all timeline objects at once
+    Args:
+        has_visit (numpy.ndarray): boolean per timeline object, True if it holds a placeVisit
+        has_activity (numpy.ndarray): boolean per timeline object, True if it holds an
+            activitySegment
+        times (tuple): start time of the first timeline object, and durations of a place visit
+            and of an activity segment, all in milliseconds
+        samplers (tuple): AliasSampler drawing places and AliasSampler drawing activity types
+        rng (numpy.random.Generator): random generator to draw places and activities with
+    Returns:
+        Timeline: start and end times in milliseconds of place visits and activity segments,
+            indices of visited places (one more than the number of timeline objects, the
+            location of object i runs from locations[i] to locations[i + 1]), and indices of
+            activity types
+    """
+    has_visit = np.asarray(has_visit, dtype=bool)
+    has_activity = np.asarray(has_activity, dtype=bool)
+    total = len(has_visit)
+    start_time, duration_place, duration_activity = times
+    place_sampler, activity_sampler = samplers
+
+    # Each timeline object first spends time in a place and then in an activity; the running
+    # sum is accumulated sequentially so timestamps equal repeated addition of the durations.
+    steps = np.empty(2 * total + 1)
+    steps[0] = start_time
+    steps[1::2] = np.where(has_visit, duration_place, 0.)
+    steps[2::2] = np.where(has_activity, duration_activity, 0.)
+    timestamps = np.cumsum(steps).astype(np.int64)
+
+    locations = place_sampler.sample(rng, size=total + 1)
+    activities = activity_sampler.sample(rng, size=total)
+
+    return Timeline(
+        visit_start=timestamps[0:-1:2],
+        visit_end=timestamps[1::2],
+        activity_start=timestamps[1::2],
+        activity_end=timestamps[2::2],
+        locations=locations,
+        activities=activities
+    )
+
+
+def normalize_weights(weights):
+    """Scale weights to probabilities that sum to one
+    Args:
+        weights (iterable): non-negative weights
+    Returns:
+        numpy.ndarray: probabilities
+    """
+    weights = np.asarray(list(weights), dtype=float)
+    return weights / weights.sum()
+
+
+class AliasSampler:
+    """Draw indices with given weights in constant time per draw (Vose's alias method)"""
+
+    def __init__(self, weights):
+        """
+        Args:
+            weights (iterable): non-negative weight per index
+        """
+        probabilities = normalize_weights(weights)
+        scaled = probabilities * len(probabilities)
+        self.probability = np.ones(len(scaled))
+        self.alias = np.arange(len(scaled))
+
+        small = [index for index, value in enumerate(scaled.tolist()) if value < 1.]
+        large = [index for index, value in enumerate(scaled.tolist()) if value >= 1.]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.
+            if scaled[more] < 1.:
+                small.append(more)
+            else:
+                large.append(more)
+
+    def __len__(self):
+        return len(self.probability)
+
+    def sample(self, rng, size=None):
+        """Draw indices
+        Args:
+            rng (numpy.random.Generator): random generator to draw with
+            size (int): number of indices to draw, None for a single index
+        Returns:
+            numpy.ndarray or int: drawn indices
+        """
+        columns = rng.integers(len(self), size=size)
+        keep = rng.random(size=size) < self.probability[columns]
+        if size is None:
+            return int(columns if keep else self.alias[columns])
+        return np.where(keep, columns, self.alias[columns])
@@ -0,0 +1,159 @@
+"""Pools of pre-generated fake values, to quickly fill fields that only need filler data"""
+import sys
+import zlib
+import string
+import itertools
+
+import numpy as np
+
+FIRST_BLOCK_SIZE = 1024
+LETTERS = np.frombuffer(string.ascii_letters.encode('ascii'), dtype=np.uint8)
+
+
+def _pystr(rng, size, chars=20):
+    """Random strings of upper and lowercase letters, as Faker's pystr"""
+    codes = np.ascontiguousarray(LETTERS[rng.integers(len(LETTERS), size=(size, chars))])
+    return codes.view(f'S{chars}').ravel()
+
+
+def _pyint(rng, size):
+    """Random integers from 0 to 9999, as Faker's pyint"""
+    return rng.integers(0, 10000, size=size)
+
+
+def _pyfloat(rng, size):
+    """Random floats with up to 15 significant digits, as Faker's pyfloat"""
+    right_digits = rng.integers(1, sys.float_info.dig, size=size)
+    left_numbers = rng.integers(0, 10 ** (sys.float_info.dig - right_digits))
+    right_numbers = rng.integers(0, 10 ** right_digits)
+    # the fraction is written without leading zeros, like f"{left_number}.{right_number}"
+    fraction_digits = np.floor(np.log10(np.maximum(right_numbers, 1))) + 1
+    values = left_numbers + right_numbers / 10. ** fraction_digits
+    return np.where(rng.random(size) < 0.5, values, -values)
+
+
+def _random_digit_not_null(rng, size):
+    """Random digits from 1 to 9, as Faker's random_digit_not_null"""
+    return rng.integers(1, 10, size=size)
+
+
+GENERATORS = {
+    "pystr": _pystr,
+    "pyint": _pyint,
+    "pyfloat": _pyfloat,
+    "random_digit_not_null": _random_digit_not_null,
+}
+
+
+def _to_array(values):
+    """Pack a sample of values in an array, strings as utf-8 encoded bytes"""
+    kinds = {type(value) for value in values}
+    if kinds == {str}:
+        encoded = [value.encode('utf-8') for value in values]
+        # numpy strips trailing NUL bytes
+        if not any(value.endswith(b'\0') for value in encoded):
+            return np.array(encoded, dtype=bytes)
+    if kinds in ({bool}, {int}, {float}):
+        try:
+            return np.array(values, dtype=kinds.pop())
+        except OverflowError:
+            pass
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _to_python(values):
+    """Get the Python values of an array drawn from a pool"""
+    if values.dtype.kind == 'S':
+        return [value.decode('utf-8') for value in values.tolist()]
+    return values.tolist()
+
+
+class ValuePool:
+    """Fast drop-in for Faker providers that hands out values from pre-generated blocks.
+
+    Values of the providers in GENERATORS are generated with NumPy. Other providers, such as
+    company, are called a fixed number of times up front and then drawn from that sample by
+    indexing it with random integers. draw gets all values of a provider for a month as an
+    array at once; as a stand-in for a Faker instance in compile_faker_schema, values are
+    handed out one at a time from blocks drawn the same way.
+    """
+
+    def __init__(self, faker, block_size=65536, sample_size=1024):
+        """
+        Args:
+            faker (faker.Faker): Faker instance for providers that cannot be generated with NumPy
+            block_size (int): number of values to generate at once per provider
+            sample_size (int): number of values to sample from Faker per other provider
+        """
+        self._faker = faker
+        self._block_size = block_size
+        self._sample_size = sample_size
+        self._rng = np.random.default_rng()
+        self._generators = {}
+        self._values = {}
+
+    def seed_instance(self, seed=None):
+        """Seed the pool, discarding values generated so far
+        Args:
+            seed (int): seed of the random generator
+        """
+        self._rng = np.random.default_rng(seed)
+        # update in place, the functions handed out by __getattr__ refer to this dict
+        self._values.update({name: self._iterate(name) for name in self._generators})
+
+    def _iterate(self, name):
+        """Iterate over values of a provider, generating a block at a time. Blocks start small
+        and double up to the block size, so short runs do not generate unused values."""
+        generate = self._generators[name]
+        sizes = itertools.chain(
+            itertools.takewhile(lambda size: size < self._block_size,
+                                (FIRST_BLOCK_SIZE * 2 ** number for number in itertools.count())),
+            itertools.repeat(self._block_size))
+        return itertools.chain.from_iterable(
+            _to_python(generate(self._rng, size)) for size in sizes)
+
+    def _sample(self, name):
+        """Get a generator drawing from a fixed sample of values of a Faker provider"""
+        provider = getattr(self._faker, name)
+        # seed per provider, so the sample does not depend on the order providers are used in
+        self._faker.seed_instance(zlib.crc32(name.encode('utf-8')))
+        sample = _to_array([provider() for _ in range(self._sample_size)])
+
+        def generate(rng, size):
+            return sample[rng.integers(len(sample), size=size)]
+        return generate
+
+    def _generator(self, name):
+        """Get the function generating an array of values of a provider"""
+        if name not in self._generators:
+            self._generators[name] = GENERATORS.get(name) or self._sample(name)
+            self._values[name] = self._iterate(name)
+        return self._generators[name]
+
+    def draw(self, name, size):
+        """Draw values of a provider at once
+        Args:
+            name (str): name of the Faker provider
+            size (int): number of values
+        Returns:
+            numpy.ndarray: values, with strings as utf-8 encoded bytes
+        """
+        return self._generator(name)(self._rng, size)
+
+    def __getattr__(self, name):
+        """Get function returning the next value of a provider
+        Args:
+            name (str): name of the Faker provider
+        Returns:
+            function: function without arguments returning a value per call
+        """
+        if name.startswith('_'):
+            raise AttributeError(name)
+        self._generator(name)
+        values = self._values
+
+        def draw():
+            return next(values[name])
+        return draw
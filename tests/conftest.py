@@ -0,0 +1,17 @@
+import pytest
+
+from google_semantic_location_history import simulation_gslh
+
+
+@pytest.fixture(autouse=True)
+def schema_cache_dir(tmp_path, monkeypatch):
+    """Cache inferred JSON schemas in the temporary directory of each test, not in the user
+    cache directory"""
+    monkeypatch.setenv("GSLH_CACHE_DIR", str(tmp_path / "schema-cache"))
+
+
+@pytest.fixture(name="one_year")
+def fixture_one_year(monkeypatch):
+    """Generate only 2021, with 5 timeline objects per month, to keep tests of whole runs fast"""
+    monkeypatch.setattr(simulation_gslh, "YEARS", [2021])
+    monkeypatch.setitem(simulation_gslh.NACTIVITIES, 2021, 5)
@@ -0,0 +1,86 @@
+import json
+import zipfile
+import pytest
+from mock import patch
+from google_semantic_location_history.archive import (
+    COMPRESSIONS, ENCODERS, compress_member, get_encoder, member_name, resolve_encoder,
+    write_member)
+
+DATA = {"timelineObjects": [{"placeVisit": {"location": {"name": "Café/Bar", "latitudeE7": 1}}}]}
+
+
+def test_member_name():
+    assert member_name(2021, 'JANUARY') == \
+        'Takeout/Location History/Semantic Location History/2021/2021_JANUARY.json'
+
+
+@pytest.mark.parametrize("name", ["auto", *ENCODERS])
+def test_get_encoder(name):
+    encoded = get_encoder(name)(DATA)
+
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == DATA
+
+
+def test_get_encoder_unknown():
+    with pytest.raises(ValueError):
+        get_encoder("simplejson")
+    with pytest.raises(ValueError):
+        resolve_encoder("simplejson")
+
+
+def test_resolve_encoder():
+    assert resolve_encoder("auto") == next(iter(ENCODERS))
+    assert resolve_encoder("json") == "json"
+
+
+@pytest.mark.parametrize("compression", list(COMPRESSIONS))
+def test_compress_member(tmp_path, compression):
+    data = json.dumps([DATA] * 100).encode('utf-8')
+    with zipfile.ZipFile(tmp_path / "out.zip", 'w') as zip_archive:
+        write_member(zip_archive, *compress_member("a.json", data, compression))
+        write_member(zip_archive, *compress_member("b.json", data, compression, 1))
+        chunks = (data[start:start + 1000] for start in range(0, len(data), 1000))
+        write_member(zip_archive, *compress_member("c.json", chunks, compression))
+
+    with zipfile.ZipFile(tmp_path / "out.zip") as zip_archive:
+        assert zip_archive.testzip() is None
+        assert zip_archive.namelist() == ["a.json", "b.json", "c.json"]
+        assert zip_archive.getinfo("a.json").compress_type == COMPRESSIONS[compression]
+        assert zip_archive.read("b.json") == data
+        assert zip_archive.read("c.json") == data
+        assert zip_archive.getinfo("c.json").CRC == zip_archive.getinfo("a.json").CRC
+
+
+@pytest.mark.parametrize("compression", list(COMPRESSIONS))
+def test_compress_member_streamed(tmp_path, compression):
+    data = json.dumps([DATA] * 100).encode('utf-8')
+    consumed = []
+
+    def chunks():
+        for start in range(0, len(data), 1000):
+            consumed.append(start)
+            yield data[start:start + 1000]
+
+    with patch("google_semantic_location_history.archive.CHUNK_SIZE", 500):
+        zinfo, compressed = compress_member("a.json", data, compression)
+        assert zinfo.file_size == 0
+        compressed = list(compressed)
+    assert zinfo.file_size == len(data)
+    assert zinfo.compress_size == sum(len(chunk) for chunk in compressed)
+    if compression == "stored":
+        assert len(compressed) == -(-len(data) // 500)
+    zinfo, compressed = compress_member("b.json", chunks(), compression)
+    assert not consumed
+    with zipfile.ZipFile(tmp_path / "out.zip", 'w') as zip_archive:
+        write_member(zip_archive, zinfo, compressed)
+    assert consumed == list(range(0, len(data), 1000))
+
+    with zipfile.ZipFile(tmp_path / "out.zip") as zip_archive:
+        assert zip_archive.testzip() is None
+        assert zip_archive.read("b.json") == data
+
+
+def test_compress_member_unknown():
+    with pytest.raises(ValueError):
+        compress_member("a.json", b"{}", "zstd")
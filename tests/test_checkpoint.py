@@ -0,0 +1,22 @@
+import pytest
+from google_semantic_location_history.checkpoint import CheckpointStore
+
+
+def test_checkpoint_store(tmp_path):
+    store = CheckpointStore(tmp_path, {"seed": 1})
+    assert not store.done(2021, 'JANUARY')
+
+    store.save(2021, 'JANUARY', b'{"timelineObjects": []}')
+    assert store.done(2021, 'JANUARY')
+    assert store.load(2021, 'JANUARY') == b'{"timelineObjects": []}'
+    assert CheckpointStore(tmp_path, {"seed": 1}).done(2021, 'JANUARY')
+
+    (tmp_path / "2021_JANUARY.json").write_bytes(b'{"timelineObj')
+    assert not store.done(2021, 'JANUARY')
+
+
+def test_checkpoint_store_other_config(tmp_path):
+    CheckpointStore(tmp_path, {"seed": 1})
+
+    with pytest.raises(ValueError):
+        CheckpointStore(tmp_path, {"seed": 2})
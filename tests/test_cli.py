@@ -0,0 +1,83 @@
+import json
+import pytest
+from zipfile import ZipFile
+from google_semantic_location_history.cli import main
+from google_semantic_location_history.export import load_columns
+from google_semantic_location_history.simulation_gslh import (
+    NACTIVITIES, NPLACES, _scale_profiles)
+from mock import patch
+
+
+def test_main(tmp_path):
+    arguments = ["tests/data/2021_JANUARY.json", "--seed", "2", "--start-year", "2021",
+                 "--end-year", "2021", "--activity-scale", "0.02", "--place-scale", "0.1",
+                 "--stream", "--filler", "pool", "--cache-dir", str(tmp_path),
+                 "--place-generator", "bulk"]
+    output = tmp_path / "out.zip"
+    main(arguments + ["-o", str(output), "--columns", str(tmp_path / "columns"),
+                      "--pipeline", "2"])
+
+    # the profiles of the module are not scaled, so scales do not compound over runs
+    assert NACTIVITIES[2021] == 250
+    assert NPLACES[2021] == 20
+    with ZipFile(output) as zip_archive:
+        names = zip_archive.namelist()
+        data = json.loads(zip_archive.read(names[0]))
+    assert len(names) == 12
+    assert names[0] == 'Takeout/Location History/Semantic Location History/2021/2021_JANUARY.json'
+    assert len(data['timelineObjects']) == 5
+    assert len({place["placeVisit"]["location"]["placeId"] for place in data['timelineObjects']
+                if "placeVisit" in place}) <= 4
+    tables = load_columns(tmp_path / "columns")
+    assert len(tables["visits"]["placeId"]) == len(tables["segments"]["distance"]) == 12 * 5
+
+    main(arguments + ["-o", str(tmp_path / "again.zip")])
+    with ZipFile(output) as zip_archive, ZipFile(tmp_path / "again.zip") as again:
+        assert again.read(names[0]) == zip_archive.read(names[0])
+
+
+@patch('google_semantic_location_history.cli.write_resumable')
+def test_main_checkpoint(resumable, tmp_path):
+    main(["tests/data/2021_JANUARY.json", "-o", str(tmp_path / "out.zip"),
+          "--checkpoint-dir", str(tmp_path), "--compression", "lzma", "--mobility", "markov"])
+
+    args = resumable.call_args.args
+    assert args[:4] == (
+        "tests/data/2021_JANUARY.json", str(tmp_path / "out.zip"), str(tmp_path), 0)
+    assert args[4].mobility == "markov"
+    assert args[4].compact
+    assert args[4].profiles["YEARS"] == [2019, 2020, 2021]
+    assert resumable.call_args.kwargs["write_options"].compression == "lzma"
+
+    with pytest.raises(SystemExit):
+        main(["tests/data/2021_JANUARY.json", "--checkpoint-dir", str(tmp_path),
+              "--columns", str(tmp_path / "columns")])
+    with pytest.raises(SystemExit):
+        main(["tests/data/2021_JANUARY.json", "--checkpoint-dir", str(tmp_path),
+              "--pipeline", "2"])
+
+
+def test_main_threads(tmp_path):
+    for threads in ["0", "-1"]:
+        with pytest.raises(SystemExit):
+            main(["tests/data/2021_JANUARY.json", "-o", str(tmp_path / "out.zip"),
+                  "--threads", threads])
+    assert not (tmp_path / "out.zip").exists()
+
+
+@patch('google_semantic_location_history.simulation_gslh.YEARS', [2019, 2020, 2021])
+def test_main_unknown_year(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["tests/data/2021_JANUARY.json", "-o", str(tmp_path / "out.zip"), "--end-year", "2030"])
+
+
+def test_main_empty_years(tmp_path):
+    output = tmp_path / "out.zip"
+    with pytest.raises(SystemExit):
+        main(["tests/data/2021_JANUARY.json", "-o", str(output), "--start-year", "2022"])
+    with pytest.raises(SystemExit):
+        main(["tests/data/2021_JANUARY.json", "-o", str(output), "--start-year", "2021",
+              "--end-year", "2020"])
+    assert not output.exists()
+    with pytest.raises(ValueError):
+        _scale_profiles([])
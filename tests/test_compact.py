@@ -0,0 +1,128 @@
+import json
+import pickle
+import numpy as np
+import pytest
+from faker import Faker
+from mock import Mock
+from google_semantic_location_history.compact import (
+    Column, CompactMonth, compile_template, generate_columns
+)
+from google_semantic_location_history.get_faker_schema import compile_faker_schema
+from google_semantic_location_history.paths import Paths
+from google_semantic_location_history.value_pool import ValuePool
+
+SCHEMA = {"timelineObjects": {"type": "array", "items": {"type": "object", "properties": {
+    "placeVisit": {"type": "object", "properties": {
+        "name": {"type": "string"},
+        "centerLatE7": {"type": "integer"},
+        "duration": {"type": "object", "properties": {"startTimestampMs": {"type": "string"}}},
+        "otherCandidateLocations": {"type": "array", "items": {"type": "object", "properties": {
+            "confidence": {"type": "number"}}}},
+    }},
+}}}}
+
+
+def test_compact_month():
+    template, providers = compile_template(SCHEMA, custom={"name": "company"})
+    assert providers == ["company", "pyint", "pystr", "pyfloat"]
+
+    faker = Faker('nl_NL')
+    faker.seed_instance(1)
+    month = CompactMonth(template, generate_columns(providers, faker, 5), 5)
+    faker.seed_instance(1)
+    expected = compile_faker_schema(
+        SCHEMA, faker, custom={"name": "company"}, iterations={"timelineObjects": 5})()
+
+    assert len(month) == 5
+    assert "placeVisit" in month
+    assert [column.kind for column in month.columns] == ["bytes", "array", "bytes", "array"]
+    assert month.to_dict() == expected
+    assert pickle.loads(pickle.dumps(month)).to_dict() == expected
+
+    month.set_field(("placeVisit", "centerLatE7"), Column("array", np.arange(5)))
+    month.set_field(("placeVisit", "duration", "endTimestampMs"), Column("text", np.arange(5)))
+    month.set_field(("placeVisit", "otherCandidateLocations"),
+                    Column("lookup", np.array([1, 0, 1, 0, 1]), [[], ["a"]]))
+    assert month.has_field(("placeVisit", "duration", "endTimestampMs"))
+    assert not month.has_field(("placeVisit", "address"))
+    assert not month.has_field(("activitySegment", "distance"))
+    with pytest.raises(KeyError):
+        month.set_field(("activitySegment", "distance"), Column("array", np.arange(5)))
+
+    result = month.to_dict()["timelineObjects"]
+    assert [item["placeVisit"]["centerLatE7"] for item in result] == [0, 1, 2, 3, 4]
+    assert result[3]["placeVisit"]["duration"] == {
+        "startTimestampMs": expected["timelineObjects"][3]["placeVisit"]["duration"][
+            "startTimestampMs"],
+        "endTimestampMs": "3"}
+    assert result[1]["placeVisit"]["otherCandidateLocations"] == []
+    assert result[0]["placeVisit"]["name"] == expected["timelineObjects"][0]["placeVisit"]["name"]
+    assert month.field(("placeVisit", "centerLatE7")).data.tolist() == [0, 1, 2, 3, 4]
+    assert month.field(("placeVisit", "duration")).data == [
+        item["placeVisit"]["duration"] for item in result]
+    assert month.field(("placeVisit", "address")) is None
+
+
+@pytest.mark.parametrize("values, kind", [
+    (["é", "ab"], "bytes"), (["a\0", "b"], "list"), ([1.5, -2.], "array"), ([1, 2], "array"),
+    ([2 ** 70, 1], "list"), ([True, False], "array"), ([1, 1.5], "list"), ([None, "a"], "list"),
+])
+def test_generate_columns_types(values, kind):
+    # more values than a block, so blocks are concatenated
+    values = values * 300
+    template, _ = compile_template({"timelineObjects": {"type": "array", "items": {
+        "type": "object", "properties": {"value": {"type": "string"}}}}})
+    faker = Mock(pystr=Mock(side_effect=values))
+
+    column, = generate_columns(["pystr"], faker, len(values))
+    assert column.kind == kind
+    month = CompactMonth(template, [column], len(values))
+    assert month.to_dict() == {"timelineObjects": [{"value": value} for value in values]}
+    assert month.to_json() == json.dumps(month.to_dict()).encode('utf-8')
+
+
+def test_generate_columns_pool():
+    template, providers = compile_template(SCHEMA, custom={"name": "company"})
+    providers = providers + ["pystr"]
+    pool = ValuePool(Faker('nl_NL'))
+
+    pool.seed_instance(1)
+    columns = generate_columns(providers, pool, 5)
+    assert [column.kind for column in columns] == ["bytes", "array", "bytes", "array", "bytes"]
+    assert all(len(column.data) == 5 for column in columns)
+    # the values of slots of the same provider are taken in turn
+    pool.seed_instance(1)
+    assert pool.draw("company", 5).tolist() == columns[0].data.tolist()
+    assert pool.draw("pyint", 5).tolist() == columns[1].data.tolist()
+    strings = pool.draw("pystr", 10).tolist()
+    assert columns[2].data.tolist() == strings[0::2]
+    assert columns[4].data.tolist() == strings[1::2]
+    month = CompactMonth(template, columns[:4], 5)
+    assert month.to_json() == json.dumps(month.to_dict()).encode('utf-8')
+    assert all(len(column.data) == 0 for column in generate_columns(providers, pool, 0))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 256])
+def test_compact_month_json(chunk_size):
+    template = {"a%s": {}, "b": [None, "%d"]}
+    month = CompactMonth(template, [], 3)
+    assert b"".join(month.iter_json(chunk_size)) == json.dumps(month.to_dict()).encode('utf-8')
+
+    template, providers = compile_template(SCHEMA)
+    month = CompactMonth(template, [Column("list", [1] * 3)] * len(providers), 3)
+    month.set_field(("placeVisit", "centerLatE7"), Column("array", np.array([1.5, np.nan, -np.inf])))
+    # the unused table entry is not written
+    month.set_field(("placeVisit", "name"),
+                    Column("lookup", np.array([0, 2, 0]), ["é", object(), ["x"]]))
+    paths = Paths(offsets=np.array([0, 2, 2, 3]), latitudes=np.arange(3), longitudes=np.arange(3),
+                  timestamps=np.arange(3), accuracies=np.ones(3, dtype=np.int64))
+    month.set_field(("placeVisit", "waypoints"), Column("waypoints", paths))
+    month.set_field(("placeVisit", "points"), Column("points", paths))
+    month.set_field(("placeVisit", "duration", "startTimestampMs"), Column("text", np.arange(3)))
+    assert b"".join(month.iter_json(chunk_size)) == json.dumps(month.to_dict()).encode('utf-8')
+    assert CompactMonth(month.template, month.columns, 0).to_json() == b'{"timelineObjects": []}'
+
+
+def test_compile_template_other_keys():
+    with pytest.raises(ValueError):
+        compile_template({"other": {"type": "string"}})
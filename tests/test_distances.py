@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+from google_semantic_location_history.distances import DistanceCache, haversine
+
+LATITUDES = [51.45581, 51.463845, 52.0907, 51.45581]
+LONGITUDES = [5.550007, 5.4707, 5.1214, 5.550007]
+
+
+def test_haversine():
+    result = haversine([51.45581], [5.550007], [52.0907], [5.1214])
+    expected = geodesic((51.45581, 5.550007), (52.0907, 5.1214)).m
+    assert result[0] == pytest.approx(expected, rel=5e-3)
+
+
+def test_distance_cache_geodesic():
+    cache = DistanceCache(LATITUDES, LONGITUDES)
+    result = cache.lookup([0, 1, 2, 3], [1, 0, 0, 0])
+
+    assert cache.dense
+    assert result.tolist() == [5583, 5583, int(geodesic((52.0907, 5.1214), (51.45581, 5.550007)).m), 0]
+
+
+@pytest.mark.parametrize("method", ["geodesic", "haversine"])
+def test_distance_cache_lazy(method):
+    dense = DistanceCache(LATITUDES, LONGITUDES, method=method)
+    lazy = DistanceCache(LATITUDES, LONGITUDES, method=method, dense_limit=0)
+    start = np.array([0, 1, 2, 3, 2, 1, 1])
+    end = np.array([1, 0, 0, 0, 3, 2, 1])
+
+    assert not lazy.dense
+    assert lazy.lookup(start, end).tolist() == dense.lookup(start, end).tolist()
+    assert lazy.lookup(end, start).tolist() == dense.lookup(start, end).tolist()
+
+
+def test_distance_cache_from_places():
+    places = {
+        'b1-5003748L': {'name': 'Reimes BV', 'address': '', 'latitude': 51.45581, 'longitude': 5.550007},
+        'V1-2419116P': {'name': 'Medtronic', 'address': '', 'latitude': 51.463845, 'longitude': 5.4707}
+    }
+    cache = DistanceCache.from_places(places, method="haversine")
+
+    assert len(cache) == 2
+    assert cache.method == "haversine"
+
+
+def test_distance_cache_unknown_method():
+    with pytest.raises(ValueError):
+        DistanceCache(LATITUDES, LONGITUDES, method="manhattan")
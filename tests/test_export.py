@@ -0,0 +1,80 @@
+import json
+import numpy as np
+import pytest
+from mock import patch
+from google_semantic_location_history.export import (
+    ColumnWriter, compact_columns, write_columns, load_columns, TABLES
+)
+from google_semantic_location_history.instrumentation import SummaryReporter
+from google_semantic_location_history.reader import to_columns
+from google_semantic_location_history.simulation_gslh import GenerationOptions, fake_data
+
+
+@pytest.fixture(name="data")
+def fixture_data():
+    with open("tests/data/2021_JANUARY.json", encoding='utf-8') as file_object:
+        timeline_objects = json.load(file_object)["timelineObjects"]
+    return {(2021, 'JANUARY'): {"timelineObjects": timeline_objects[:100]},
+            (2021, 'FEBRUARY'): {"timelineObjects": []},
+            (2021, 'MARCH'): {"timelineObjects": timeline_objects[100:]}}
+
+
+@pytest.mark.parametrize("file_format", ["npy", "npz"])
+def test_write_columns(tmp_path, data, file_format):
+    reporter = SummaryReporter()
+    write_columns(data, tmp_path, reporter, file_format=file_format)
+
+    tables = load_columns(tmp_path)
+    expected = to_columns(
+        [item for month_data in data.values() for item in month_data["timelineObjects"]])
+    for table, columns in TABLES.items():
+        assert list(tables[table]) == columns
+        for column in columns:
+            np.testing.assert_array_equal(tables[table][column], expected[table][column])
+    assert reporter.summary()["columns"]["count"] == 3
+    assert reporter.summary()["export"]["count"] == 1
+
+
+def test_column_writer(tmp_path, data):
+    writer = ColumnWriter()
+    months = list(writer.collect(iter(data.items())))
+    assert months == list(data.items())
+    writer.add(2021, 'APRIL', json.dumps(data[(2021, 'MARCH')]).encode('utf-8'))
+
+    tables = writer.tables()
+    segments = to_columns(data[(2021, 'MARCH')]["timelineObjects"])["segments"]
+    assert len(tables["segments"]["distance"]) == 2 * len(segments["distance"]) + len(
+        to_columns(data[(2021, 'JANUARY')]["timelineObjects"])["segments"]["distance"])
+
+    writer.write(tmp_path)
+    assert isinstance(load_columns(tmp_path)["visits"]["latitudeE7"], np.memmap)
+    with pytest.raises(ValueError):
+        writer.write(tmp_path, "csv")
+
+
+def test_column_writer_empty(tmp_path):
+    ColumnWriter().write(tmp_path, "npz")
+
+    tables = load_columns(tmp_path)
+    assert tables["visits"]["startTimestampMs"].dtype == np.int64
+    assert len(tables["segments"]["activityType"]) == 0
+
+
+@pytest.mark.parametrize("options", [{}, {"filler": "pool", "points_per_km": 2.}])
+@patch('google_semantic_location_history.simulation_gslh.YEARS', [2021])
+@patch.dict('google_semantic_location_history.simulation_gslh.NACTIVITIES', {2021: 20})
+def test_compact_columns(options):
+    months = fake_data("tests/data/2021_JANUARY.json", seed=3,
+                       options=GenerationOptions(compact=True, **options))
+
+    for month in months.values():
+        tables = compact_columns(month)
+        expected = to_columns(month.iter_timeline_objects())
+        for table, columns in TABLES.items():
+            for column in columns:
+                assert tables[table][column].tolist() == expected[table][column].tolist()
+        visits, segments = tables["visits"], tables["segments"]
+        # each segment ends where the next object's visit is
+        assert segments["endLatitudeE7"][:-1].tolist() == visits["latitudeE7"][1:].tolist()
+        assert segments["endLongitudeE7"][:-1].tolist() == visits["longitudeE7"][1:].tolist()
+        assert segments["startLongitudeE7"].tolist() == visits["longitudeE7"].tolist()
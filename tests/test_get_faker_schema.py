@@ -1,6 +1,16 @@
 import json
+import hashlib
+import pytest
 
-from google_semantic_location_history.get_faker_schema import get_json_schema, get_faker_schema
+from faker import Faker
+from faker_schema.faker_schema import FakerSchema
+from mock import patch
+
+from google_semantic_location_history.get_faker_schema import (
+    get_json_schema, get_faker_schema, compile_faker_schema, load_json_schema,
+    clear_schema_cache, get_schema_cache_dir, get_archive_schema, content_digest)
+from google_semantic_location_history.simulation_gslh import (
+    GenerationOptions, fake_data, write_zipfile)
 
 
 GSLH_JSON_SCHEMA = {
@@ -508,4 +518,155 @@ def test_get_json_schema():
 
 def test_get_faker_schema():
     schema = get_faker_schema(GSLH_JSON_SCHEMA["properties"])
-    assert schema == GSLH_FAKER_SCHEMA
\ No newline at end of file
+    assert schema == GSLH_FAKER_SCHEMA
+
+def test_compile_faker_schema():
+    custom = {'name': 'company', 'visitConfidence': 'random_digit_not_null'}
+    iterations = {'timelineObjects': 3}
+    fake = Faker('nl_NL')
+    generate = compile_faker_schema(
+        GSLH_JSON_SCHEMA["properties"], fake, custom=custom, iterations=iterations)
+
+    fake.seed_instance(1)
+    result = generate()
+    fake.seed_instance(1)
+    expected = FakerSchema(faker=fake).generate_fake(
+        get_faker_schema(GSLH_JSON_SCHEMA["properties"], custom=custom, iterations=iterations))
+
+    assert result == expected
+    assert len(result['timelineObjects']) == 3
+    assert generate() != result
+
+
+def test_load_json_schema(tmp_path):
+    json_file = tmp_path / "example.json"
+    json_file.write_text('{"timelineObjects": [{"placeVisit": {"placeId": "abc"}}]}')
+    cache_dir = tmp_path / "cache"
+
+    schema = load_json_schema(json_file, cache_dir=cache_dir)
+    assert schema == get_json_schema(json.loads(json_file.read_text()))
+    assert len(list(cache_dir.iterdir())) == 1
+
+    with patch('google_semantic_location_history.get_faker_schema.get_json_schema') as inferred:
+        inferred.return_value = {}
+        assert load_json_schema(json_file, cache_dir=cache_dir) == schema
+        inferred.assert_not_called()
+
+        json_file.write_text('{"timelineObjects": []}')
+        load_json_schema(json_file, cache_dir=cache_dir)
+        inferred.assert_called_once()
+
+    assert clear_schema_cache(cache_dir) == 2
+    assert clear_schema_cache(cache_dir) == 0
+
+
+def test_load_json_schema_refresh(tmp_path):
+    json_file = tmp_path / "example.json"
+    json_file.write_text('{"timelineObjects": []}')
+
+    load_json_schema(json_file, cache_dir=tmp_path)
+    with patch('google_semantic_location_history.get_faker_schema.get_json_schema') as inferred:
+        inferred.return_value = {}
+        assert load_json_schema(json_file, cache_dir=tmp_path, refresh=True) == {}
+        assert load_json_schema(json_file, cache_dir=tmp_path) == {}
+
+
+def test_get_schema_cache_dir(tmp_path):
+    assert get_schema_cache_dir(tmp_path) == str(tmp_path)
+    with patch.dict('os.environ', {'GSLH_CACHE_DIR': 'gslh_cache'}):
+        assert get_schema_cache_dir() == 'gslh_cache'
+
+
+def test_get_archive_schema(tmp_path):
+    with open("tests/data/2021_JANUARY.json") as file_object:
+        timeline_objects = json.load(file_object)["timelineObjects"]
+    data = {
+        (2020, 'MARCH'): {"timelineObjects": timeline_objects[:100]},
+        (2020, 'APRIL'): {"timelineObjects": []},
+        (2021, 'JANUARY'): {"timelineObjects": timeline_objects[100:] + [{"extra": 1}]},
+    }
+    write_zipfile(data, tmp_path / "takeout.zip")
+    expected = get_json_schema({"timelineObjects": timeline_objects + [{"extra": 1}]})
+
+    assert get_archive_schema(tmp_path / "takeout.zip") == expected
+    assert get_archive_schema(str(tmp_path / "takeout.zip"), jobs=2) == expected
+    assert get_archive_schema(tmp_path / "takeout.zip", sample=100) == get_json_schema(
+        {"timelineObjects": timeline_objects[:100] + timeline_objects[100:200]})
+
+
+def test_load_json_schema_archive(tmp_path):
+    folder = tmp_path / "Semantic Location History" / "2021"
+    folder.mkdir(parents=True)
+    (folder / "2021_JANUARY.json").write_text('{"timelineObjects": [{"placeVisit": {}}]}')
+    (folder / "2021_MARCH.json").write_text('{"timelineObjects": [{"activitySegment": {}}]}')
+    digest = content_digest(tmp_path).hexdigest()
+
+    schema = load_json_schema(tmp_path, cache_dir=tmp_path / "cache")
+    assert set(schema["properties"]["timelineObjects"]["items"]["properties"]) == {
+        "placeVisit", "activitySegment"}
+    with patch('google_semantic_location_history.get_faker_schema.get_archive_schema') \
+            as inferred:
+        inferred.return_value = {}
+        assert load_json_schema(tmp_path, cache_dir=tmp_path / "cache") == schema
+        assert load_json_schema(tmp_path, cache_dir=tmp_path / "cache", sample=1) == {}
+        inferred.assert_called_once_with(tmp_path, sample=1, jobs=1)
+
+    (folder / "2021_MARCH.json").write_text('{"timelineObjects": []}')
+    assert content_digest(tmp_path).hexdigest() != digest
+
+
+@pytest.mark.usefixtures("one_year")
+def test_mixed_type_archive(tmp_path):
+    with open("tests/data/2021_JANUARY.json") as file_object:
+        timeline_objects = json.load(file_object)["timelineObjects"][:20]
+    changed = json.loads(json.dumps(timeline_objects))
+    for timeline_object in changed:
+        if "placeVisit" in timeline_object:
+            location = timeline_object["placeVisit"]["location"]
+            location["semanticType"] = str(location["latitudeE7"])
+            location["latitudeE7"] = str(location["latitudeE7"])
+            location["isHome"] = None
+            location["sourceInfo"] = {"deviceTag": None}
+    for timeline_object in timeline_objects:
+        if "placeVisit" in timeline_object:
+            timeline_object["placeVisit"]["location"].update(
+                semanticType=None, isHome=True, sourceInfo=None)
+    write_zipfile({(2021, 'JANUARY'): {"timelineObjects": timeline_objects},
+                   (2021, 'FEBRUARY'): {"timelineObjects": changed}}, tmp_path / "takeout.zip")
+
+    schema = get_archive_schema(tmp_path / "takeout.zip")
+    location = schema["properties"]["timelineObjects"]["items"]["properties"]["placeVisit"][
+        "properties"]["location"]["properties"]
+    assert location["latitudeE7"]["type"] == ["integer", "string"]
+    assert location["semanticType"]["type"] == ["null", "string"]
+
+    fake = Faker('nl_NL')
+    fake.seed_instance(1)
+    result = compile_faker_schema(schema["properties"], fake)()
+    fake.seed_instance(1)
+    assert result == FakerSchema(faker=fake).generate_fake(
+        get_faker_schema(schema["properties"]))
+    generated = result["timelineObjects"][0]["placeVisit"]["location"]
+    assert isinstance(generated["latitudeE7"], int)
+    assert isinstance(generated["semanticType"], str)
+    assert isinstance(generated["isHome"], bool)
+    assert generated["sourceInfo"] == {}
+
+    for compact in (False, True):
+        months = fake_data(str(tmp_path / "takeout.zip"), seed=1,
+                           options=GenerationOptions(compact=compact))
+        assert len(months) == 12
+
+
+@patch('google_semantic_location_history.get_faker_schema.CHUNK_SIZE', 1000)
+def test_content_digest(tmp_path):
+    with open("tests/data/2021_JANUARY.json", 'rb') as file_object:
+        content = file_object.read()
+    assert content_digest("tests/data/2021_JANUARY.json").digest() == \
+        hashlib.sha256(content).digest()
+
+    folder = tmp_path / "Semantic Location History" / "2021"
+    folder.mkdir(parents=True)
+    (folder / "2021_JANUARY.json").write_bytes(content)
+    expected = hashlib.sha256(b"2021_JANUARY" + hashlib.sha256(content).digest())
+    assert content_digest(tmp_path).digest() == expected.digest()
@@ -0,0 +1,92 @@
+import threading
+import tracemalloc
+import pytest
+from google_semantic_location_history.instrumentation import SummaryReporter, StageEvent, stage
+
+
+def test_stage_disabled():
+    with stage(None, "fill", 2020, "MARCH") as counts:
+        counts["objects"] = 3
+
+
+def test_stage():
+    reporter = SummaryReporter()
+    with stage(reporter, "fill", 2020, "MARCH", objects=3):
+        sum(range(1000))
+    with stage(reporter, "write", 2020, "MARCH") as counts:
+        counts["objects"] = 5
+
+    assert [event.stage for event in reporter.events] == ["fill", "write"]
+    assert reporter.events[0].year == 2020
+    assert reporter.events[0].month == "MARCH"
+    assert reporter.events[0].objects == 3
+    assert reporter.events[1].objects == 5
+    assert reporter.events[0].wall_time >= 0
+    assert reporter.events[0].cpu_time >= 0
+    assert reporter.events[0].peak_memory is None
+    assert reporter.events[0].queued is None
+
+
+def test_stage_trace_memory():
+    reporter = SummaryReporter(trace_memory=True)
+    with stage(reporter, "fill"):
+        data = [str(number) for number in range(10000)]
+
+    assert len(data) == 10000
+    assert reporter.events[0].peak_memory > 100000
+
+
+def test_stage_threads():
+    reporter = SummaryReporter(trace_memory=True)
+    started = threading.Event()
+
+    def busy():
+        with stage(reporter, "busy"):
+            started.set()
+            for _ in range(200):
+                sum(range(1000))
+
+    thread = threading.Thread(target=busy)
+    thread.start()
+    started.wait()
+    with stage(reporter, "wait"):
+        thread.join()
+
+    events = {event.stage: event for event in reporter.events}
+    assert events["wait"].wall_time > 0
+    # only the CPU time of the waiting thread counts, not that of the busy thread
+    assert events["busy"].cpu_time > 0
+    assert events["wait"].cpu_time < events["busy"].cpu_time / 2
+    assert events["busy"].peak_memory is not None
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_error():
+    reporter = SummaryReporter(trace_memory=True)
+    with pytest.raises(ValueError):
+        with stage(reporter, "fill"):
+            raise ValueError
+    assert not tracemalloc.is_tracing()
+
+
+def test_summary_reporter():
+    reporter = SummaryReporter()
+    reporter(StageEvent("fill", 2020, "MARCH", 1., 0.5, 10, None))
+    reporter(StageEvent("fill", 2020, "APRIL", 2., 1.5, 20, None))
+    reporter(StageEvent("write", 2020, "APRIL", 0.5, 0.25, 20, 2000000))
+    reporter(StageEvent("dequeue", None, None, 0.25, 0., None, None, 3))
+    reporter(StageEvent("dequeue", None, None, 0.25, 0., None, None, 0))
+
+    assert reporter.summary() == {
+        "fill": {"count": 2, "wall_time": 3., "cpu_time": 2., "objects": 30, "peak_memory": None,
+                 "queued": None},
+        "write": {"count": 1, "wall_time": 0.5, "cpu_time": 0.25, "objects": 20,
+                  "peak_memory": 2000000, "queued": None},
+        "dequeue": {"count": 2, "wall_time": 0.5, "cpu_time": 0., "objects": 0,
+                    "peak_memory": None, "queued": 1.5}
+    }
+    lines = reporter.report().splitlines()
+    assert len(lines) == 4
+    assert lines[1].split() == ["fill", "2", "3.000", "2.000", "30"]
+    assert lines[2].split() == ["write", "1", "0.500", "0.250", "20", "2.0"]
+    assert lines[3].split() == ["dequeue", "2", "0.500", "0.000", "0", "1.5"]
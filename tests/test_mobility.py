@@ -0,0 +1,37 @@
+import numpy as np
+from google_semantic_location_history.mobility import OTHER, MarkovSampler
+
+WEIGHTS = [0.4, 0.3, 0.05] + [0.25 / 7] * 7
+
+
+def test_markov_sampler_table():
+    sampler = MarkovSampler(WEIGHTS, anchors=3, return_home=0.5)
+    matrix = sampler.transition_matrix()
+
+    assert len(sampler) == 10
+    assert sampler.transitions.indptr.tolist() == [0, 3, 6, 9, 13]
+    assert OTHER in sampler.transitions.targets.tolist()
+    assert np.allclose(matrix.sum(axis=1), 1.)
+    assert np.allclose(np.diag(matrix)[:3], 0.)
+    assert np.allclose(matrix[0, :3], [0., 0.3 / 0.6, 0.05 / 0.6])
+    assert np.allclose(matrix[1:, 0], [0.5 + 0.5 * 0.4 / 0.7, 0.5 + 0.5 * 0.4 / 0.95] +
+                       [0.5 + 0.5 * 0.4] * 7)
+    assert np.allclose(matrix[5], matrix[9])
+
+
+def test_markov_sampler_sample():
+    sampler = MarkovSampler(WEIGHTS, anchors=3, return_home=0.5)
+    path = sampler.sample(np.random.default_rng(1), size=50000)
+
+    assert np.array_equal(path, sampler.sample(np.random.default_rng(1), size=50000))
+    assert isinstance(sampler.sample(np.random.default_rng(1)), int)
+    counts = np.zeros((10, 10))
+    np.add.at(counts, (path[:-1], path[1:]), 1)
+    assert np.allclose(counts / counts.sum(axis=1, keepdims=True),
+                       sampler.transition_matrix(), atol=0.03)
+
+
+def test_markov_sampler_single_place():
+    sampler = MarkovSampler([1.], anchors=3, return_home=0.5)
+
+    assert sampler.sample(np.random.default_rng(1), size=3).tolist() == [0, 0, 0]
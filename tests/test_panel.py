@@ -0,0 +1,57 @@
+import csv
+from zipfile import ZipFile
+
+import pytest
+from mock import patch
+
+from google_semantic_location_history.panel import generate_panel, main
+from google_semantic_location_history.simulation_gslh import GenerationOptions, WriteOptions
+
+
+@pytest.mark.usefixtures("one_year")
+@patch('google_semantic_location_history.simulation_gslh.MONTHS', ['JANUARY', 'FEBRUARY'])
+def test_generate_panel(tmp_path):
+    manifest = generate_panel("tests/data/2021_JANUARY.json", 3, tmp_path / "serial", seed=1)
+    parallel = generate_panel(
+        "tests/data/2021_JANUARY.json", 3, tmp_path / "parallel", seed=1,
+        options=GenerationOptions(jobs=2))
+
+    assert [record["participant"] for record in manifest] == [0, 1, 2]
+    assert len({record["seed"] for record in manifest}) == 3
+    assert manifest[0]["file"] == "participant_00000.zip"
+    assert manifest[0]["months"] == 2
+    assert manifest[0]["timeline_objects"] == 10
+    for record, parallel_record in zip(manifest, parallel):
+        with ZipFile(tmp_path / "serial" / record["file"]) as serial_zip, \
+                ZipFile(tmp_path / "parallel" / parallel_record["file"]) as parallel_zip:
+            assert len(serial_zip.namelist()) == 2
+            for name in serial_zip.namelist():
+                assert serial_zip.read(name) == parallel_zip.read(name)
+
+    with open(tmp_path / "serial" / "manifest.csv", encoding='utf8') as file:
+        rows = list(csv.DictReader(file))
+    assert [row["file"] for row in rows] == [record["file"] for record in manifest]
+    assert rows[2]["bytes"] == str(manifest[2]["bytes"])
+
+    compressed = generate_panel("tests/data/2021_JANUARY.json", 1, tmp_path / "deflate", seed=1,
+                                write_options=WriteOptions(compression="deflate"))
+    with ZipFile(tmp_path / "serial" / manifest[0]["file"]) as serial_zip, \
+            ZipFile(tmp_path / "deflate" / compressed[0]["file"]) as deflate_zip:
+        for name in serial_zip.namelist():
+            assert deflate_zip.read(name) == serial_zip.read(name)
+            assert deflate_zip.getinfo(name).compress_size < serial_zip.getinfo(name).compress_size
+
+
+@patch('google_semantic_location_history.panel.generate_panel')
+def test_main(panel):
+    panel.return_value = []
+    main(["example.json", "out", "-n", "10", "--seed", "2", "-j", "0", "--compression", "deflate",
+          "--compresslevel", "9"])
+
+    panel.assert_called_once_with(
+        "example.json", 10, "out", seed=2, options=GenerationOptions(
+            distance="geodesic", jobs=None, cache_dir=None, filler="faker",
+            place_generator="faker", mobility="independent", points_per_km=None),
+        write_options=WriteOptions(compression="deflate", compresslevel=9))
+    with pytest.raises(SystemExit):
+        main(["example.json", "out", "--threads", "0"])
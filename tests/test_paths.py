@@ -0,0 +1,31 @@
+import numpy as np
+from google_semantic_location_history.paths import Segments, interpolate_paths
+
+
+def test_interpolate_paths():
+    paths = interpolate_paths(Segments(
+        (np.array([520000000, 521000000]), np.array([50000000, 51000000])),
+        (np.array([520100000, 521000000]), np.array([50100000, 51000000])),
+        (np.array([1000, 5000]), np.array([2000, 5000])),
+        np.array([3500, 0])), np.random.default_rng(1), points_per_km=2.)
+
+    assert paths.offsets.tolist() == [0, 9, 11]
+    assert paths.latitudes[[0, 8, 9, 10]].tolist() == [520000000, 520100000, 521000000, 521000000]
+    assert paths.longitudes[[0, 8]].tolist() == [50000000, 50100000]
+    assert paths.timestamps.tolist() == [1000, 1125, 1250, 1375, 1500, 1625, 1750, 1875, 2000,
+                                         5000, 5000]
+    assert np.all(np.diff(paths.latitudes[:9]) != 0)
+    assert paths.accuracies.min() >= 1
+    assert paths.accuracies[[0, 8]].tolist() == [1, 1]
+    # points between the start and end point are within a few jitter deviations of the line
+    expected = np.linspace(520000000, 520100000, 9)
+    assert np.abs(paths.latitudes[:9] - expected).max() < 100 * 1e7 / 111e3
+
+
+def test_interpolate_paths_reproducible():
+    segments = Segments((np.array([0]), np.array([0])), (np.array([100000]), np.array([100000])),
+                        (np.array([0]), np.array([60000])), np.array([2000]))
+    first = interpolate_paths(segments, np.random.default_rng(3), jitter=5.)
+
+    assert all(np.array_equal(one, other) for one, other in zip(
+        first, interpolate_paths(segments, np.random.default_rng(3), jitter=5.)))
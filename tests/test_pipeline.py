@@ -0,0 +1,55 @@
+import threading
+import pytest
+from google_semantic_location_history.instrumentation import SummaryReporter
+from google_semantic_location_history.pipeline import pipelined
+
+
+def _months(count, produced=None):
+    for number in range(count):
+        if produced is not None:
+            produced.append(number)
+        yield (2021, f"MONTH{number}"), {"number": number}
+
+
+def test_pipelined():
+    reporter = SummaryReporter()
+    months = list(pipelined(_months(10), maxsize=2, observer=reporter))
+
+    assert months == list(_months(10))
+    summary = reporter.summary()
+    assert summary["enqueue"]["count"] == 10
+    assert summary["dequeue"]["count"] == 11
+    assert 0 <= summary["enqueue"]["queued"] <= 2
+    assert [event.month for event in reporter.events if event.stage == "enqueue"] == [
+        f"MONTH{number}" for number in range(10)]
+    assert list(pipelined([], maxsize=1)) == []
+    with pytest.raises(ValueError):
+        list(pipelined(_months(1), maxsize=0))
+
+
+def test_pipelined_backpressure():
+    produced = []
+    months = pipelined(_months(100, produced), maxsize=3)
+    assert next(months)[1] == {"number": 0}
+    # the queue is full: 3 months wait, one more waits for room and one was consumed
+    for _ in range(100):
+        if len(produced) >= 5:
+            break
+        threading.Event().wait(0.01)
+    threading.Event().wait(0.1)
+    assert len(produced) == 5
+
+    months.close()
+    assert len(produced) == 5
+    assert not [thread for thread in threading.enumerate() if thread.name == "gslh-producer"]
+
+
+def test_pipelined_error():
+    def failing():
+        yield (2021, "JANUARY"), {}
+        raise RuntimeError("generation failed")
+
+    months = pipelined(failing())
+    assert next(months) == ((2021, "JANUARY"), {})
+    with pytest.raises(RuntimeError, match="generation failed"):
+        next(months)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from google_semantic_location_history.places import _numbered, _unique_codes, bulk_places
+
+
+def test_unique_codes():
+    codes = _unique_codes(np.random.default_rng(1), 100, 100)
+
+    assert sorted(codes.tolist()) == list(range(100))
+    with pytest.raises(ValueError):
+        _unique_codes(np.random.default_rng(1), 101, 100)
+
+
+def test_numbered():
+    assert _numbered(["a", "b"], np.array([1, 0, 1, 1])) == ["b", "a", "b 2", "b 3"]
+
+
+def test_bulk_places():
+    places = bulk_places(total=2000, seed=1)
+
+    assert places == bulk_places(total=2000, seed=1)
+    assert places != bulk_places(total=2000, seed=2)
+    assert len(places) == 2000
+    assert len({place["name"] for place in places.values()}) == 2000
+    assert len({place["address"] for place in places.values()}) == 2000
+    assert len({(place["latitude"], place["longitude"]) for place in places.values()}) == 2000
+    place = next(iter(places.values()))
+    assert set(place) == {"name", "address", "latitude", "longitude"}
+    assert len(place["address"].split("\n")) == 3
+    latitudes = [place["latitude"] for place in places.values()]
+    assert max(latitudes) - min(latitudes) <= 0.1
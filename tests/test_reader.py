@@ -0,0 +1,97 @@
+import io
+import json
+import pytest
+from google_semantic_location_history.reader import (
+    iter_members, iter_timeline_objects, iter_timeline, read_columns, to_columns, MISSING
+)
+from google_semantic_location_history.simulation_gslh import write_zipfile
+
+
+@pytest.fixture(name="month")
+def fixture_month():
+    with open("tests/data/2021_JANUARY.json", encoding='utf-8') as file_object:
+        return json.load(file_object)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_timeline_objects(month, chunk_size):
+    with open("tests/data/2021_JANUARY.json", 'rb') as file_object:
+        timeline_objects = list(iter_timeline_objects(file_object, chunk_size))
+
+    assert timeline_objects == month["timelineObjects"]
+
+
+def test_iter_timeline_objects_other_keys():
+    content = json.dumps({
+        "before": {"timelineObjects": [1]}, "timelineObjects": [{"a": 1.5}, {"b": [1, 2]}],
+        "after": -12, "name": "é"
+    }, ensure_ascii=False).encode('utf-8')
+
+    assert list(iter_timeline_objects(io.BytesIO(content), 3)) == [{"a": 1.5}, {"b": [1, 2]}]
+    assert not list(iter_timeline_objects(io.BytesIO(b'{ "timelineObjects" : [ ] }'), 2))
+    with pytest.raises(ValueError):
+        list(iter_timeline_objects(io.BytesIO(b'[]')))
+    with pytest.raises(ValueError):
+        list(iter_timeline_objects(io.BytesIO(b'{"timelineObjects": [{"a": }]}')))
+
+
+def test_iter_timeline_objects_numbers():
+    numbers = [-2.5e-07, 1.5, 10, -0.125, 3E+20, 1e5, 0]
+    content = json.dumps({"timelineObjects": numbers, "after": -2.5e-07}).encode('utf-8')
+
+    for chunk_size in range(1, len(content) + 1):
+        assert list(iter_timeline_objects(io.BytesIO(content), chunk_size)) == numbers
+    assert list(iter_timeline_objects(io.BytesIO(b'{"timelineObjects": [-2.5e-07]}'), 3)) == [
+        -2.5e-07
+    ]
+
+
+def test_iter_timeline(tmp_path, month):
+    data = {(2021, 'JANUARY'): month, (2020, 'MARCH'): {'timelineObjects': [{'a': 1}]}}
+    write_zipfile(data, tmp_path / "takeout.zip")
+    for (year, name), month_data in data.items():
+        folder = tmp_path / "extracted" / "Semantic Location History" / str(year)
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"{year}_{name}.json").write_text(json.dumps(month_data))
+    (tmp_path / "extracted" / "2021_JANUARY.json").write_text("not a month")
+    (tmp_path / "extracted" / "Semantic Location History" / "2021" / "2021_SOMEDAY.json") \
+        .write_text("not a month")
+
+    for path in (tmp_path / "takeout.zip", tmp_path / "extracted"):
+        assert [key for key, _ in iter_members(str(path))] == [(2020, 'MARCH'), (2021, 'JANUARY')]
+        timeline = list(iter_timeline(str(path), chunk_size=100))
+        assert timeline == [((2020, 'MARCH'), {'a': 1})] + [
+            ((2021, 'JANUARY'), timeline_object) for timeline_object in month["timelineObjects"]]
+
+
+def test_read_columns(tmp_path, month):
+    write_zipfile({(2021, 'JANUARY'): month}, tmp_path / "takeout.zip")
+    columns = read_columns(str(tmp_path / "takeout.zip"))
+
+    visits = [item["placeVisit"] for item in month["timelineObjects"] if "placeVisit" in item]
+    segments = [item["activitySegment"] for item in month["timelineObjects"]
+                if "activitySegment" in item]
+    assert len(columns["visits"]["placeId"]) == len(visits)
+    assert len(columns["segments"]["distance"]) == len(segments)
+    assert columns["visits"]["latitudeE7"].tolist() == [
+        visit["location"]["latitudeE7"] for visit in visits]
+    assert columns["visits"]["startTimestampMs"].tolist() == [
+        int(visit["duration"]["startTimestampMs"]) for visit in visits]
+    assert columns["segments"]["activityType"].tolist() == [
+        segment["duration"]["activityType"] for segment in segments]
+
+
+def test_to_columns():
+    columns = to_columns([
+        {"placeVisit": {"duration": {"startTimestamp": "2021-01-01T00:00:00.500Z"},
+                        "location": {"placeId": "a", "latitudeE7": 1}}},
+        {"activitySegment": {"activityType": "CYCLING", "distance": 10}},
+    ])
+
+    assert columns["visits"]["startTimestampMs"].tolist() == [1609459200500]
+    assert columns["visits"]["endTimestampMs"].tolist() == [MISSING]
+    assert columns["visits"]["longitudeE7"].tolist() == [MISSING]
+    assert columns["visits"]["placeId"].tolist() == ["a"]
+    assert columns["segments"]["activityType"].tolist() == ["CYCLING"]
+    assert columns["segments"]["distance"].tolist() == [10]
+    assert to_columns([])["segments"]["distance"].dtype.kind == 'i'
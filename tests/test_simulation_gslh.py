@@ -1,5 +1,13 @@
+import json
+import pytest
 from datetime import datetime, timezone
-from google_semantic_location_history.simulation_gslh import _create_places, _update_data, fake_data
+from zipfile import ZipFile
+from google_semantic_location_history.compact import CompactMonth, place_columns
+from google_semantic_location_history.export import load_columns
+from google_semantic_location_history.instrumentation import SummaryReporter
+from google_semantic_location_history.simulation_gslh import (
+    GenerationOptions, WriteOptions, _create_places, _update_data, fake_data, iter_fake_data,
+    lazy_fake_data, write_zipfile, write_resumable, _month_seed)
 from mock import patch, MagicMock
 
 ACTIVITY_DATA = {
@@ -94,6 +102,15 @@ def test_create_places():
     assert result == PLACES
 
 
+def test_create_places_bulk():
+    result = _create_places(total=200, seed=1, generator="bulk")
+
+    assert len(result) == 200
+    assert result == _create_places(total=200, seed=1, generator="bulk")
+    with pytest.raises(ValueError):
+        _create_places(total=2, seed=1, generator="unique")
+
+
 def test_update_data_visit():
     result = _update_data(VISIT_DATA, datetime(2020, 1, 1, tzinfo=timezone.utc), PLACES, seed=1)
     expected = {
@@ -142,11 +159,11 @@ def test_update_data_visit():
         }, {
             'placeVisit': {
                 'location': {
-                    'placeId': 'b1-5003748L',
-                    'address': 'Hannahring 17\n1669SC\nKruiningen',
-                    'name': 'Reimes BV',
-                    'latitudeE7': 514558100,
-                    'longitudeE7': 55500070
+                    'placeId': 'V1-2419116P',
+                    'address': 'Aylinhof 7\n8533SB\nRidderkerk',
+                    'name': 'Medtronic',
+                    'latitudeE7': 514638450,
+                    'longitudeE7': 54707000
                 },
                 'duration': {
                     'startTimestampMs': '1577849656320',
@@ -174,25 +191,25 @@ def test_update_data_activity():
                     'longitudeE7': 55500070
                 },
                 'endLocation': {
-                    'latitudeE7': 514638450,
-                    'longitudeE7': 514638450
+                    'latitudeE7': 514558100,
+                    'longitudeE7': 55500070
                 },
-                'distance': 5583
+                'distance': 0
             }
         }, {
             'activitySegment': {
                 'duration': {
                     'startTimestampMs': '1577837871360',
                     'endTimestampMs': '1577838942720',
-                    'activityType': 'WALKING'
+                    'activityType': 'IN_TRAIN'
                 },
                 'startLocation': {
-                    'latitudeE7': 514638450,
-                    'longitudeE7': 54707000
+                    'latitudeE7': 514558100,
+                    'longitudeE7': 55500070
                 },
                 'endLocation': {
-                    'latitudeE7': 514558100,
-                    'longitudeE7': 514558100
+                    'latitudeE7': 514638450,
+                    'longitudeE7': 54707000
                 },
                 'distance': 5583
             }
@@ -282,4 +299,228 @@ def test_fake_data(created_places, updated_data):
         }
     }
 
-    assert result == expected
\ No newline at end of file
+    assert result == expected
+
+
+@pytest.mark.usefixtures("one_year")
+def test_fake_data_jobs():
+    serial = fake_data("tests/data/2021_JANUARY.json", seed=3)
+    parallel = fake_data("tests/data/2021_JANUARY.json", seed=3, options=GenerationOptions(jobs=2))
+
+    assert list(parallel) == list(serial)
+    assert parallel == serial
+    assert len(serial[(2021, 'MARCH')]['timelineObjects']) == 5
+    assert serial[(2021, 'MARCH')] != serial[(2021, 'APRIL')]
+
+
+@pytest.mark.usefixtures("one_year")
+def test_fake_data_filler_pool():
+    faker = fake_data("tests/data/2021_JANUARY.json", seed=3)
+    pool = fake_data("tests/data/2021_JANUARY.json", seed=3, options=GenerationOptions(filler="pool"))
+
+    assert pool == fake_data(
+        "tests/data/2021_JANUARY.json", seed=3, options=GenerationOptions(filler="pool", jobs=2))
+    for key, data in faker.items():
+        for faker_object, pool_object in zip(data['timelineObjects'], pool[key]['timelineObjects']):
+            assert faker_object['placeVisit']['location']['placeId'] == \
+                pool_object['placeVisit']['location']['placeId']
+            assert faker_object['placeVisit']['centerLatE7'] != \
+                pool_object['placeVisit']['centerLatE7']
+
+
+@pytest.mark.usefixtures("one_year")
+def test_fake_data_paths():
+    filler = fake_data("tests/data/2021_JANUARY.json", seed=3)
+    paths = fake_data("tests/data/2021_JANUARY.json", seed=3,
+                      options=GenerationOptions(points_per_km=2.))
+
+    for key, data in paths.items():
+        for filler_object, path_object in zip(filler[key]['timelineObjects'],
+                                              data['timelineObjects']):
+            segment = path_object['activitySegment']
+            assert segment['duration'] == filler_object['activitySegment']['duration']
+            waypoints = segment['waypointPath']['waypoints']
+            points = segment['simplifiedRawPath']['points']
+            assert len(waypoints) == len(points) == 2 + int(segment['distance'] / 1e3 * 2.)
+            assert waypoints[0] == {'latE7': segment['startLocation']['latitudeE7'],
+                                    'lngE7': segment['startLocation']['longitudeE7']}
+            assert waypoints[-1] == {'latE7': segment['endLocation']['latitudeE7'],
+                                     'lngE7': segment['endLocation']['longitudeE7']}
+            assert points[0]['timestampMs'] == segment['duration']['startTimestampMs']
+            assert points[-1]['timestampMs'] == segment['duration']['endTimestampMs']
+            assert set(points[1]) == {'latE7', 'lngE7', 'timestampMs', 'accuracyMeters'}
+
+
+@pytest.mark.parametrize("options", [{}, {"filler": "pool", "points_per_km": 2.}])
+@pytest.mark.usefixtures("one_year")
+def test_fake_data_compact(tmp_path, options):
+    expected = fake_data("tests/data/2021_JANUARY.json", seed=3,
+                         options=GenerationOptions(**options))
+    with patch('google_semantic_location_history.simulation_gslh.place_columns',
+               wraps=place_columns) as collect:
+        compact = fake_data("tests/data/2021_JANUARY.json", seed=3,
+                            options=GenerationOptions(compact=True, **options))
+
+    # the fields of the places are collected once, not per month
+    assert collect.call_count == 1
+
+    assert isinstance(compact[(2021, 'MARCH')], CompactMonth)
+    assert {key: month.to_dict() for key, month in compact.items()} == expected
+    assert fake_data(
+        "tests/data/2021_JANUARY.json", seed=3,
+        options=GenerationOptions(compact=True, jobs=2, **options)
+    )[(2021, 'MAY')].to_dict() == expected[(2021, 'MAY')]
+
+    write_zipfile(expected, tmp_path / "dict.zip")
+    write_zipfile(compact, tmp_path / "compact.zip")
+    with ZipFile(tmp_path / "dict.zip") as dict_archive, \
+            ZipFile(tmp_path / "compact.zip") as compact_archive:
+        for name in dict_archive.namelist():
+            assert compact_archive.read(name) == dict_archive.read(name)
+
+
+@pytest.mark.parametrize("mobility", ["gravity", "markov"])
+@pytest.mark.usefixtures("one_year")
+def test_fake_data_mobility(mobility):
+    independent = fake_data("tests/data/2021_JANUARY.json", seed=3)
+    result = fake_data("tests/data/2021_JANUARY.json", seed=3,
+                       options=GenerationOptions(mobility=mobility))
+
+    assert result == fake_data("tests/data/2021_JANUARY.json", seed=3,
+                               options=GenerationOptions(mobility=mobility, jobs=2))
+    assert result != independent
+    assert len(result[(2021, 'MARCH')]['timelineObjects']) == 5
+    with pytest.raises(ValueError):
+        fake_data("tests/data/2021_JANUARY.json", seed=3,
+                  options=GenerationOptions(mobility="random"))
+
+
+@pytest.mark.usefixtures("one_year")
+def test_fake_data_observer(tmp_path):
+    serial = SummaryReporter()
+    parallel = SummaryReporter()
+    data = fake_data("tests/data/2021_JANUARY.json", seed=3, observer=serial)
+    fake_data("tests/data/2021_JANUARY.json", seed=3, options=GenerationOptions(jobs=2),
+              observer=parallel)
+    write_zipfile(data, tmp_path / "out.zip", observer=serial)
+
+    for reporter in (serial, parallel):
+        assert [event.stage for event in reporter.events[:5]] == [
+            "places", "distances", "schema", "fill", "update"]
+        assert reporter.events[3].year == 2021
+        assert reporter.events[3].month == "JANUARY"
+        assert reporter.events[3].objects == 5
+    assert serial.summary()["update"]["count"] == 12
+    assert parallel.summary()["fill"]["objects"] == 60
+    assert serial.summary()["encode"]["count"] == 12
+    assert serial.summary()["write"]["objects"] == 60
+
+
+def test_month_seed():
+    assert _month_seed(3, 2020, 'MARCH') == _month_seed(3, 2020, 'MARCH')
+    assert _month_seed(3, 2020, 'MARCH') != _month_seed(4, 2020, 'MARCH')
+    assert _month_seed(3, 2020, 'MARCH') != _month_seed(3, 2021, 'MARCH')
+    assert _month_seed(3, 2020, 'MARCH') != _month_seed(3, 2020, 'APRIL')
+
+
+@pytest.mark.usefixtures("one_year")
+def test_iter_fake_data():
+    months = iter_fake_data("tests/data/2021_JANUARY.json", seed=3)
+    key, data = next(months)
+
+    assert key == (2021, 'JANUARY')
+    assert len(data['timelineObjects']) == 5
+    assert dict([(key, data), *months]) == fake_data("tests/data/2021_JANUARY.json", seed=3)
+
+
+@pytest.mark.usefixtures("one_year")
+def test_lazy_fake_data():
+    expected = fake_data("tests/data/2021_JANUARY.json", seed=3)
+    reporter = SummaryReporter()
+    months = lazy_fake_data("tests/data/2021_JANUARY.json", seed=3, maxsize=2, observer=reporter)
+
+    assert months[(2021, 'MARCH')] == expected[(2021, 'MARCH')]
+    assert reporter.summary()["fill"]["count"] == 1
+    assert months[(2021, 'MARCH')] is months[(2021, 'MARCH')]
+    assert reporter.summary()["fill"]["count"] == 1
+    assert (2021, 'JUNE') in months
+    assert (2020, 'JUNE') not in months
+    with pytest.raises(KeyError):
+        months[(2020, 'JUNE')]
+    assert list(months) == list(expected)
+    assert len(months) == 12
+    assert reporter.summary()["fill"]["count"] == 1
+    assert dict(months) == expected
+    assert reporter.summary()["fill"]["count"] == 13
+
+
+def test_write_zipfile(tmp_path):
+    data = {(2020, 'MARCH'): {'timelineObjects': []}, (2021, 'JANUARY'): {'timelineObjects': [{}]}}
+    write_zipfile(data, tmp_path / "dict.zip")
+    write_zipfile(iter(data.items()), tmp_path / "iter.zip")
+
+    for name in ("dict.zip", "iter.zip"):
+        with ZipFile(tmp_path / name) as zip_archive:
+            assert zip_archive.namelist() == [
+                'Takeout/Location History/Semantic Location History/2020/2020_MARCH.json',
+                'Takeout/Location History/Semantic Location History/2021/2021_JANUARY.json'
+            ]
+            assert json.loads(zip_archive.read(zip_archive.namelist()[1])) == data[(2021, 'JANUARY')]
+
+
+def test_write_zipfile_compression(tmp_path):
+    data = {(2021, month): {'timelineObjects': [{'month': month}] * 50}
+            for month in ['JANUARY', 'FEBRUARY', 'MARCH']}
+    reporter = SummaryReporter()
+    write_zipfile(data, tmp_path / "stored.zip")
+    write_zipfile(data, tmp_path / "deflate.zip", reporter,
+                  WriteOptions(encoder="auto", compression="deflate", compresslevel=9, threads=2))
+
+    with ZipFile(tmp_path / "stored.zip") as stored, ZipFile(tmp_path / "deflate.zip") as deflate:
+        assert deflate.namelist() == stored.namelist()
+        for name in stored.namelist():
+            assert json.loads(deflate.read(name)) == json.loads(stored.read(name))
+        assert sum(info.compress_size for info in deflate.infolist()) < \
+            sum(info.compress_size for info in stored.infolist())
+    assert [stage for stage in reporter.summary()] == ["encode", "compress", "write"]
+    assert reporter.summary()["compress"]["objects"] == 150
+    with pytest.raises(ValueError):
+        write_zipfile(data, tmp_path / "none.zip", options=WriteOptions(threads=0))
+
+
+@pytest.mark.usefixtures("one_year")
+def test_write_resumable(tmp_path):
+    checkpoints = tmp_path / "checkpoints"
+    write_zipfile(fake_data("tests/data/2021_JANUARY.json", seed=3), tmp_path / "full.zip")
+
+    # interrupt the run after three months
+    def interrupted(*args, **kwargs):
+        months = iter_fake_data(*args, **kwargs)
+        yield from (next(months) for _ in range(3))
+        raise KeyboardInterrupt
+    with patch('google_semantic_location_history.simulation_gslh.iter_fake_data',
+               interrupted), pytest.raises(KeyboardInterrupt):
+        write_resumable("tests/data/2021_JANUARY.json", tmp_path / "out.zip", checkpoints,
+                        seed=3, options=GenerationOptions(jobs=2))
+
+    (checkpoints / "2021_JANUARY.json.sha256").unlink()
+    assert write_resumable(
+        "tests/data/2021_JANUARY.json", tmp_path / "out.zip", checkpoints, seed=3) == 10
+    assert write_resumable(
+        "tests/data/2021_JANUARY.json", tmp_path / "out.zip", checkpoints, seed=3,
+        write_options=WriteOptions(compression="deflate")) == 0
+    with ZipFile(tmp_path / "full.zip") as full, ZipFile(tmp_path / "out.zip") as resumed:
+        assert resumed.namelist() == full.namelist()
+        for name in full.namelist():
+            assert resumed.read(name) == full.read(name)
+    with pytest.raises(ValueError):
+        write_resumable("tests/data/2021_JANUARY.json", tmp_path / "out.zip", checkpoints, seed=4)
+    # months stored with another encoder or representation are not mixed into the archive
+    with pytest.raises(ValueError):
+        write_resumable("tests/data/2021_JANUARY.json", tmp_path / "out.zip", checkpoints, seed=3,
+                        options=GenerationOptions(compact=True))
+    with patch.dict('google_semantic_location_history.archive.ENCODERS', {"fast": json.dumps},
+                    clear=True), pytest.raises(ValueError):
+        write_resumable("tests/data/2021_JANUARY.json", tmp_path / "out.zip", checkpoints, seed=3,
+                        write_options=WriteOptions(encoder="auto"))
+
@@ -0,0 +1,45 @@
+import numpy as np
+from google_semantic_location_history.places import bulk_places
+from google_semantic_location_history.spatial import GravitySampler, GridIndex
+
+PLACES = bulk_places(total=2000, seed=1)
+
+
+def _brute_force(index, origin, k, limit):
+    distances = index.distances(origin, np.arange(limit))
+    distances[origin] = np.inf
+    return set(np.argsort(distances, kind='stable')[:k].tolist())
+
+
+def test_grid_index_nearest():
+    index = GridIndex.from_places(PLACES)
+
+    assert len(index) == 2000
+    for origin in (0, 17, 1999):
+        nearest, distances = index.nearest(origin, 10)
+        assert set(nearest.tolist()) == _brute_force(index, origin, 10, 2000)
+        assert origin not in nearest.tolist()
+        assert list(distances) == sorted(distances)
+    nearest, _ = index.nearest(3, 10, limit=50)
+    assert set(nearest.tolist()) == _brute_force(index, 3, 10, 50)
+    nearest, _ = index.nearest(3, 10, limit=5)
+    assert sorted(nearest.tolist()) == [0, 1, 2, 4]
+
+
+def test_gravity_sampler():
+    index = GridIndex.from_places(PLACES)
+    weights = np.ones(1000)
+    sampler = GravitySampler(index, weights, anchors=2, neighbours=8)
+    path = sampler.sample(np.random.default_rng(1), size=500)
+
+    assert len(sampler) == 1000
+    assert len(path) == 500
+    assert path.max() < 1000
+    assert np.array_equal(path, sampler.sample(np.random.default_rng(1), size=500))
+    assert isinstance(sampler.sample(np.random.default_rng(1)), int)
+    for current, following in zip(path[:-1].tolist(), path[1:].tolist()):
+        assert following in _brute_force(index, current, 8, 1000) | {0, 1}
+    # consecutive places are nearer to each other than places in random order
+    shuffled = np.random.default_rng(2).permutation(path)
+    assert np.hypot(*np.diff([index.x[path], index.y[path]])).mean() < \
+        np.hypot(*np.diff([index.x[shuffled], index.y[shuffled]])).mean()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from google_semantic_location_history.timeline import (
+    AliasSampler, generate_timeline, normalize_weights)
+
+
+def test_generate_timeline():
+    has_visit = np.array([True, False, True])
+    has_activity = np.array([True, True, False])
+    result = generate_timeline(
+        has_visit, has_activity, (1000.5, 10.25, 5.5),
+        (AliasSampler([1, 1]), AliasSampler([1, 3])), np.random.default_rng(1))
+
+    assert result.visit_start[[0, 2]].tolist() == [1000, 1021]
+    assert result.visit_end[[0, 2]].tolist() == [1010, 1032]
+    assert result.activity_start[[0, 1]].tolist() == [1010, 1016]
+    assert result.activity_end[[0, 1]].tolist() == [1016, 1021]
+    assert result.locations.shape == (4,)
+    assert result.activities.shape == (3,)
+    assert set(result.locations.tolist()) <= {0, 1}
+
+
+def test_generate_timeline_sequential_sum():
+    total = 1000
+    duration = 2678400000. / 3
+    result = generate_timeline(
+        np.ones(total, dtype=bool), np.zeros(total, dtype=bool), (1609455600000., duration, 0.),
+        (AliasSampler([1]), AliasSampler([1])), np.random.default_rng())
+
+    start_time = 1609455600000.
+    expected = []
+    for _ in range(total):
+        expected.append(int(start_time))
+        start_time = start_time + duration
+    assert result.visit_start.tolist() == expected
+
+
+def test_normalize_weights():
+    assert normalize_weights([1, 3]).tolist() == [0.25, 0.75]
+
+
+def test_alias_sampler():
+    weights = [0.4, 0.3, 0.05, 0.25, 0.]
+    sampler = AliasSampler(weights)
+    result = sampler.sample(np.random.default_rng(1), size=200000)
+
+    assert len(sampler) == 5
+    assert np.bincount(result, minlength=5) / len(result) == pytest.approx(weights, abs=0.005)
+
+
+def test_alias_sampler_seeded():
+    sampler = AliasSampler([1, 2, 3])
+    single = sampler.sample(np.random.default_rng(3))
+
+    assert isinstance(single, int)
+    assert sampler.sample(np.random.default_rng(3), size=1).tolist() == [single]
+    assert (sampler.sample(np.random.default_rng(3), size=50).tolist() ==
+            sampler.sample(np.random.default_rng(3), size=50).tolist())
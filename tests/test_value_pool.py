@@ -0,0 +1,45 @@
+from faker import Faker
+
+from google_semantic_location_history.value_pool import ValuePool
+
+
+def test_value_pool_types():
+    pool = ValuePool(Faker('nl_NL'), block_size=16)
+    pystr, pyint, pyfloat = pool.pystr, pool.pyint, pool.pyfloat
+    digit, company = pool.random_digit_not_null, pool.company
+
+    for _ in range(40):
+        value = pystr()
+        assert isinstance(value, str) and len(value) == 20 and value.isalpha()
+        assert isinstance(pyint(), int) and 0 <= pyint() <= 9999
+        assert isinstance(pyfloat(), float)
+        assert 1 <= digit() <= 9
+        assert isinstance(company(), str)
+
+
+def test_value_pool_seed():
+    pool = ValuePool(Faker('nl_NL'))
+    pystr, company = pool.pystr, pool.company
+
+    pool.seed_instance(1)
+    first = [(pystr(), company()) for _ in range(5)]
+    pool.seed_instance(1)
+    assert [(pystr(), company()) for _ in range(5)] == first
+    pool.seed_instance(2)
+    assert [(pystr(), company()) for _ in range(5)] != first
+
+
+def test_value_pool_draw():
+    pool = ValuePool(Faker('nl_NL'))
+
+    pool.seed_instance(1)
+    strings, integers = pool.draw("pystr", 100), pool.draw("pyint", 100)
+    floats, companies = pool.draw("pyfloat", 100), pool.draw("company", 100)
+    assert strings.dtype.kind == 'S' and len(strings) == 100
+    assert all(len(value) == 20 and value.isalpha() for value in strings.tolist())
+    assert integers.dtype.kind == 'i' and 0 <= integers.min() and integers.max() <= 9999
+    assert floats.dtype.kind == 'f'
+    assert companies.dtype.kind == 'S' and len(set(companies.tolist())) > 1
+    pool.seed_instance(1)
+    assert (pool.draw("pystr", 100) == strings).all()
+    assert len(pool.draw("pystr", 0)) == 0